@@ -5,6 +5,8 @@ from datetime import datetime, timedelta
 import folium
 from streamlit_folium import folium_static
 from utils.data_manager import DataManager
+from utils.geo_index import nearby
+from utils.location import get_user_location
 from utils.styling import add_app_styling
 
 # Initialize data manager
@@ -83,6 +85,9 @@ def show_donor_registration():
             
             contact = st.text_input("📱 Contact Number", value=user_data.get('phone', ''))
             
+            share_location = st.checkbox("📍 Share my coordinates so nearby patients can find me")
+            donor_lat, donor_lon = get_user_location("donor")
+            
             last_donation = st.date_input(
                 "📅 Last Donation Date (if any)",
                 value=None,
@@ -121,7 +126,9 @@ def show_donor_registration():
                         blood_group,
                         location,
                         contact,
-                        last_donation_str
+                        last_donation_str,
+                        latitude=donor_lat if share_location else None,
+                        longitude=donor_lon if share_location else None
                     )
                     
                     if donor_id:
@@ -168,12 +175,18 @@ def show_find_donors():
         st.subheader("🎯 Search Criteria")
         
         blood_group_needed = st.selectbox(
-            "🩸 Blood Group Required",
-            ["All", "A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"]
+            "🩸 Recipient Blood Group",
+            ["All", "A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"],
+            help="Shows available donors whose blood group can be given to this recipient"
         )
         
         location_filter = st.text_input("📍 Location Filter", placeholder="City or State")
         
+        near_me = st.checkbox("📏 Only donors near me", help="Donors who shared their coordinates, closest first")
+        if near_me:
+            search_lat, search_lon = get_user_location("search")
+            radius_km = st.slider("📏 Search radius (km)", 1, 100, 25)
+        
         search_btn = st.button("🔍 Search Donors", use_container_width=True)
     
     with col2:
@@ -181,10 +194,11 @@ def show_find_donors():
         
         if search_btn or blood_group_needed != "All":
             # Get donors from database
-            if blood_group_needed == "All":
-                donors_df = data_manager.get_blood_donors()
+            recipient_group = None if blood_group_needed == "All" else blood_group_needed
+            if near_me:
+                donors_df = data_manager.get_blood_donors(recipient_group, near=(search_lat, search_lon), radius_km=radius_km)
             else:
-                donors_df = data_manager.get_blood_donors(blood_group_needed)
+                donors_df = data_manager.get_blood_donors(recipient_group)
             
             if not donors_df.empty:
                 # Filter by location if specified
@@ -201,9 +215,11 @@ def show_find_donors():
                             with col_info:
                                 st.write(f"🩸 **Blood Group:** {donor['blood_group']}")
                                 st.write(f"📍 **Location:** {donor['location']}")
+                                if 'distance_km' in donor:
+                                    st.write(f"📏 **Distance:** {donor['distance_km']:.1f} km")
                                 st.write(f"📊 **Total Donations:** {donor['total_donations']}")
-                                if donor['last_donation']:
-                                    st.write(f"📅 **Last Donation:** {donor['last_donation']}")
+                                if pd.notna(donor['last_donation']):
+                                    st.write(f"📅 **Last Donation:** {donor['last_donation']:%Y-%m-%d}")
                             
                             with col_contact:
                                 if st.button(f"📞 Contact", key=f"contact_{donor['donor_id']}"):
@@ -232,7 +248,8 @@ def show_blood_banks():
             "phone": "+91-123-456-7890",
             "email": "bloodbank@cityhospital.com",
             "available_types": "All blood types",
-            "hours": "24/7"
+            "hours": "24/7",
+            "coordinates": [28.6139, 77.2090]
         },
         {
             "name": "Red Cross Blood Center",
@@ -240,7 +257,8 @@ def show_blood_banks():
             "phone": "+91-987-654-3210",
             "email": "donate@redcross.org",
             "available_types": "A+, B+, O+, AB-",
-            "hours": "8 AM - 6 PM"
+            "hours": "8 AM - 6 PM",
+            "coordinates": [28.6219, 77.2273]
         },
         {
             "name": "Community Blood Bank",
@@ -248,15 +266,24 @@ def show_blood_banks():
             "phone": "+91-555-123-4567",
             "email": "info@communityblood.org",
             "available_types": "O-, A-, B-",
-            "hours": "9 AM - 5 PM"
+            "hours": "9 AM - 5 PM",
+            "coordinates": [28.6061, 77.2025]
         }
     ]
     
+    user_lat, user_lon = get_user_location("banks")
+    
+    # Nearest blood banks first
+    banks_df = pd.DataFrame(blood_banks_data)
+    banks_df["latitude"] = banks_df["coordinates"].str[0]
+    banks_df["longitude"] = banks_df["coordinates"].str[1]
+    blood_banks_data = nearby(banks_df, user_lat, user_lon).to_dict("records")
+    
     col1, col2 = st.columns([2, 1])
     
     with col1:
         for i, bank in enumerate(blood_banks_data):
-            with st.expander(f"🏥 {bank['name']}", expanded=i==0):
+            with st.expander(f"🏥 {bank['name']} - {bank['distance_km']:.1f} km away", expanded=i==0):
                 col_info, col_action = st.columns([3, 1])
                 
                 with col_info:
@@ -277,18 +304,16 @@ def show_blood_banks():
         st.subheader("🗺️ Blood Bank Locations")
         
         # Create a simple map showing blood bank locations
-        m = folium.Map(location=[28.6139, 77.2090], zoom_start=12)  # Default to Delhi coordinates
-        
-        # Sample coordinates for blood banks
-        bank_coords = [
-            [28.6139, 77.2090],
-            [28.6219, 77.2273],
-            [28.6061, 77.2025]
-        ]
+        m = folium.Map(location=[user_lat, user_lon], zoom_start=12)
+        folium.Marker(
+            [user_lat, user_lon],
+            tooltip="You are here",
+            icon=folium.Icon(color='black', icon='user')
+        ).add_to(m)
         
-        for i, (bank, coord) in enumerate(zip(blood_banks_data, bank_coords)):
+        for bank in blood_banks_data:
             folium.Marker(
-                coord,
+                bank['coordinates'],
                 popup=f"🏥 {bank['name']}\n📞 {bank['phone']}",
                 tooltip=bank['name'],
                 icon=folium.Icon(color='red', icon='plus')
@@ -408,8 +433,7 @@ def show_donation_history():
     user_id = st.session_state.user_id
     
     # Check if user is registered as donor
-    donors_df = data_manager.get_blood_donors()
-    user_donor = donors_df[donors_df['user_id'] == user_id]
+    user_donor = data_manager.get_blood_donor_by_user(user_id)
     
     if user_donor.empty:
         st.info("🎯 You haven't registered as a blood donor yet.")
@@ -429,7 +453,7 @@ def show_donation_history():
         st.metric("📊 Total Donations", donor_info['total_donations'])
     
     with col3:
-        last_donation = donor_info['last_donation'] if donor_info['last_donation'] else "Never"
+        last_donation = f"{donor_info['last_donation']:%Y-%m-%d}" if pd.notna(donor_info['last_donation']) else "Never"
         st.metric("📅 Last Donation", last_donation)
     
     with col4:
@@ -3,6 +3,8 @@ import pandas as pd
 import plotly.express as px
 from datetime import datetime
 from utils.data_manager import DataManager
+from utils.blood_compatibility import can_donate
+from utils.organ_matching import hla_match_count
 from utils.styling import add_app_styling
 
 # Initialize data manager
@@ -12,6 +14,8 @@ def init_data_manager():
 
 data_manager = init_data_manager()
 
+RECIPIENTS_PER_PAGE = 10
+
 st.set_page_config(
     page_title="Organ Donation - HEALTHTECH",
     page_icon="🧠",
@@ -110,6 +114,19 @@ def show_donor_registration():
                 placeholder="List any previous surgeries or medical procedures"
             )
             
+            col_match1, col_match2 = st.columns(2)
+            
+            with col_match1:
+                hla_typing = st.text_input(
+                    "🧬 HLA Typing (if known)",
+                    placeholder="A1,A2;B7,B8;DR2,DR4",
+                    help="Used to rank recipients by tissue compatibility"
+                )
+            
+            with col_match2:
+                donor_weight = st.number_input("⚖️ Weight (kg)", min_value=0.0, max_value=300.0, value=0.0, step=0.5,
+                                               help="Used for organ size matching; leave at 0 if unsure")
+            
             # Emergency contact
             st.subheader("🚨 Emergency Contact")
             
@@ -166,7 +183,9 @@ def show_donor_registration():
                         st.session_state.user_id,
                         selected_organs,
                         full_medical_info,
-                        emergency_contact_info
+                        emergency_contact_info,
+                        hla_typing=hla_typing or None,
+                        weight=donor_weight or None
                     )
                     
                     if donor_id:
@@ -230,50 +249,6 @@ def show_find_recipients():
     """Show organ recipients needing donations"""
     st.header("🔍 Find Recipients in Need")
     
-    # Sample recipient data (in real app, this would be anonymized and from database)
-    recipients_data = [
-        {
-            "id": "R001",
-            "organ_needed": "Kidney",
-            "blood_group": "O+",
-            "age_range": "35-45",
-            "urgency": "Critical",
-            "waiting_time": "2 years 3 months",
-            "location": "Mumbai, Maharashtra",
-            "compatibility": "High"
-        },
-        {
-            "id": "R002",
-            "organ_needed": "Liver",
-            "blood_group": "A+",
-            "age_range": "25-35",
-            "urgency": "High",
-            "waiting_time": "1 year 8 months",
-            "location": "Delhi, NCR",
-            "compatibility": "Medium"
-        },
-        {
-            "id": "R003",
-            "organ_needed": "Heart",
-            "blood_group": "B-",
-            "age_range": "45-55",
-            "urgency": "Critical",
-            "waiting_time": "6 months",
-            "location": "Chennai, Tamil Nadu",
-            "compatibility": "Low"
-        },
-        {
-            "id": "R004",
-            "organ_needed": "Cornea",
-            "blood_group": "AB+",
-            "age_range": "15-25",
-            "urgency": "Medium",
-            "waiting_time": "8 months",
-            "location": "Bangalore, Karnataka",
-            "compatibility": "High"
-        }
-    ]
-    
     col1, col2 = st.columns([1, 3])
     
     with col1:
@@ -295,39 +270,51 @@ def show_find_recipients():
         )
         
         location_filter = st.text_input("📍 Location", placeholder="City or State")
+        
+        with st.expander("➕ Add Recipient to Waitlist"):
+            show_add_recipient_form()
     
     with col2:
         st.subheader("👥 Recipients Waiting")
         
-        # Filter recipients based on criteria
-        filtered_recipients = recipients_data
-        
-        if organ_filter != "All":
-            filtered_recipients = [r for r in filtered_recipients if r['organ_needed'] == organ_filter]
-        
-        if blood_group_filter != "All":
-            filtered_recipients = [r for r in filtered_recipients if r['blood_group'] == blood_group_filter]
-        
-        if urgency_filter != "All":
-            filtered_recipients = [r for r in filtered_recipients if r['urgency'] == urgency_filter]
-        
-        if location_filter:
-            filtered_recipients = [r for r in filtered_recipients 
-                                 if location_filter.lower() in r['location'].lower()]
-        
-        if filtered_recipients:
-            st.info(f"Found {len(filtered_recipients)} recipients matching your criteria")
+        # Recipients shown so far; changing a filter starts over from the top of the list
+        filters = (organ_filter, blood_group_filter, urgency_filter, location_filter)
+        if st.session_state.get('waitlist_filters') != filters:
+            st.session_state.waitlist_filters = filters
+            st.session_state.waitlist_limit = RECIPIENTS_PER_PAGE
+        
+        # Ranked waitlist view for the filters, already in priority order; one extra row tells if there are more
+        recipients_df = data_manager.get_waitlist(
+            None if organ_filter == "All" else organ_filter,
+            None if blood_group_filter == "All" else blood_group_filter,
+            limit=st.session_state.waitlist_limit + 1,
+            urgency=None if urgency_filter == "All" else urgency_filter,
+            location=location_filter or None
+        )
+        has_more = len(recipients_df) > st.session_state.waitlist_limit
+        recipients_df = recipients_df.head(st.session_state.waitlist_limit)
+        
+        if not recipients_df.empty:
+            st.info(f"Showing the {len(recipients_df)} highest-priority recipients matching your criteria")
+            
+            # Score the recipients against the user's own donor registration, if any
+            match_scores = {}
+            donors_df = data_manager.get_organ_donors()
+            if not donors_df.empty:
+                my_donor = donors_df[donors_df['user_id'] == st.session_state.user_id]
+                if not my_donor.empty:
+                    matches = data_manager.match_organ_recipients(recipients_df, k=len(recipients_df), donors=my_donor)
+                    match_scores = dict(zip(matches['recipient_id'], matches['score']))
+            
+            urgency_colors = {
+                "Critical": "red",
+                "High": "orange", 
+                "Medium": "yellow",
+                "Low": "green"
+            }
             
-            for recipient in filtered_recipients:
+            for _, recipient in recipients_df.iterrows():
                 with st.container():
-                    # Color code by urgency
-                    urgency_colors = {
-                        "Critical": "red",
-                        "High": "orange", 
-                        "Medium": "yellow",
-                        "Low": "green"
-                    }
-                    
                     urgency_color = urgency_colors.get(recipient['urgency'], 'blue')
                     
                     col_info, col_details, col_action = st.columns([2, 2, 1])
@@ -335,23 +322,34 @@ def show_find_recipients():
                     with col_info:
                         st.markdown(f"🫀 **Organ Needed:** {recipient['organ_needed']}")
                         st.markdown(f"🩸 **Blood Group:** {recipient['blood_group']}")
-                        st.markdown(f"👤 **Age Range:** {recipient['age_range']}")
+                        if pd.notna(recipient['age_range']):
+                            st.markdown(f"👤 **Age Range:** {recipient['age_range']}")
                     
                     with col_details:
-                        st.markdown(f"📍 **Location:** {recipient['location']}")
-                        st.markdown(f"⏰ **Waiting Time:** {recipient['waiting_time']}")
+                        if pd.notna(recipient['location']):
+                            st.markdown(f"📍 **Location:** {recipient['location']}")
+                        st.markdown(f"⏰ **Waiting Time:** {format_wait(recipient['wait_days'])}")
                         st.markdown(f"⚡ **Urgency:** <span style='color:{urgency_color}'>{recipient['urgency']}</span>", 
                                    unsafe_allow_html=True)
                     
                     with col_action:
-                        compatibility_color = "green" if recipient['compatibility'] == "High" else "orange" if recipient['compatibility'] == "Medium" else "red"
-                        st.markdown(f"🔗 **Match:** <span style='color:{compatibility_color}'>{recipient['compatibility']}</span>", 
-                                   unsafe_allow_html=True)
+                        score = match_scores.get(recipient['recipient_id'])
+                        if score is None:
+                            st.markdown("🔗 **Match:** Not compatible" if match_scores else "🔗 **Match:** Register to see")
+                        else:
+                            compatibility = "High" if score >= 70 else "Medium" if score >= 50 else "Low"
+                            compatibility_color = "green" if compatibility == "High" else "orange" if compatibility == "Medium" else "red"
+                            st.markdown(f"🔗 **Match:** <span style='color:{compatibility_color}'>{compatibility} ({score:.0f}/100)</span>", 
+                                       unsafe_allow_html=True)
                         
-                        if st.button(f"💌 Express Interest", key=f"interest_{recipient['id']}"):
+                        if st.button(f"💌 Express Interest", key=f"interest_{recipient['recipient_id']}"):
                             st.success("Thank you for expressing interest! The transplant coordinator will contact you.")
                     
                     st.markdown("---")
+            
+            if has_more and st.button("⬇️ Load more recipients", use_container_width=True):
+                st.session_state.waitlist_limit += RECIPIENTS_PER_PAGE
+                st.rerun()
         else:
             st.warning("No recipients found matching your criteria")
     
@@ -373,6 +371,39 @@ def show_find_recipients():
     with col4:
         st.metric("📊 Success Rate", "85-95%", help="Success rate of organ transplants")
 
+def show_add_recipient_form():
+    """Transplant coordinator form to put a recipient on the waitlist"""
+    with st.form("add_waitlist_recipient"):
+        organ_needed = st.selectbox("🫀 Organ", ["Heart", "Liver", "Kidney", "Lungs", "Cornea", "Pancreas"])
+        blood_group = st.selectbox("🩸 Blood Group", ["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"])
+        urgency = st.selectbox("⚡ Urgency", ["Critical", "High", "Medium", "Low"])
+        age_range = st.text_input("👤 Age Range", placeholder="e.g., 35-45")
+        location = st.text_input("📍 Location", placeholder="City, State")
+        hla_typing = st.text_input("🧬 HLA Typing", placeholder="A1,A3;B7,B35;DR2,DR7")
+        listed_date = st.date_input("📅 Listed Since", value=datetime.now().date())
+        
+        if st.form_submit_button("➕ Add to Waitlist", use_container_width=True):
+            recipient_id = data_manager.add_waitlist_recipient(
+                organ_needed, blood_group, urgency,
+                listed_date=listed_date.strftime("%Y-%m-%d"),
+                age_range=age_range or None,
+                location=location or None,
+                hla_typing=hla_typing or None
+            )
+            if recipient_id:
+                st.success("✅ Recipient added to the waitlist")
+            else:
+                st.error("❌ Error adding recipient. Please try again.")
+
+def format_wait(days):
+    """Format a wait in days as years and months"""
+    if pd.isna(days):
+        return "Unknown"
+    years, months = divmod(int(days) // 30, 12)
+    parts = [f"{years} year{'s' if years != 1 else ''}"] if years else []
+    parts.append(f"{months} month{'s' if months != 1 else ''}")
+    return " ".join(parts)
+
 def show_compatibility_info():
     """Show organ compatibility information"""
     st.header("📊 Organ Compatibility Information")
@@ -840,24 +871,11 @@ def show_registration_benefits():
 # Helper functions
 def check_blood_compatibility(donor_blood, recipient_blood):
     """Check if donor blood is compatible with recipient"""
-    compatibility_rules = {
-        "O-": ["O-", "O+", "A-", "A+", "B-", "B+", "AB-", "AB+"],
-        "O+": ["O+", "A+", "B+", "AB+"],
-        "A-": ["A-", "A+", "AB-", "AB+"],
-        "A+": ["A+", "AB+"],
-        "B-": ["B-", "B+", "AB-", "AB+"],
-        "B+": ["B+", "AB+"],
-        "AB-": ["AB-", "AB+"],
-        "AB+": ["AB+"]
-    }
-    
-    return recipient_blood in compatibility_rules.get(donor_blood, [])
+    return can_donate(donor_blood, recipient_blood)
 
 def calculate_hla_matches(donor_hla, recipient_hla):
-    """Calculate HLA matches (simplified simulation)"""
-    # This is a simplified simulation - real HLA matching is much more complex
-    import random
-    return random.randint(0, 6)
+    """Count the donor's A/B/DR antigens shared by the recipient (0-6)"""
+    return hla_match_count(donor_hla, recipient_hla)
 
 def calculate_matching_score(blood_compat, hla_match, size_match, distance, urgency, wait_time):
     """Calculate overall matching score"""
@@ -525,8 +525,8 @@ def show_my_appointments():
         # Separate upcoming and past appointments
         today = datetime.now().date()
         
-        upcoming_appointments = appointments[pd.to_datetime(appointments['date']).dt.date >= today]
-        past_appointments = appointments[pd.to_datetime(appointments['date']).dt.date < today]
+        upcoming_appointments = appointments[appointments['date'].dt.date >= today]
+        past_appointments = appointments[appointments['date'].dt.date < today]
         
         tab1, tab2 = st.tabs(["📅 Upcoming", "📜 Past"])
         
@@ -565,7 +565,7 @@ def show_appointment_card(appointment, is_upcoming=True):
         with col1:
             st.markdown(f"**👨‍⚕️ {appointment['doctor_name']}**")
             st.write(f"🩺 {appointment['specialty']}")
-            st.write(f"📅 {appointment['date']} at {appointment['time']}")
+            st.write(f"📅 {appointment['date']:%Y-%m-%d} at {appointment['time']}")
             st.write(f"💻 {appointment['consultation_type']}")
         
         with col2:
@@ -607,7 +607,7 @@ def show_consultation_report(appointment):
     
     # Sample consultation report
     report = {
-        "Date": appointment['date'],
+        "Date": appointment['date'].strftime("%Y-%m-%d"),
         "Doctor": appointment['doctor_name'],
         "Chief Complaint": "Headache and fatigue for 3 days",
         "Diagnosis": "Tension headache, likely stress-related",
@@ -690,7 +690,7 @@ def show_active_sessions():
         
         if not appointments.empty:
             today = datetime.now().date()
-            upcoming = appointments[pd.to_datetime(appointments['date']).dt.date >= today]
+            upcoming = appointments[appointments['date'].dt.date >= today]
             
             if not upcoming.empty:
                 next_appointment = upcoming.iloc[0]
@@ -701,13 +701,13 @@ def show_active_sessions():
                 
                 with col1:
                     st.write(f"**👨‍⚕️ Doctor:** {next_appointment['doctor_name']}")
-                    st.write(f"**📅 Date:** {next_appointment['date']}")
+                    st.write(f"**📅 Date:** {next_appointment['date']:%Y-%m-%d}")
                     st.write(f"**🕐 Time:** {next_appointment['time']}")
                     st.write(f"**🩺 Type:** {next_appointment['specialty']}")
                 
                 with col2:
                     # Calculate time until appointment
-                    appointment_datetime = pd.to_datetime(f"{next_appointment['date']} {next_appointment['time']}")
+                    appointment_datetime = pd.to_datetime(f"{next_appointment['date']:%Y-%m-%d} {next_appointment['time']}")
                     time_until = appointment_datetime - datetime.now()
                     
                     if time_until.total_seconds() > 0:
@@ -827,7 +827,6 @@ def show_consultation_history():
         st.subheader("📈 Consultation Trends")
         
         # Create trend chart
-        appointments['date'] = pd.to_datetime(appointments['date'])
         monthly_counts = appointments.groupby(appointments['date'].dt.to_period('M')).size()
         
         if len(monthly_counts) > 1:
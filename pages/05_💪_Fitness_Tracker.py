@@ -302,39 +302,34 @@ def show_activity_tracker():
             log_activity = st.form_submit_button("📊 Log Activity", use_container_width=True)
             
             if log_activity:
-                # Save activity log (would typically save to a separate activities table)
-                activity_data = {
-                    "user_id": st.session_state.user_id,
-                    "date": datetime.now().strftime("%Y-%m-%d"),
-                    "category": category,
-                    "activity": activity,
-                    "duration": duration,
-                    "intensity": intensity,
-                    "calories": calories,
-                    "distance": distance,
-                    "heart_rate": heart_rate_avg,
-                    "effort": perceived_effort,
-                    "weather": weather,
-                    "mood": mood_after,
-                    "notes": exercise_notes
-                }
-                
-                # For demo, save as health record with activity notes
-                notes = f"Activity: {activity} ({duration}min, {intensity} intensity, {calories} cal)"
-                if exercise_notes:
-                    notes += f" - {exercise_notes}"
-                
-                record_id = data_manager.add_health_record(
+                # Save activity log
+                event_id = data_manager.log_activity(
                     st.session_state.user_id,
+                    activity,
+                    duration,
+                    calories=calories,
+                    intensity=intensity,
+                    category=category,
+                    distance_km=distance,
                     heart_rate=heart_rate_avg,
-                    notes=notes
+                    effort=perceived_effort,
+                    mood_after=mood_after,
+                    weather=weather,
+                    notes=exercise_notes
                 )
                 
-                if record_id:
+                if event_id:
                     st.success("✅ Activity logged successfully!")
                     
                     # Show activity summary
-                    show_activity_summary(activity_data)
+                    show_activity_summary({
+                        "activity": activity,
+                        "duration": duration,
+                        "intensity": intensity,
+                        "calories": calories,
+                        "heart_rate": heart_rate_avg,
+                        "effort": perceived_effort
+                    })
                 else:
                     st.error("❌ Error logging activity. Please try again.")
         
@@ -358,12 +353,14 @@ def show_activity_tracker():
             with cols[col_idx]:
                 if st.button(activity["name"], key=f"quick_{i}", use_container_width=True):
                     # Quick log activity
-                    notes = f"Quick Log: {activity['name']} ({activity['duration']}min, {activity['calories']} cal)"
-                    record_id = data_manager.add_health_record(
+                    event_id = data_manager.log_activity(
                         st.session_state.user_id,
-                        notes=notes
+                        activity['name'],
+                        activity['duration'],
+                        calories=activity['calories'],
+                        category="Quick Log"
                     )
-                    if record_id:
+                    if event_id:
                         st.success(f"✅ {activity['name']} logged!")
     
     with col2:
@@ -4,6 +4,8 @@ import folium
 from streamlit_folium import folium_static
 from datetime import datetime
 from utils.data_manager import DataManager
+from utils.geo_index import nearby
+from utils.location import get_user_location
 from utils.styling import add_app_styling
 
 # Initialize data manager
@@ -148,7 +150,6 @@ def show_nearby_hospitals():
         {
             "name": "City General Hospital",
             "type": "Multi-specialty",
-            "distance": "1.2 km",
             "emergency": "24/7",
             "phone": "+91-123-456-7890",
             "address": "123 Health Street, Medical District",
@@ -160,7 +161,6 @@ def show_nearby_hospitals():
         {
             "name": "Metro Emergency Center",
             "type": "Emergency Only",
-            "distance": "0.8 km",
             "emergency": "24/7",
             "phone": "+91-987-654-3210",
             "address": "456 Urgent Care Avenue",
@@ -172,7 +172,6 @@ def show_nearby_hospitals():
         {
             "name": "Sunrise Medical Center",
             "type": "Multi-specialty",
-            "distance": "2.1 km",
             "emergency": "24/7",
             "phone": "+91-555-123-4567",
             "address": "789 Wellness Boulevard",
@@ -184,7 +183,6 @@ def show_nearby_hospitals():
         {
             "name": "Heart Care Hospital",
             "type": "Specialty",
-            "distance": "3.5 km",
             "emergency": "Cardiac Only",
             "phone": "+91-444-567-8901",
             "address": "321 Cardiac Center Road",
@@ -195,13 +193,25 @@ def show_nearby_hospitals():
         }
     ]
     
+    user_lat, user_lon = get_user_location("emergency")
+    radius_km = st.slider("📏 Search radius (km)", 1, 50, 10, key="hospital_radius")
+    
+    # Rank the directory by distance from the user
+    hospitals_df = pd.DataFrame(hospitals_data)
+    hospitals_df["latitude"] = hospitals_df["coordinates"].str[0]
+    hospitals_df["longitude"] = hospitals_df["coordinates"].str[1]
+    hospitals_data = nearby(hospitals_df, user_lat, user_lon, radius_km=radius_km).to_dict("records")
+    
     col1, col2 = st.columns([2, 1])
     
     with col1:
         st.subheader("🏥 Hospital Directory")
         
+        if not hospitals_data:
+            st.warning(f"No hospitals within {radius_km} km. Try a larger search radius.")
+        
         for hospital in hospitals_data:
-            with st.expander(f"🏥 {hospital['name']} - {hospital['distance']} away", expanded=True):
+            with st.expander(f"🏥 {hospital['name']} - {hospital['distance_km']:.1f} km away", expanded=True):
                 col_info, col_action = st.columns([3, 1])
                 
                 with col_info:
@@ -226,7 +236,12 @@ def show_nearby_hospitals():
         st.subheader("🗺️ Hospital Locations")
         
         # Create map with hospital locations
-        m = folium.Map(location=[28.6139, 77.2090], zoom_start=12)
+        m = folium.Map(location=[user_lat, user_lon], zoom_start=12)
+        folium.Marker(
+            [user_lat, user_lon],
+            tooltip="You are here",
+            icon=folium.Icon(color='black', icon='user')
+        ).add_to(m)
         
         for hospital in hospitals_data:
             # Color based on hospital type
@@ -653,14 +668,23 @@ def show_medical_alert():
                     "ice_contact2": ice_contact2
                 }
                 
-                # Save as health record
-                notes = f"Medical Alert Profile: Allergies: {drug_allergies}; Conditions: {chronic_conditions}; Medications: {current_medications}"
-                record_id = data_manager.add_health_record(
+                event_id = data_manager.save_medical_alert(
                     st.session_state.user_id,
-                    notes=notes
+                    drug_allergies=drug_allergies,
+                    food_allergies=food_allergies,
+                    other_allergies=other_allergies,
+                    conditions=chronic_conditions,
+                    medications=current_medications,
+                    devices=medical_devices,
+                    blood_type=blood_type,
+                    emergency_doctor=emergency_doctor,
+                    insurance=insurance_info,
+                    special_instructions=special_instructions,
+                    ice_contact1=ice_contact1,
+                    ice_contact2=ice_contact2
                 )
                 
-                if record_id:
+                if event_id:
                     st.success("✅ Medical alert profile saved successfully!")
                     
                     # Show digital medical alert card
@@ -4,6 +4,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta, date
 from utils.data_manager import DataManager
+from utils.health_export import export_health_records, EXPORT_FORMATS
 from utils.styling import add_app_styling
 
 # Initialize data manager
@@ -70,23 +71,23 @@ def show_health_overview():
     # Get user's health records
     health_records = data_manager.get_user_health_records(user_id)
     appointments = data_manager.get_user_appointments(user_id)
+    summary = data_manager.get_health_summary(user_id)
     
     # Summary metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("📋 Total Records", len(health_records))
+        st.metric("📋 Total Records", summary['record_count'] if summary else 0)
     
     with col2:
         st.metric("👨‍⚕️ Consultations", len(appointments))
     
     with col3:
-        last_update = health_records['date'].max() if not health_records.empty else "Never"
+        last_update = summary['last_update'].strftime("%Y-%m-%d") if summary and summary['last_update'] is not None else "Never"
         st.metric("📅 Last Updated", last_update)
     
     with col4:
-        days_tracked = len(health_records['date'].unique()) if not health_records.empty else 0
-        st.metric("📊 Days Tracked", days_tracked)
+        st.metric("📊 Days Tracked", summary['days_tracked'] if summary else 0)
     
     st.markdown("---")
     
@@ -101,6 +102,7 @@ def show_health_overview():
             
             # Format the display
             display_records = recent_records[['date', 'heart_rate', 'blood_pressure', 'weight', 'temperature']].copy()
+            display_records['date'] = display_records['date'].dt.strftime('%Y-%m-%d')
             display_records.columns = ['Date', 'Heart Rate', 'Blood Pressure', 'Weight (kg)', 'Temperature (°F)']
             
             st.dataframe(display_records, use_container_width=True)
@@ -157,8 +159,8 @@ def show_health_overview():
         st.subheader("🏥 Medical Summary")
         
         # Calculate health insights
-        if not health_records.empty:
-            insights = calculate_health_insights(health_records)
+        if summary and summary['record_count']:
+            insights = calculate_health_insights(summary)
             
             for insight in insights:
                 if "Normal" in insight or "Good" in insight:
@@ -175,11 +177,11 @@ def show_health_overview():
         # Show upcoming appointments
         if not appointments.empty:
             today = date.today()
-            upcoming = appointments[pd.to_datetime(appointments['date']).dt.date >= today]
+            upcoming = appointments[appointments['date'].dt.date >= today]
             
             if not upcoming.empty:
                 next_appointment = upcoming.iloc[0]
-                st.info(f"👨‍⚕️ **Next Appointment**\n{next_appointment['doctor_name']} on {next_appointment['date']}")
+                st.info(f"👨‍⚕️ **Next Appointment**\n{next_appointment['doctor_name']} on {next_appointment['date']:%Y-%m-%d}")
             else:
                 st.info("No upcoming appointments")
         else:
@@ -221,32 +223,30 @@ def get_temperature_status(temperature):
     else:
         return "High fever - seek medical attention"
 
-def calculate_health_insights(health_records):
-    """Calculate health insights from records"""
+def calculate_health_insights(summary):
+    """Calculate health insights from a user's health summary"""
     insights = []
     
     # Heart rate analysis
-    if 'heart_rate' in health_records.columns and health_records['heart_rate'].notna().any():
-        avg_hr = health_records['heart_rate'].dropna().mean()
+    avg_hr = summary['vitals']['heart_rate']['mean']
+    if avg_hr is not None:
         if 60 <= avg_hr <= 100:
             insights.append("Heart rate is in normal range")
         else:
             insights.append("Heart rate requires monitoring")
     
     # Weight trend
-    if 'weight' in health_records.columns and health_records['weight'].notna().sum() > 2:
-        weight_series = health_records['weight'].dropna()
-        if len(weight_series) > 1:
-            weight_change = weight_series.iloc[-1] - weight_series.iloc[0]
-            if abs(weight_change) < 1:
-                insights.append("Weight is stable")
-            elif weight_change > 2:
-                insights.append("Weight gain trend detected")
-            else:
-                insights.append("Weight loss trend detected")
+    if summary['vitals']['weight']['count'] > 2:
+        weight_change = summary['last_weight'] - summary['first_weight']
+        if abs(weight_change) < 1:
+            insights.append("Weight is stable")
+        elif weight_change > 2:
+            insights.append("Weight gain trend detected")
+        else:
+            insights.append("Weight loss trend detected")
     
     # Tracking consistency
-    total_days = len(health_records)
+    total_days = summary['record_count']
     if total_days > 7:
         insights.append("Good tracking consistency")
     elif total_days > 0:
@@ -515,15 +515,6 @@ def show_health_trends():
     st.header("📈 Health Trends & Analytics")
     
     user_id = st.session_state.user_id
-    health_records = data_manager.get_user_health_records(user_id)
-    
-    if health_records.empty:
-        st.info("📈 No data available for trends. Start tracking your health metrics!")
-        return
-    
-    if len(health_records) < 2:
-        st.info("📈 Need at least 2 records to show trends. Keep tracking!")
-        return
     
     # Time range selector
     col_range1, col_range2 = st.columns(2)
@@ -538,7 +529,7 @@ def show_health_trends():
             "Heart Rate", "Weight", "Blood Pressure", "Temperature"
         ], default=["Heart Rate", "Weight"])
     
-    # Filter data based on time range
+    # Read only the selected window; "All time" has no lower bound
     end_date = datetime.now().date()
     
     if time_range == "Last 7 days":
@@ -550,17 +541,19 @@ def show_health_trends():
     elif time_range == "Last 6 months":
         start_date = end_date - timedelta(days=180)
     else:
-        start_date = health_records['date'].min()
+        start_date = None
     
-    # Filter records
-    health_records['date'] = pd.to_datetime(health_records['date'])
-    filtered_records = health_records[
-        (health_records['date'].dt.date >= pd.to_datetime(start_date).date()) &
-        (health_records['date'].dt.date <= end_date)
-    ].copy()
+    filtered_records = data_manager.get_user_health_records_range(user_id, start_date, end_date).copy()
     
     if filtered_records.empty:
-        st.warning("No data available for the selected time range")
+        if start_date is None:
+            st.info("📈 No data available for trends. Start tracking your health metrics!")
+        else:
+            st.warning("No data available for the selected time range")
+        return
+    
+    if start_date is None and len(filtered_records) < 2:
+        st.info("📈 Need at least 2 records to show trends. Keep tracking!")
         return
     
     # Create trend charts
@@ -971,10 +964,14 @@ def show_privacy_sharing():
                     st.success(f"✅ Access granted to {recipient_name}")
                     
                     # Log the access grant
-                    access_log = f"Data access granted to {recipient_name} ({recipient_type}) - {access_level} for {access_duration}. Reason: {reason}"
-                    record_id = data_manager.add_health_record(
+                    data_manager.grant_data_access(
                         st.session_state.user_id,
-                        notes=access_log
+                        recipient_name,
+                        recipient_type,
+                        access_level,
+                        access_duration,
+                        reason,
+                        records=specific_records
                     )
                 else:
                     st.error("❌ Please fill in recipient name and reason")
@@ -1010,12 +1007,16 @@ def show_privacy_sharing():
             "All data", "Last 30 days", "Last 3 months", "Last year", "Custom range"
         ])
         
+        start_date_export, end_date_export = None, None
         if date_range_export == "Custom range":
             col_date1, col_date2 = st.columns(2)
             with col_date1:
                 start_date_export = st.date_input("Start Date")
             with col_date2:
                 end_date_export = st.date_input("End Date")
+        elif date_range_export != "All data":
+            days_back = {"Last 30 days": 30, "Last 3 months": 90, "Last year": 365}[date_range_export]
+            start_date_export = date.today() - timedelta(days=days_back)
         
         include_sensitive = st.checkbox("🔒 Include sensitive data (mental health, etc.)", 
                                       help="Include all data including sensitive medical information")
@@ -1027,8 +1028,33 @@ def show_privacy_sharing():
                 st.success("📧 Health data export will be emailed to your registered email address")
         
         with col_export2:
-            if st.button("📱 Download Export", use_container_width=True):
-                st.success("📱 Preparing your health data export for download...")
+            export_clicked = st.button("📱 Download Export", use_container_width=True)
+        
+        # Built once per click: the buttons don't rerun the page, and any other change clears them
+        if export_clicked:
+            # Records are read month by month, but st.download_button reads the whole export
+            # into memory when it is built, so a read error surfaces here
+            streamed_formats = {"CSV Data": "csv", "JSON Format": "ndjson", "HL7 FHIR": "fhir"}
+            selected = [streamed_formats[f] for f in export_formats if f in streamed_formats]
+            if not selected:
+                st.info("💡 Select CSV Data, JSON Format or HL7 FHIR to download your health metrics")
+            for fmt in selected:
+                extension, mime = EXPORT_FORMATS[fmt]
+                try:
+                    st.download_button(
+                        f"⬇️ Download {fmt.upper()} export",
+                        data=export_health_records(
+                            data_manager, st.session_state.user_id, fmt, start_date_export, end_date_export,
+                            include_sensitive=include_sensitive
+                        ),
+                        file_name=f"health_records_{date.today():%Y%m%d}.{extension}",
+                        mime=mime,
+                        key=f"download_{fmt}",
+                        on_click="ignore",
+                        use_container_width=True
+                    )
+                except Exception as e:
+                    st.error(f"❌ Could not export your health records as {fmt.upper()}: {e}")
         
         # Backup settings
         st.markdown("**☁️ Automatic Backup Settings**")
@@ -4,6 +4,8 @@ import folium
 from streamlit_folium import folium_static
 from datetime import datetime, time
 from utils.data_manager import DataManager
+from utils.geo_index import nearby
+from utils.location import get_user_location
 from utils.styling import add_app_styling
 
 # Initialize data manager
@@ -62,6 +64,8 @@ def show_pharmacy_locator():
     """Find and locate nearby pharmacies"""
     st.header("🔍 Find Nearby Pharmacies")
     
+    user_lat, user_lon = get_user_location("pharmacy")
+    
     col1, col2 = st.columns([2, 1])
     
     with col1:
@@ -71,7 +75,6 @@ def show_pharmacy_locator():
                 "name": "MedPlus Pharmacy",
                 "address": "123 Health Street, Medical District",
                 "phone": "+91-123-456-7890",
-                "distance": "0.5 km",
                 "rating": 4.5,
                 "delivery": "Available",
                 "hours": "24/7",
@@ -83,7 +86,6 @@ def show_pharmacy_locator():
                 "name": "Apollo Pharmacy",
                 "address": "456 Wellness Avenue, Central Area",
                 "phone": "+91-987-654-3210",
-                "distance": "0.8 km",
                 "rating": 4.7,
                 "delivery": "Available",
                 "hours": "6 AM - 12 AM",
@@ -95,7 +97,6 @@ def show_pharmacy_locator():
                 "name": "HealthMart Pharmacy",
                 "address": "789 Care Lane, Suburb Area",
                 "phone": "+91-555-123-4567",
-                "distance": "1.2 km",
                 "rating": 4.3,
                 "delivery": "Available",
                 "hours": "8 AM - 10 PM",
@@ -107,7 +108,6 @@ def show_pharmacy_locator():
                 "name": "QuickMed Express",
                 "address": "321 Fast Lane, Business District",
                 "phone": "+91-444-567-8901",
-                "distance": "1.5 km",
                 "rating": 4.2,
                 "delivery": "Express Delivery",
                 "hours": "24/7",
@@ -149,8 +149,11 @@ def show_pharmacy_locator():
         # Display pharmacy results
         st.subheader("🏥 Pharmacy Results")
         
-        # Filter pharmacies based on criteria
-        filtered_pharmacies = pharmacies_data.copy()
+        # Filter pharmacies based on criteria, starting from those within range, nearest first
+        pharmacies_df = pd.DataFrame(pharmacies_data)
+        pharmacies_df["latitude"] = pharmacies_df["coordinates"].str[0]
+        pharmacies_df["longitude"] = pharmacies_df["coordinates"].str[1]
+        filtered_pharmacies = nearby(pharmacies_df, user_lat, user_lon, radius_km=distance_filter).to_dict("records")
         
         if location_search:
             filtered_pharmacies = [p for p in filtered_pharmacies 
@@ -186,7 +189,7 @@ def show_pharmacy_locator():
                         st.markdown(f"### 🏥 {pharmacy['name']}")
                         st.write(f"📍 {pharmacy['address']}")
                         st.write(f"📞 {pharmacy['phone']}")
-                        st.write(f"📏 Distance: {pharmacy['distance']}")
+                        st.write(f"📏 Distance: {pharmacy['distance_km']:.1f} km")
                         
                         # Rating display
                         stars = "⭐" * int(pharmacy['rating'])
@@ -226,9 +229,14 @@ def show_pharmacy_locator():
         st.subheader("🗺️ Pharmacy Locations")
         
         # Create map with pharmacy locations
-        m = folium.Map(location=[28.6139, 77.2090], zoom_start=13)
-        
-        for pharmacy in filtered_pharmacies if 'filtered_pharmacies' in locals() else pharmacies_data:
+        m = folium.Map(location=[user_lat, user_lon], zoom_start=13)
+        folium.Marker(
+            [user_lat, user_lon],
+            tooltip="You are here",
+            icon=folium.Icon(color='black', icon='user')
+        ).add_to(m)
+        
+        for pharmacy in filtered_pharmacies:
             # Color based on rating
             if pharmacy['rating'] >= 4.5:
                 color = 'green'
@@ -1175,18 +1183,18 @@ def show_digital_prescriptions():
                     rx_id = f"RX{datetime.now().strftime('%Y%m%d%H%M%S')}"
                     
                     # Save prescription info
-                    prescription_info = f"Digital Prescription {rx_id}: Doctor: {doctor_name} from {hospital_name} on {prescription_date}. Reason: {visit_reason}."
-                    if medicines_list:
-                        prescription_info += f" Medicines: {medicines_list}."
-                    if prescription_notes:
-                        prescription_info += f" Notes: {prescription_notes}."
-                    
-                    record_id = data_manager.add_health_record(
+                    event_id = data_manager.add_prescription(
                         st.session_state.user_id,
-                        notes=prescription_info
+                        rx_id,
+                        doctor_name,
+                        hospital_name,
+                        prescription_date,
+                        reason=visit_reason,
+                        medicines=medicines_list,
+                        notes=prescription_notes
                     )
                     
-                    if record_id:
+                    if event_id:
                         st.info(f"""
                         **Prescription Uploaded Successfully**
                         
@@ -1,6 +1,6 @@
 import streamlit as st
 from utils.styling import add_app_styling
-from utils.gemini_client import get_gemini_response
+from utils.gemini_client import stream_gemini_response
 
 # --- Mock DataManager for standalone page functionality ---
 class DataManager:
@@ -88,12 +88,14 @@ def show_health_qa():
 
     if st.button("Get Answer", use_container_width=True):
         if user_question:
-            with st.spinner("Our AI is thinking..."):
-                system_prompt = "You are a helpful and knowledgeable AI health expert. Your goal is to provide clear, safe, and easy-to-understand answers to general health questions. You must always include the disclaimer that you are not a medical professional and the user should consult a doctor for medical advice. Do not provide diagnoses or prescribe treatments."
-                full_prompt = f"{system_prompt}\n\nUser's question: {user_question}"
-                ai_answer = get_gemini_response(full_prompt)
-                st.session_state.qa_history.append((user_question, ai_answer))
-                st.rerun()
+            system_prompt = "You are a helpful and knowledgeable AI health expert. Your goal is to provide clear, safe, and easy-to-understand answers to general health questions. You must always include the disclaimer that you are not a medical professional and the user should consult a doctor for medical advice. Do not provide diagnoses or prescribe treatments."
+            full_prompt = f"{system_prompt}\n\nUser's question: {user_question}"
+            st.markdown(f"**You:** {user_question}")
+            st.markdown("**AI Expert:**")
+            # Show the answer as it is generated, then keep it in the history
+            ai_answer = st.write_stream(stream_gemini_response(full_prompt, call_site="health_qa"))
+            st.session_state.qa_history.append((user_question, ai_answer))
+            st.rerun()
         else:
             st.warning("Please enter a question.")
 
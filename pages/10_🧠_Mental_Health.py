@@ -1,17 +1,15 @@
 import streamlit as st
 from utils.styling import add_app_styling
-from utils.gemini_client import get_gemini_response
+from utils.gemini_client import stream_gemini_response
+from utils.data_manager import DataManager
 from datetime import date, time, datetime
 
-# --- Mock DataManager ---
-# In a real app, this would be your actual DataManager import
-class DataManager:
-    def add_health_record(self, user_id, notes):
-        # This simulates saving the assessment result
-        print(f"Record for user {user_id}: {notes}")
-        return True
-data_manager = DataManager()
-# ------------------------
+# Initialize data manager
+@st.cache_resource
+def init_data_manager():
+    return DataManager()
+
+data_manager = init_data_manager()
 
 def show_mental_health_check():
     """Mental health screening and self-assessment tools."""
@@ -50,8 +48,7 @@ def show_mental_health_check():
                 
                 # Log the result
                 if 'user_id' in st.session_state and st.session_state.user_id:
-                    log_note = f"Completed PHQ-2 Depression Screening. Score: {total_score}/6."
-                    data_manager.add_health_record(st.session_state.user_id, notes=log_note)
+                    data_manager.record_screening(st.session_state.user_id, "PHQ-2", total_score, 6)
 
     with col2:
         # GAD-2 Anxiety Screening
@@ -82,8 +79,7 @@ def show_mental_health_check():
 
                 # Log the result
                 if 'user_id' in st.session_state and st.session_state.user_id:
-                    log_note = f"Completed GAD-2 Anxiety Screening. Score: {total_score}/6."
-                    data_manager.add_health_record(st.session_state.user_id, notes=log_note)
+                    data_manager.record_screening(st.session_state.user_id, "GAD-2", total_score, 6)
 
 def show_stress_management():
     """Stress management tools and AI Mindfulness Coach"""
@@ -142,8 +138,7 @@ def show_stress_management():
 
             if st.form_submit_button("Log Stress Entry", use_container_width=True):
                 if 'user_id' in st.session_state and st.session_state.user_id:
-                    log_note = f"Stress Log: Level {stress_level}/10. Triggers: {stress_triggers}. Coping: {coping_methods}."
-                    data_manager.add_health_record(st.session_state.user_id, notes=log_note)
+                    data_manager.log_stress(st.session_state.user_id, stress_level, stress_triggers, coping_methods)
                     st.success("Your stress log for today has been saved.")
                 else:
                     st.warning("Please log in to save your journal entries.")
@@ -157,11 +152,9 @@ def show_stress_management():
 
         if st.button("Get Support", use_container_width=True):
             if feeling_input:
-                with st.spinner("Your coach is preparing a response..."):
-                    system_prompt = "You are a caring and supportive AI mindfulness coach. A user is telling you how they feel. Your task is to respond with two things: First, a short (1-2 sentences), empathetic, and validating message. Second, a simple, guided 1-minute mindfulness or breathing exercise they can do right now to help them process their feeling. Your tone should be gentle and encouraging. Always include a disclaimer that you are an AI and not a therapist."
-                    full_prompt = f"{system_prompt}\n\nUser's feeling: '{feeling_input}'"
-                    ai_response = get_gemini_response(full_prompt)
-                    st.markdown(ai_response)
+                system_prompt = "You are a caring and supportive AI mindfulness coach. A user is telling you how they feel. Your task is to respond with two things: First, a short (1-2 sentences), empathetic, and validating message. Second, a simple, guided 1-minute mindfulness or breathing exercise they can do right now to help them process their feeling. Your tone should be gentle and encouraging. Always include a disclaimer that you are an AI and not a therapist."
+                full_prompt = f"{system_prompt}\n\nUser's feeling: '{feeling_input}'"
+                st.write_stream(stream_gemini_response(full_prompt, call_site="stress_coach"))
             else:
                 st.warning("Please describe how you're feeling.")
 
@@ -239,8 +232,7 @@ def show_mood_tracking():
         
         if st.form_submit_button("Log My Mood", use_container_width=True):
             if 'user_id' in st.session_state and st.session_state.user_id:
-                log_note = f"Mood Log: Mood was {mood_rating}. Emotions felt: {', '.join(emotions_felt)}. Notes: {mood_notes}"
-                data_manager.add_health_record(st.session_state.user_id, notes=log_note)
+                data_manager.log_mood(st.session_state.user_id, mood_rating, emotions_felt, mood_notes)
                 st.success("✨ Your mood for today has been logged. Keep it up!")
             else:
                 st.warning("Please log in to save your mood entries.")
@@ -118,12 +118,13 @@ def show_account_stats(user_data):
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric(label="Account Created", value=user_data.get('created_date', 'N/A'))
+        created_date = user_data.get('created_date')
+        st.metric(label="Account Created", value=f"{created_date:%Y-%m-%d}" if hasattr(created_date, 'strftime') else 'N/A')
         
     with col2:
         # Get total health records
-        health_records = data_manager.get_user_health_records(user_data['user_id'])
-        st.metric(label="Total Health Records", value=len(health_records))
+        summary = data_manager.get_health_summary(user_data['user_id'])
+        st.metric(label="Total Health Records", value=summary['record_count'] if summary else 0)
 
     with col3:
         # Get total appointments
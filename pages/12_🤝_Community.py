@@ -10,6 +10,9 @@ def init_data_manager():
 
 data_manager = init_data_manager()
 
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 5
+
 def main():
     """Main function to display the community page."""
     add_app_styling()
@@ -43,49 +46,133 @@ def show_community_feed():
     """Display the feed of recent community posts."""
     st.header("💬 Recent Community Posts")
 
+    search_query = st.text_input("🔍 Search posts", placeholder="Search titles and messages (English, हिन्दी, தமிழ்)")
+    if search_query.strip():
+        show_search_results(search_query)
+        return
+
     # Filter options
     category_filter = st.selectbox(
         "Filter by category",
-        ["All", "General Health", "Mental Wellness", "Fitness Journey", "Nutrition Tips", "Success Stories"]
+        ["All", "General Health", "Mental Wellness", "Fitness Journey", "Nutrition Tips", "Success Stories", "Ask the Community"]
     )
 
-    # Fetch recent posts
-    posts_df = data_manager.get_recent_community_posts()
-
-    if posts_df.empty:
-        st.info("No community posts yet. Be the first to start a conversation!")
-        return
-
-    # Filter posts if a category is selected
-    if category_filter != "All":
-        posts_df = posts_df[posts_df['category'] == category_filter]
+    # Cursors of the pages loaded so far; switching category starts over from the newest posts
+    if st.session_state.get('feed_category') != category_filter:
+        st.session_state.feed_category = category_filter
+        st.session_state.feed_cursors = [None]
+
+    category = None if category_filter == "All" else category_filter
+    pages = []
+    next_cursor = None
+    for cursor in st.session_state.feed_cursors:
+        page_df, next_cursor = data_manager.get_community_feed(category=category, cursor=cursor, limit=POSTS_PER_PAGE)
+        pages.append(page_df)
+        if next_cursor is None:
+            break
+    posts_df = pd.concat(pages)
 
     if posts_df.empty:
-        st.info(f"No posts found in the '{category_filter}' category yet.")
+        if category is None:
+            st.info("No community posts yet. Be the first to start a conversation!")
+        else:
+            st.info(f"No posts found in the '{category_filter}' category yet.")
         return
         
     # Display each post
     for index, post in posts_df.iterrows():
-        st.markdown("<div class='card'>", unsafe_allow_html=True)
-        
-        st.subheader(post['title'])
-        st.caption(f"Posted by **{post['author']}** in *{post['category']}* on {pd.to_datetime(post['date']).strftime('%B %d, %Y')}")
-        st.markdown("---")
-        st.write(post['content'])
-        
-        # Action buttons (like, comment, share)
-        col1, col2, col3, col4 = st.columns([1, 1, 1, 5])
-        with col1:
-            if st.button(f"👍 Like ({post.get('likes', 0)})", key=f"like_{post['post_id']}"):
+        show_post(post)
+
+    if next_cursor is not None and st.button("⬇️ Load more posts", use_container_width=True):
+        st.session_state.feed_cursors.append(next_cursor)
+        st.rerun()
+
+
+def show_search_results(query):
+    """Display posts matching a search query, best match first."""
+    results = data_manager.search_community_posts(query, limit=20)
+
+    if results.empty:
+        st.info(f"No posts match '{query}'.")
+        return
+
+    st.caption(f"{len(results)} matching posts")
+    for index, post in results.iterrows():
+        show_post(post)
+
+
+def show_post(post):
+    """Display a single post card with its action buttons."""
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    
+    st.subheader(post['title'])
+    st.caption(f"Posted by **{post['author']}** in *{post['category']}* on {post['date']:%B %d, %Y}")
+    st.markdown("---")
+    st.write(post['content'])
+    
+    # Action buttons (like, comment, share)
+    col1, col2, col3, col4 = st.columns([1, 1, 1, 5])
+    with col1:
+        liked = data_manager.has_liked_post(post['post_id'], st.session_state.user_id)
+        if st.button(f"{'💙 Liked' if liked else '👍 Like'} ({post.get('likes', 0)})", key=f"like_{post['post_id']}"):
+            if data_manager.like_post(post['post_id'], st.session_state.user_id):
                 st.toast("Liked!")
-        with col2:
-            if st.button(f"💬 Comment ({post.get('comments', 0)})", key=f"comment_{post['post_id']}"):
-                st.toast("Comment feature coming soon!")
-        with col3:
-            if st.button("🔗 Share", key=f"share_{post['post_id']}"):
-                st.toast("Link copied to clipboard!")
-        
-        st.markdown("</div>", unsafe_allow_html=True)
+                st.rerun()
+            else:
+                st.toast("You already liked this post")
+    with col2:
+        if st.button(f"💬 Comment ({post.get('comments', 0)})", key=f"comment_{post['post_id']}"):
+            open_threads = st.session_state.setdefault('open_comment_threads', set())
+            open_threads.symmetric_difference_update({post['post_id']})
+    with col3:
+        if st.button("🔗 Share", key=f"share_{post['post_id']}"):
+            st.toast("Link copied to clipboard!")
+    
+    # Comments are only read once the thread is opened
+    if post['post_id'] in st.session_state.get('open_comment_threads', set()):
+        show_comments(post['post_id'])
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+
+
+def show_comments(post_id, parent_id=None, depth=0):
+    """Display a page-by-page comment thread; replies are fetched only when expanded."""
+    thread_key = parent_id or post_id
+    cursors = st.session_state.setdefault('comment_cursors', {}).setdefault(thread_key, [None])
+    
+    with st.form(f"comment_form_{thread_key}", clear_on_submit=True):
+        text = st.text_input("Reply" if parent_id else "Add a comment", key=f"comment_text_{thread_key}")
+        if st.form_submit_button("💬 Post"):
+            if text.strip():
+                author = st.session_state.user_data.get('name', 'Anonymous')
+                if data_manager.add_post_comment(post_id, st.session_state.user_id, author, text.strip(), parent_id=parent_id):
+                    st.rerun()
+                else:
+                    st.error("❌ Could not post your comment. Please try again.")
+    
+    next_cursor = None
+    for cursor in cursors:
+        comments_df, next_cursor = data_manager.get_post_comments(
+            post_id, parent_id=parent_id, cursor=cursor, limit=COMMENTS_PER_PAGE
+        )
+        for index, comment in comments_df.iterrows():
+            prefix = "↳ " * depth
+            st.markdown(f"{prefix}**{comment['author']}** · {comment['date']:%b %d, %Y %H:%M}")
+            st.text(comment['content'])
+            
+            expanded = st.session_state.setdefault('open_replies', set())
+            label = "Hide replies" if comment['comment_id'] in expanded else f"↪️ Replies ({comment['reply_count']})"
+            if st.button(label, key=f"replies_{comment['comment_id']}"):
+                expanded.symmetric_difference_update({comment['comment_id']})
+                st.rerun()
+            if comment['comment_id'] in expanded:
+                show_comments(post_id, parent_id=comment['comment_id'], depth=depth + 1)
+        if next_cursor is None:
+            break
+    
+    if next_cursor is not None and st.button("Load more comments", key=f"more_comments_{thread_key}"):
+        cursors.append(next_cursor)
+        st.rerun()
 
 
 def create_new_post():
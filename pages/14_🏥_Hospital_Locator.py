@@ -3,7 +3,7 @@ import pandas as pd
 import folium
 from streamlit_folium import folium_static
 from utils.styling import add_app_styling
-from utils.gemini_client import get_gemini_response
+from utils.gemini_client import get_gemini_response, stream_gemini_response, forget_gemini_response
 import json
 
 def parse_ai_response(response_text):
@@ -46,13 +46,16 @@ def show_hospital_finder():
             - "coordinates" (array of two numbers, [latitude, longitude])
             """
             
-            response = get_gemini_response(prompt)
+            # Structured lookup: temperature 0 keeps the JSON format stable, and answers are cached per city
+            response = get_gemini_response(prompt, temperature=0, call_site="hospital_lookup")
             hospitals = parse_ai_response(response)
             
             if hospitals:
                 st.session_state.hospitals = hospitals
                 st.session_state.location_center = [hospitals[0]['coordinates'][0], hospitals[0]['coordinates'][1]]
             else:
+                # Don't keep serving an answer that couldn't be parsed
+                forget_gemini_response(prompt, temperature=0)
                 st.session_state.hospitals = []
                 st.error("Sorry, I couldn't retrieve hospital data for that location. Please try another city.")
 
@@ -123,28 +126,26 @@ def show_ai_assistant():
 
     if st.button("Get Recommendation", use_container_width=True):
         if user_query:
-            with st.spinner("AI is analyzing your request..."):
-                hospital_info_text = ""
-                for h in st.session_state.hospitals:
-                    hospital_info_text += f"- Hospital: {h.get('name')}, Specialties: {', '.join(h.get('specialties', []))}, Rating: {h.get('rating')}.\n"
-
-                system_prompt = f"""
-                You are an expert AI Hospital Recommendation Assistant. Your task is to analyze a user's medical query and recommend the most suitable hospital from the provided list.
-
-                Here is the list of available hospitals:
-                {hospital_info_text}
-
-                Analyze the user's query below. Your response should be in three parts:
-                1.  **Analysis:** Briefly explain which medical specialty you identified from the user's query.
-                2.  **Top Recommendation:** State the single best hospital for the user's need. Justify your choice based on its specialties and high rating.
-                3.  **Other Good Options:** List one or two other suitable hospitals as alternatives.
-
-                Your tone must be helpful, empathetic, and clear. Always conclude with a disclaimer to call emergency services for critical situations.
-                """
-                
-                full_prompt = f"{system_prompt}\n\nUser's Query: \"{user_query}\""
-                ai_response = get_gemini_response(full_prompt)
-                st.markdown(ai_response)
+            hospital_info_text = ""
+            for h in st.session_state.hospitals:
+                hospital_info_text += f"- Hospital: {h.get('name')}, Specialties: {', '.join(h.get('specialties', []))}, Rating: {h.get('rating')}.\n"
+
+            system_prompt = f"""
+            You are an expert AI Hospital Recommendation Assistant. Your task is to analyze a user's medical query and recommend the most suitable hospital from the provided list.
+
+            Here is the list of available hospitals:
+            {hospital_info_text}
+
+            Analyze the user's query below. Your response should be in three parts:
+            1.  **Analysis:** Briefly explain which medical specialty you identified from the user's query.
+            2.  **Top Recommendation:** State the single best hospital for the user's need. Justify your choice based on its specialties and high rating.
+            3.  **Other Good Options:** List one or two other suitable hospitals as alternatives.
+
+            Your tone must be helpful, empathetic, and clear. Always conclude with a disclaimer to call emergency services for critical situations.
+            """
+            
+            full_prompt = f"{system_prompt}\n\nUser's Query: \"{user_query}\""
+            st.write_stream(stream_gemini_response(full_prompt, call_site="hospital_assistant"))
         else:
             st.warning("Please describe your medical need.")
 
@@ -0,0 +1,14 @@
+import pytest
+from utils.data_manager import DataManager
+
+
+@pytest.fixture(params=["csv", "sqlite"])
+def backend(request, tmp_path, monkeypatch):
+    # DataManager keeps its tables under ./data
+    monkeypatch.chdir(tmp_path)
+    return request.param
+
+
+@pytest.fixture
+def manager(backend):
+    return DataManager(backend=backend, db_path="data/test.db")
@@ -0,0 +1,28 @@
+import pytest
+from datetime import date, timedelta
+
+
+def test_reregistering_keeps_details_and_counts_new_donations(manager):
+    recent = (date.today() - timedelta(days=10)).strftime("%Y-%m-%d")
+    donor_id = manager.register_blood_donor("u1", "O+", "Delhi", "9000000000", last_donation=recent,
+                                            latitude=28.6, longitude=77.2)
+
+    # Updating the contact without a donation date keeps the date, the count and the location
+    assert manager.register_blood_donor("u1", "O+", "Delhi", "9111111111") == donor_id
+    donor = manager.get_blood_donor_by_user("u1").iloc[0]
+    assert donor["contact"] == "9111111111"
+    assert str(donor["last_donation"])[:10] == recent
+    assert int(donor["total_donations"]) == 1
+    assert float(donor["latitude"]) == pytest.approx(28.6)
+    # Still inside the donation interval, so not offered to recipients
+    assert manager.get_blood_donors("O+").empty
+
+    # The same date again is not a new donation; a later one is
+    manager.register_blood_donor("u1", "O+", "Delhi", "9111111111", last_donation=recent)
+    assert int(manager.get_blood_donor_by_user("u1").iloc[0]["total_donations"]) == 1
+    today = date.today().strftime("%Y-%m-%d")
+    manager.register_blood_donor("u1", "O+", "Delhi", "9111111111", last_donation=today)
+    donor = manager.get_blood_donor_by_user("u1").iloc[0]
+    assert int(donor["total_donations"]) == 2
+    assert str(donor["last_donation"])[:10] == today
+    assert len(manager.get_blood_donors()) == 1
@@ -0,0 +1,32 @@
+import threading
+
+
+def test_summary_built_during_inserts_counts_each_record_once(manager):
+    def add_records():
+        for i in range(100):
+            assert manager.add_health_record("u1", heart_rate=60 + i % 40)
+
+    def read_summaries():
+        for _ in range(50):
+            manager.aggregates.invalidate(["u1"])
+            manager.get_health_summary("u1")
+
+    threads = [threading.Thread(target=add_records), threading.Thread(target=read_summaries)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    summary = manager.get_health_summary("u1")
+    assert summary["record_count"] == 100
+    assert summary["vitals"]["heart_rate"]["count"] == 100
+
+
+def test_summary_picks_up_records_written_elsewhere(manager):
+    manager.add_health_record("u1", weight=70.0)
+    assert manager.get_health_summary("u1")["record_count"] == 1
+    # Another process appends straight to storage; this process's summary is now behind
+    manager.storage.append_row("health_records", {"record_id": "r2", "user_id": "u1", "date": "2024-01-05", "weight": 72.0})
+    summary = manager.get_health_summary("u1")
+    assert summary["record_count"] == 2
+    assert summary["first_weight"] == 72.0
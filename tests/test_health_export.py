@@ -0,0 +1,35 @@
+import json
+import pytest
+from utils.data_manager import DataManager
+from utils.health_export import export_health_records
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return DataManager(backend="csv")
+
+
+def test_ndjson_export_writes_plain_floats(manager):
+    manager.add_health_record("u1", heart_rate=72, weight=72.3, temperature=98.6, notes="felt anxious")
+    lines = export_health_records(manager, "u1", "ndjson").read().decode("utf-8").splitlines()
+    row = json.loads(lines[0])
+    assert row["weight"] == 72.3 and row["temperature"] == 98.6
+    assert "72.30000305175781" not in lines[0]
+
+
+def test_export_leaves_out_notes_unless_sensitive_data_is_included(manager):
+    manager.add_health_record("u1", heart_rate=72, notes="felt anxious")
+    for fmt in ("csv", "ndjson", "fhir"):
+        assert b"felt anxious" in export_health_records(manager, "u1", fmt).read()
+        assert b"felt anxious" not in export_health_records(manager, "u1", fmt, include_sensitive=False).read()
+
+
+def test_unreadable_partition_fails_the_export_instead_of_truncating_it(manager, tmp_path):
+    manager.add_health_record("u1", heart_rate=72)
+    for path in (tmp_path / "data" / "health_records").glob("*.csv"):
+        path.write_text("not,a\n\"broken")
+    with pytest.raises(ValueError):
+        list(manager.iter_user_health_records("u1"))
+    with pytest.raises(ValueError):
+        export_health_records(manager, "u1", "csv").read()
@@ -0,0 +1,83 @@
+import threading
+import multiprocessing
+from utils.data_manager import DataManager
+
+
+def test_compaction_keeps_posts_created_meanwhile(manager):
+    first = manager.create_community_post("u0", "Author", "First", "Hello", "General")
+
+    def create_posts():
+        for i in range(200):
+            assert manager.create_community_post("u1", "Author", f"Post {i}", "Body", "General")
+
+    def like_and_compact():
+        for i in range(100):
+            assert manager.like_post(first, f"user{i}")
+            if i % 10 == 0:
+                manager.compact_post_counters()
+
+    threads = [threading.Thread(target=create_posts), threading.Thread(target=like_and_compact)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    posts, _ = manager.get_community_feed(limit=500)
+    assert len(posts) == 201
+    assert int(posts.loc[posts["post_id"] == first, "likes"].iloc[0]) == 100
+    manager.compact_post_counters()
+    posts = manager.storage.read_table("community_posts")
+    assert int(posts.loc[posts["post_id"] == first, "likes"].iloc[0]) == 100
+
+
+def test_compaction_with_write_behind(backend):
+    manager = DataManager(backend=backend, db_path="data/test.db", write_behind=True)
+    post_id = manager.create_community_post("u0", "Author", "First", "Hello", "General")
+    for i in range(20):
+        manager.like_post(post_id, f"user{i}")
+        manager.create_community_post("u1", "Author", f"Post {i}", "Body", "General")
+    assert manager.compact_post_counters() == 20
+    assert manager.flush(timeout=5)
+    posts = manager.storage.read_table("community_posts")
+    assert len(posts) == 21
+    assert int(posts.loc[posts["post_id"] == post_id, "likes"].iloc[0]) == 20
+
+
+def _like_from_another_process(post_id):
+    manager = DataManager(backend="sqlite", db_path="data/test.db")
+    for i in range(300):
+        assert manager.like_post(post_id, f"user{i}")
+
+
+def test_sqlite_compaction_keeps_likes_logged_by_another_process(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = DataManager(backend="sqlite", db_path="data/test.db")
+    post_id = manager.create_community_post("u0", "Author", "First", "Hello", "General")
+    process = multiprocessing.get_context("fork").Process(target=_like_from_another_process, args=(post_id,))
+    process.start()
+    while process.is_alive():
+        manager.compact_post_counters()
+    process.join()
+    assert process.exitcode == 0
+    manager.compact_post_counters()
+    posts = manager.storage.read_table("community_posts")
+    assert int(posts.loc[posts["post_id"] == post_id, "likes"].iloc[0]) == 300
+
+
+def test_likes_are_counted_once_per_user(backend, manager):
+    post_id = manager.create_community_post("u0", "Author", "First", "Hello", "General")
+    assert manager.like_post(post_id, "u1")
+    assert not manager.like_post(post_id, "u1")
+    # A DataManager over the same storage sees the like and the pending count
+    other = DataManager(backend=backend, db_path="data/test.db")
+    assert other.has_liked_post(post_id, "u1")
+    posts, _ = other.get_community_feed()
+    assert int(posts.loc[posts["post_id"] == post_id, "likes"].iloc[0]) == 1
+
+
+def test_a_cached_miss_is_dropped_on_like(manager):
+    post_id = manager.create_community_post("u0", "Author", "First", "Hello", "General")
+    assert not manager.has_liked_post(post_id, "u1")
+    assert manager.like_post(post_id, "u1")
+    assert manager.has_liked_post(post_id, "u1")
+    assert not manager.like_post(post_id, "u1")
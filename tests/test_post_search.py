@@ -0,0 +1,12 @@
+def test_posts_written_by_another_process_are_searchable(manager):
+    manager.create_community_post("u0", "Author", "Morning walks", "Walking every day", "Fitness")
+    assert list(manager.search_community_posts("walking")["title"]) == ["Morning walks"]
+    # Written straight to storage, as another process would
+    manager.storage.append_row("community_posts", {
+        "post_id": "other", "user_id": "u1", "author": "Other", "title": "Evening walk",
+        "content": "A short walk", "category": "Fitness", "date": "2024-01-01 10:00:00", "likes": 0, "comments": 0
+    })
+    manager.create_community_post("u0", "Author", "Diet", "Eat greens", "Nutrition")
+    assert set(manager.search_community_posts("walk")["post_id"]) == {"other"} | set(
+        manager.search_community_posts("morning")["post_id"]
+    )
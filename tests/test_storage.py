@@ -0,0 +1,83 @@
+import threading
+import pytest
+from utils.data_manager import DataManager
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    # DataManager keeps its tables under ./data
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / "data"
+
+
+def test_concurrent_inserts_and_updates_keep_every_row(data_dir):
+    """Appends from one DataManager must survive rewrites from another running at the same time"""
+    creator, updater = DataManager(backend="csv"), DataManager(backend="csv")
+    user_id = updater.create_user("First", "first@example.com", "9000000000", 30, "Female", "O+", "secret")
+
+    def create_users():
+        for i in range(200):
+            assert creator.create_user(f"User {i}", f"user{i}@example.com", "9000000000", 30, "Male", "A+", "pw")
+
+    def update_password():
+        for i in range(200):
+            assert updater.update_user_password(user_id, f"password{i}")
+
+    threads = [threading.Thread(target=create_users), threading.Thread(target=update_password)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    users = DataManager(backend="csv").storage.read_table("users")
+    assert len(users) == 201
+    assert users["email"].is_unique
+
+
+def test_concurrent_appends_and_increments_keep_every_row(data_dir):
+    """increment_columns rewrites the file; posts appended meanwhile must not be lost"""
+    writer, counter = DataManager(backend="csv"), DataManager(backend="csv")
+    post_id = writer.create_community_post("u1", "Author", "First", "Hello", "General")
+
+    def create_posts():
+        for i in range(200):
+            assert writer.create_community_post("u1", "Author", f"Post {i}", "Body", "General")
+
+    def increment():
+        for _ in range(200):
+            counter.storage.increment_columns("community_posts", "post_id", {post_id: {"likes": 1}})
+
+    threads = [threading.Thread(target=create_posts), threading.Thread(target=increment)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    posts = DataManager(backend="csv").storage.read_table("community_posts")
+    assert len(posts) == 201
+    assert int(posts.loc[posts["post_id"] == post_id, "likes"].iloc[0]) == 200
+
+
+def test_concurrent_constructors_migrate_legacy_health_records_once(data_dir):
+    data_dir.mkdir()
+    rows = "\n".join(f"r{i},u1,2024-{i % 12 + 1:02d}-01,Checkup,,,,,,,," for i in range(300))
+    (data_dir / "health_records.csv").write_text(
+        "record_id,user_id,date,record_type,blood_pressure,heart_rate,temperature,weight,height,symptoms,medications,notes\n"
+        + rows + "\n"
+    )
+    errors = []
+
+    def construct():
+        try:
+            DataManager(backend="csv")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=construct) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert (data_dir / "health_records.csv.migrated").exists()
+    assert len(DataManager(backend="csv").storage.read_table("health_records")) == 300
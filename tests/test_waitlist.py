@@ -0,0 +1,46 @@
+import random
+
+
+def test_waitlist_pages_follow_priority_order(manager):
+    rng = random.Random(7)
+    for i in range(120):
+        manager.add_waitlist_recipient(
+            rng.choice(["Kidney", "Liver"]), rng.choice(["A+", "O-"]), rng.choice(["Critical", "High", "Medium", "Low"]),
+            listed_date=f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            location=rng.choice(["Delhi", "Mumbai"]), match_score=rng.random() * 100
+        )
+    everyone = manager.get_waitlist(limit=None)
+    assert len(everyone) == 120
+
+    # Pages are prefixes of the full ranking, and reading them doesn't disturb the queue
+    for limit in (1, 10, 25):
+        page = manager.get_waitlist(limit=limit)
+        assert list(page["recipient_id"]) == list(everyone["recipient_id"].head(limit))
+    assert len(manager.get_waitlist()) == 20
+
+    expected = everyone[(everyone["organ_needed"] == "Kidney") & (everyone["urgency"] == "Low")
+                        & (everyone["location"] == "Mumbai")]
+    page = manager.get_waitlist("Kidney", limit=5, urgency="Low", location="mum")
+    assert list(page["recipient_id"]) == list(expected["recipient_id"].head(5))
+    assert len(manager.get_waitlist(limit=None)) == 120
+
+
+def test_changing_organ_or_blood_group_moves_the_entry(manager):
+    recipient_id = manager.add_waitlist_recipient("Kidney", "A+", "High")
+    assert list(manager.get_waitlist("Kidney")["recipient_id"]) == [recipient_id]
+    assert manager.update_waitlist_recipient(recipient_id, organ_needed="Liver", blood_group="O-")
+    assert manager.get_waitlist("Kidney").empty
+    assert manager.get_waitlist(blood_group="A+").empty
+    assert len(manager.get_waitlist("Kidney", limit=None)) == 0
+    assert list(manager.get_waitlist("Liver", "O-")["recipient_id"]) == [recipient_id]
+
+
+def test_rows_written_by_another_process_are_picked_up(manager):
+    manager.add_waitlist_recipient("Kidney", "A+", "High")
+    assert len(manager.get_waitlist()) == 1
+    # Written straight to storage, as another process would
+    manager.storage.append_row("organ_waitlist", {
+        "recipient_id": "other", "organ_needed": "Kidney", "blood_group": "A+", "urgency": "Critical",
+        "listed_date": "2024-01-01", "status": "Waiting"
+    })
+    assert list(manager.get_waitlist()["recipient_id"])[0] == "other"
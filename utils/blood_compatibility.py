@@ -0,0 +1,24 @@
+BLOOD_GROUPS = ["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"]
+
+# Red cell donation rules: donor group -> recipient groups it can give to
+DONOR_TO_RECIPIENTS = {
+    "O-": ["O-", "O+", "A-", "A+", "B-", "B+", "AB-", "AB+"],
+    "O+": ["O+", "A+", "B+", "AB+"],
+    "A-": ["A-", "A+", "AB-", "AB+"],
+    "A+": ["A+", "AB+"],
+    "B-": ["B-", "B+", "AB-", "AB+"],
+    "B+": ["B+", "AB+"],
+    "AB-": ["AB-", "AB+"],
+    "AB+": ["AB+"]
+}
+
+# Precomputed inverse: recipient group -> donor groups that can give to it, exact match first
+RECIPIENT_TO_DONORS = {
+    recipient: [recipient] + [donor for donor in BLOOD_GROUPS if donor != recipient and recipient in DONOR_TO_RECIPIENTS[donor]]
+    for recipient in BLOOD_GROUPS
+}
+
+
+def can_donate(donor_blood, recipient_blood):
+    """Check if donor blood is compatible with recipient"""
+    return recipient_blood in DONOR_TO_RECIPIENTS.get(donor_blood, [])
@@ -3,12 +3,181 @@ import os
 import hashlib
 from datetime import datetime
 import uuid
+import time
+from itertools import islice
+from utils.storage import CSVStorage, SQLiteStorage, apply_schema
+from utils.write_queue import GroupCommitWriter
+from utils.health_aggregates import HealthAggregates
+from utils.search_index import PostSearchIndex
+from utils.post_counters import PostCounters
+from utils.blood_compatibility import RECIPIENT_TO_DONORS
+from utils.geo_index import PlaceIndex
+from utils.organ_matching import match_organs, organ_name
+from utils.waitlist import WaitlistQueue, PAGE_SIZE as WAITLIST_PAGE_SIZE
+
+# Column order and load types per table. Kinds: "str" text, "category" repeated labels,
+# "Int64"/"float32" numbers, "boolean", and "date"/"datetime" (parsed once at load).
+TABLE_SCHEMAS = {
+    "users": {
+        "user_id": "str", "name": "str", "email": "str", "phone": "str", "age": "Int64",
+        "gender": "category", "blood_group": "category", "password_hash": "str", "created_date": "date"
+    },
+    "blood_donors": {
+        "donor_id": "str", "user_id": "str", "blood_group": "category", "last_donation": "date",
+        "total_donations": "Int64", "available": "boolean", "location": "str", "contact": "str",
+        "latitude": "float32", "longitude": "float32"
+    },
+    "organ_donors": {
+        "donor_id": "str", "user_id": "str", "organs": "str", "medical_conditions": "str",
+        "emergency_contact": "str", "registered_date": "date", "status": "category",
+        "blood_group": "category", "hla_typing": "str", "weight": "float32", "latitude": "float32", "longitude": "float32"
+    },
+    "health_records": {
+        "record_id": "str", "user_id": "str", "date": "date", "heart_rate": "float32", "blood_pressure": "str",
+        "weight": "float32", "height": "float32", "temperature": "float32", "notes": "str"
+    },
+    "appointments": {
+        "appointment_id": "str", "user_id": "str", "doctor_name": "category", "specialty": "category",
+        "date": "date", "time": "str", "status": "category", "consultation_type": "category", "notes": "str"
+    },
+    "feedback": {
+        "feedback_id": "str", "user_id": "str", "service_type": "category", "rating": "Int64",
+        "comment": "str", "date": "date"
+    },
+    "community_posts": {
+        "post_id": "str", "user_id": "str", "author": "str", "title": "str", "content": "str",
+        "category": "category", "date": "datetime", "likes": "Int64", "comments": "Int64"
+    },
+    # Organ recipients; only "Waiting" rows are in the priority queue (utils/waitlist.py)
+    "organ_waitlist": {
+        "recipient_id": "str", "user_id": "str", "organ_needed": "category", "blood_group": "category",
+        "age_range": "str", "location": "str", "hla_typing": "str", "weight": "float32", "latitude": "float32",
+        "longitude": "float32", "urgency": "category", "listed_date": "date", "status": "category",
+        "match_score": "float32"
+    },
+    # Facility directories, located by latitude/longitude for nearby searches
+    "hospitals": {
+        "hospital_id": "str", "name": "str", "address": "str", "phone": "str", "emergency_number": "str",
+        "specialties": "str", "rating": "float32", "latitude": "float32", "longitude": "float32"
+    },
+    "pharmacies": {
+        "pharmacy_id": "str", "name": "str", "address": "str", "phone": "str", "delivery_available": "boolean",
+        "operating_hours": "str", "rating": "float32", "latitude": "float32", "longitude": "float32"
+    },
+    "blood_banks": {
+        "bank_id": "str", "name": "str", "address": "str", "phone": "str", "email": "str",
+        "blood_types_available": "str", "operating_hours": "str", "latitude": "float32", "longitude": "float32"
+    },
+    # thread_id is the post for top-level comments and the parent comment for replies
+    "post_comments": {
+        "comment_id": "str", "post_id": "str", "parent_id": "str", "thread_id": "str", "user_id": "str",
+        "author": "str", "content": "str", "date": "datetime"
+    },
+    # One row per (post, user) like, so a user's like counts once
+    "post_likes": {
+        "like_id": "str", "post_id": "str", "user_id": "str", "date": "datetime"
+    },
+    # Append-only like/comment deltas, folded into community_posts by compact_post_counters()
+    "post_counter_log": {
+        "entry_id": "str", "post_id": "str", "counter": "category", "delta": "Int64", "date": "datetime"
+    },
+    # Typed event tables. source_record_id links rows backfilled from health_records notes.
+    "activity_events": {
+        "event_id": "str", "user_id": "str", "date": "datetime", "activity": "str", "category": "category",
+        "duration_min": "Int64", "intensity": "category", "calories": "Int64", "distance_km": "float32",
+        "heart_rate": "float32", "effort": "Int64", "mood_after": "category", "notes": "str",
+        "source_record_id": "str", "weather": "category"
+    },
+    "mood_events": {
+        "event_id": "str", "user_id": "str", "date": "datetime", "log_type": "category", "mood": "category",
+        "emotions": "str", "stress_level": "Int64", "triggers": "str", "coping": "str", "notes": "str",
+        "source_record_id": "str"
+    },
+    "screening_events": {
+        "event_id": "str", "user_id": "str", "date": "datetime", "instrument": "category", "score": "Int64",
+        "max_score": "Int64", "source_record_id": "str"
+    },
+    "prescription_events": {
+        "event_id": "str", "user_id": "str", "date": "datetime", "prescription_id": "str", "doctor": "str",
+        "hospital": "str", "prescribed_date": "date", "reason": "str", "medicines": "str", "notes": "str",
+        "source_record_id": "str"
+    },
+    "medical_alert_events": {
+        "event_id": "str", "user_id": "str", "date": "datetime", "drug_allergies": "str", "food_allergies": "str",
+        "other_allergies": "str", "conditions": "str", "medications": "str", "devices": "str",
+        "blood_type": "category", "emergency_doctor": "str", "insurance": "str", "special_instructions": "str",
+        "ice_contact1": "str", "ice_contact2": "str", "source_record_id": "str"
+    },
+    "access_grant_events": {
+        "event_id": "str", "user_id": "str", "date": "datetime", "recipient_name": "str",
+        "recipient_type": "category", "access_level": "category", "duration": "str", "records": "str",
+        "reason": "str", "source_record_id": "str"
+    }
+}
+TABLE_HEADERS = {table: list(schema) for table, schema in TABLE_SCHEMAS.items()}
+EVENT_TABLES = {
+    "activity": "activity_events",
+    "mood": "mood_events",
+    "screening": "screening_events",
+    "prescription": "prescription_events",
+    "medical_alert": "medical_alert_events",
+    "access_grant": "access_grant_events"
+}
+# Place kinds for find_nearby() -> table with latitude/longitude columns
+PLACE_TABLES = {
+    "hospital": "hospitals",
+    "pharmacy": "pharmacies",
+    "blood_bank": "blood_banks",
+    "blood_donor": "blood_donors"
+}
+# Plausible ranges for imported vitals (heart rate in BPM, weight kg, height cm, temperature °F)
+VITAL_RANGES = {
+    "heart_rate": (20, 250),
+    "weight": (1, 500),
+    "height": (30, 272),
+    "temperature": (85, 115)
+}
+BLOOD_PRESSURE_PATTERN = r"\d{2,3}/\d{2,3}"
+# Minimum gap between whole-blood donations
+DONATION_INTERVAL_DAYS = 56
+# Counter log entries kept before they are folded into community_posts
+COUNTER_LOG_COMPACT_AFTER = 500
 
 class DataManager:
-    def __init__(self):
+    def __init__(self, backend=None, fsync_policy="none", db_path=None, write_behind=False, max_batch=100, max_delay=0.05):
         self.data_dir = "data"
+        backend = backend or os.environ.get("HEALTHTECH_STORAGE", "csv")
         self.ensure_data_directory()
+        if backend == "csv":
+            self.storage = CSVStorage(
+                self.data_dir,
+                fsync_policy=fsync_policy,
+                indexed={"health_records": "user_id"},
+                hash_indexed={
+                    "users": ["email", "user_id"],
+                    "community_posts": ["post_id"],
+                    "blood_donors": ["blood_group", "user_id"]
+                },
+                partitioned={"health_records": "date"},
+                sorted_indexed={"community_posts": ("date", "category"), "post_comments": ("date", "thread_id")}
+            )
+        elif backend == "sqlite":
+            self.storage = SQLiteStorage(db_path or os.path.join(self.data_dir, "healthtech.db"), fsync_policy=fsync_policy)
+        else:
+            raise ValueError(f"Unknown storage backend: {backend!r}")
         self.ensure_data_files()
+        self.aggregates = HealthAggregates(getattr(self.storage, "db_path", self.data_dir))
+        self.post_search = PostSearchIndex(
+            getattr(self.storage, "db_path", self.data_dir), lambda: self.storage.table_signature("community_posts")
+        )
+        self.post_counters = PostCounters(getattr(self.storage, "db_path", self.data_dir))
+        self.places = PlaceIndex(getattr(self.storage, "db_path", self.data_dir))
+        self.waitlist = WaitlistQueue(
+            getattr(self.storage, "db_path", self.data_dir), lambda: self.storage.table_signature("organ_waitlist")
+        )
+        if write_behind:
+            # Inserts return their IDs immediately and are committed in batches by one writer thread
+            self.storage = GroupCommitWriter(self.storage, max_batch=max_batch, max_delay=max_delay)
     
     def ensure_data_directory(self):
         """Create data directory if it doesn't exist"""
@@ -16,22 +185,25 @@ class DataManager:
             os.makedirs(self.data_dir)
     
     def ensure_data_files(self):
-        """Create CSV files with headers if they don't exist"""
-        files_and_headers = {
-            "users.csv": ["user_id", "name", "email", "phone", "age", "gender", "blood_group", "password_hash", "created_date"],
-            "blood_donors.csv": ["donor_id", "user_id", "blood_group", "last_donation", "total_donations", "available", "location", "contact"],
-            "organ_donors.csv": ["donor_id", "user_id", "organs", "medical_conditions", "emergency_contact", "registered_date", "status"],
-            "health_records.csv": ["record_id", "user_id", "date", "heart_rate", "blood_pressure", "weight", "height", "temperature", "notes"],
-            "appointments.csv": ["appointment_id", "user_id", "doctor_name", "specialty", "date", "time", "status", "consultation_type", "notes"],
-            "feedback.csv": ["feedback_id", "user_id", "service_type", "rating", "comment", "date"],
-            "community_posts.csv": ["post_id", "user_id", "author", "title", "content", "category", "date", "likes", "comments"]
-        }
-        
-        for filename, headers in files_and_headers.items():
-            filepath = os.path.join(self.data_dir, filename)
-            if not os.path.exists(filepath):
-                df = pd.DataFrame(columns=headers)
-                df.to_csv(filepath, index=False)
+        """Create storage tables if they don't exist and register their schemas"""
+        for table, schema in TABLE_SCHEMAS.items():
+            self.storage.ensure_table(table, list(schema), schema)
+
+    def cache_stats(self):
+        """Get hit/miss counters for the storage table cache"""
+        return self.storage.cache_stats()
+
+    def flush(self, timeout=None):
+        """Wait until all queued inserts are committed; True when nothing is left or write-behind is off"""
+        if isinstance(self.storage, GroupCommitWriter):
+            return self.storage.flush(timeout=timeout)
+        return True
+
+    def rebuild_health_record_index(self):
+        """Rebuild the per-user offset index for health records (CSV backend only)"""
+        if hasattr(self.storage, "rebuild_index"):
+            self.flush()
+            self.storage.rebuild_index("health_records")
     
     def hash_password(self, password):
         """Hash password for secure storage"""
@@ -40,9 +212,7 @@ class DataManager:
     def create_user(self, name, email, phone, age, gender, blood_group, password):
         """Create a new user"""
         try:
-            users_df = pd.read_csv(os.path.join(self.data_dir, "users.csv"))
-            
-            if email in users_df['email'].values:
+            if self.storage.lookup("users", "email", email):
                 return None
             
             user_id = str(uuid.uuid4())
@@ -60,8 +230,7 @@ class DataManager:
                 "created_date": datetime.now().strftime("%Y-%m-%d")
             }
             
-            users_df = pd.concat([users_df, pd.DataFrame([new_user])], ignore_index=True)
-            users_df.to_csv(os.path.join(self.data_dir, "users.csv"), index=False)
+            self.storage.append_row("users", new_user)
             
             return user_id
         except Exception as e:
@@ -71,13 +240,12 @@ class DataManager:
     def authenticate_user(self, email, password):
         """Authenticate user login"""
         try:
-            users_df = pd.read_csv(os.path.join(self.data_dir, "users.csv"))
+            users = self.storage.lookup("users", "email", email)
             password_hash = self.hash_password(password)
             
-            user = users_df[(users_df['email'] == email) & (users_df['password_hash'] == password_hash)]
-            
-            if not user.empty:
-                return user.iloc[0].to_dict()
+            for user in users:
+                if user['password_hash'] == password_hash:
+                    return user
             return None
         except Exception as e:
             print(f"Error authenticating user: {e}")
@@ -86,9 +254,8 @@ class DataManager:
     def get_user_by_id(self, user_id):
         """Get user by ID"""
         try:
-            users_df = pd.read_csv(os.path.join(self.data_dir, "users.csv"))
-            user = users_df[users_df['user_id'] == user_id]
-            return user.iloc[0].to_dict() if not user.empty else None
+            users = self.storage.lookup("users", "user_id", user_id)
+            return users[0] if users else None
         except Exception as e:
             print(f"Error getting user: {e}")
             return None
@@ -96,20 +263,15 @@ class DataManager:
     def update_user_profile(self, user_id, name, email, phone, age, gender, blood_group):
         """Update a user's profile information."""
         try:
-            users_df = pd.read_csv(os.path.join(self.data_dir, "users.csv"))
-            user_index = users_df[users_df['user_id'] == user_id].index
-            
-            if not user_index.empty:
-                users_df.loc[user_index, 'name'] = name
-                users_df.loc[user_index, 'email'] = email
-                users_df.loc[user_index, 'phone'] = phone
-                users_df.loc[user_index, 'age'] = age
-                users_df.loc[user_index, 'gender'] = gender
-                users_df.loc[user_index, 'blood_group'] = blood_group
-                
-                users_df.to_csv(os.path.join(self.data_dir, "users.csv"), index=False)
-                return True
-            return False
+            updated = self.storage.update_rows("users", "user_id", user_id, {
+                "name": name,
+                "email": email,
+                "phone": phone,
+                "age": age,
+                "gender": gender,
+                "blood_group": blood_group
+            })
+            return updated > 0
         except Exception as e:
             print(f"Error updating user profile: {e}")
             return False
@@ -117,15 +279,9 @@ class DataManager:
     def update_user_password(self, user_id, new_password):
         """Update a user's password."""
         try:
-            users_df = pd.read_csv(os.path.join(self.data_dir, "users.csv"))
-            user_index = users_df[users_df['user_id'] == user_id].index
-
-            if not user_index.empty:
-                new_password_hash = self.hash_password(new_password)
-                users_df.loc[user_index, 'password_hash'] = new_password_hash
-                users_df.to_csv(os.path.join(self.data_dir, "users.csv"), index=False)
-                return True
-            return False
+            new_password_hash = self.hash_password(new_password)
+            updated = self.storage.update_rows("users", "user_id", user_id, {"password_hash": new_password_hash})
+            return updated > 0
         except Exception as e:
             print(f"Error updating user password: {e}")
             return False
@@ -133,8 +289,6 @@ class DataManager:
     def add_health_record(self, user_id, heart_rate=None, blood_pressure=None, weight=None, height=None, temperature=None, notes=""):
         """Add a health record"""
         try:
-            records_df = pd.read_csv(os.path.join(self.data_dir, "health_records.csv"))
-            
             record_id = str(uuid.uuid4())
             new_record = {
                 "record_id": record_id,
@@ -148,8 +302,8 @@ class DataManager:
                 "notes": notes
             }
             
-            records_df = pd.concat([records_df, pd.DataFrame([new_record])], ignore_index=True)
-            records_df.to_csv(os.path.join(self.data_dir, "health_records.csv"), index=False)
+            self.storage.append_row("health_records", new_record)
+            self.aggregates.add(user_id, new_record)
             
             return record_id
         except Exception as e:
@@ -159,18 +313,152 @@ class DataManager:
     def get_user_health_records(self, user_id):
         """Get health records for a user"""
         try:
-            records_df = pd.read_csv(os.path.join(self.data_dir, "health_records.csv"))
-            user_records = records_df[records_df['user_id'] == user_id]
+            user_records = self.storage.find_rows("health_records", "user_id", user_id)
             return user_records.sort_values('date')
         except Exception as e:
             print(f"Error getting health records: {e}")
             return pd.DataFrame()
     
+    def get_health_summary(self, user_id):
+        """Get a user's running health record aggregates (count, last update, days tracked, vital stats, weights)"""
+        try:
+            return self.aggregates.get(
+                user_id,
+                lambda uid: self.storage.find_rows("health_records", "user_id", uid),
+                lambda uid: self.storage.count_rows("health_records", "user_id", uid)
+            )
+        except Exception as e:
+            print(f"Error getting health summary: {e}")
+            return None
+    
+    def get_user_health_records_range(self, user_id, start_date=None, end_date=None):
+        """Get a user's health records dated within [start_date, end_date], reading only the overlapping months"""
+        try:
+            user_records = self.storage.read_range("health_records", start_date, end_date, column="user_id", value=user_id)
+            return user_records.sort_values('date')
+        except Exception as e:
+            print(f"Error getting health records: {e}")
+            return pd.DataFrame()
+    
+    def iter_user_health_records(self, user_id, start_date=None, end_date=None):
+        """Yield a user's health records in [start_date, end_date] as date-sorted chunks (one month or batch at a time).
+
+        Read errors are raised rather than ending the iteration, so an export is never silently cut short.
+        """
+        for chunk in self.storage.iter_range("health_records", start_date, end_date, column="user_id", value=user_id):
+            yield chunk.sort_values('date')
+
+    def _iter_chunks(self, source, chunk_size):
+        """Yield DataFrame chunks from a CSV path/file, a DataFrame or an iterable of row dicts"""
+        if isinstance(source, pd.DataFrame):
+            for start in range(0, len(source), chunk_size):
+                yield source.iloc[start:start + chunk_size]
+        elif isinstance(source, (str, os.PathLike)) or hasattr(source, "read"):
+            yield from pd.read_csv(source, chunksize=chunk_size, dtype=str, keep_default_na=False, na_values=[""])
+        else:
+            rows = iter(source)
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    return
+                yield pd.DataFrame(chunk)
+
+    def _validate_health_records(self, chunk, user_id=None):
+        """Coerce an import chunk to the health_records schema; returns (valid rows, rejected count by reason)"""
+        df = pd.DataFrame(index=chunk.index)
+        for col in TABLE_HEADERS["health_records"]:
+            df[col] = chunk[col] if col in chunk.columns else None
+        if user_id is not None:
+            df["user_id"] = df["user_id"].fillna(user_id)
+        df["user_id"] = df["user_id"].astype("string").str.strip()
+        df["date"] = pd.to_datetime(df["date"], format="ISO8601", errors="coerce").dt.normalize()
+        df["blood_pressure"] = df["blood_pressure"].astype("string").str.replace(" ", "", regex=False)
+        df["notes"] = df["notes"].astype("string").fillna("")
+
+        invalid = {
+            "user_id": df["user_id"].isna() | (df["user_id"] == ""),
+            "date": df["date"].isna(),
+            "blood_pressure": df["blood_pressure"].notna() & ~df["blood_pressure"].str.fullmatch(BLOOD_PRESSURE_PATTERN).fillna(False)
+        }
+        for col, (low, high) in VITAL_RANGES.items():
+            raw = df[col]
+            df[col] = pd.to_numeric(raw, errors="coerce")
+            # Present but unparseable, or outside the plausible range
+            invalid[col] = (raw.notna() & df[col].isna()) | (df[col].notna() & ~df[col].between(low, high))
+        bad = pd.Series(False, index=df.index)
+        rejected = {}
+        for col, mask in invalid.items():
+            mask = mask.fillna(False).astype(bool) & ~bad
+            if mask.any():
+                rejected[col] = int(mask.sum())
+            bad |= mask
+        return df[~bad], rejected
+
+    def _record_keys(self, df):
+        """Hash the identifying fields of health records so imports can be deduplicated vectorised"""
+        key = pd.DataFrame({
+            "user_id": df["user_id"].astype(str),
+            "date": pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d"),
+            "blood_pressure": df["blood_pressure"].astype("string").fillna(""),
+            "notes": df["notes"].astype("string").fillna("")
+        })
+        for col in VITAL_RANGES:
+            key[col] = pd.to_numeric(df[col], errors="coerce").astype("float64").round(1).astype("string").fillna("")
+        return pd.util.hash_pandas_object(key, index=False)
+
+    def bulk_import_health_records(self, source, user_id=None, chunk_size=5000):
+        """Import health records from a CSV path/file, DataFrame or iterable of dicts.
+
+        Input is processed chunk by chunk: each chunk is validated and coerced vectorised,
+        rows already stored (same user, date, vitals and notes) are skipped, and the rest
+        are written with one append per touched monthly partition. Rows missing a user or
+        date, or with out-of-range vitals or a malformed blood pressure, are rejected.
+        Returns counts for the import along with its throughput in rows/sec.
+        """
+        stats = {"rows": 0, "imported": 0, "duplicates": 0, "rejected": 0, "rejected_by_field": {}}
+        started = time.perf_counter()
+        try:
+            for chunk in self._iter_chunks(source, chunk_size):
+                stats["rows"] += len(chunk)
+                df, rejected = self._validate_health_records(chunk, user_id)
+                for col, count in rejected.items():
+                    stats["rejected_by_field"][col] = stats["rejected_by_field"].get(col, 0) + count
+                    stats["rejected"] += count
+                if df.empty:
+                    continue
+
+                keys = self._record_keys(df)
+                fresh = ~keys.duplicated()
+                users = df["user_id"].unique()
+                if len(users) == 1:
+                    existing = self.storage.read_range(
+                        "health_records", df["date"].min(), df["date"].max(), column="user_id", value=users[0]
+                    )
+                else:
+                    existing = self.storage.read_range("health_records", df["date"].min(), df["date"].max())
+                    existing = existing[existing["user_id"].isin(users)]
+                if not existing.empty:
+                    fresh &= ~keys.isin(set(self._record_keys(existing)))
+                stats["duplicates"] += int((~fresh).sum())
+                df = df[fresh]
+                if df.empty:
+                    continue
+
+                df = df.assign(record_id=[str(uuid.uuid4()) for _ in range(len(df))])
+                self.storage.append_rows("health_records", df.to_dict("records"))
+                self.aggregates.invalidate(df["user_id"].unique())
+                stats["imported"] += len(df)
+        except Exception as e:
+            print(f"Error importing health records: {e}")
+            stats["error"] = str(e)
+        self.flush()
+        stats["seconds"] = time.perf_counter() - started
+        stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+        return stats
+    
     def book_appointment(self, user_id, doctor_name, specialty, date, time, consultation_type):
         """Book an appointment"""
         try:
-            appointments_df = pd.read_csv(os.path.join(self.data_dir, "appointments.csv"))
-            
             appointment_id = str(uuid.uuid4())
             new_appointment = {
                 "appointment_id": appointment_id,
@@ -184,8 +472,7 @@ class DataManager:
                 "notes": ""
             }
             
-            appointments_df = pd.concat([appointments_df, pd.DataFrame([new_appointment])], ignore_index=True)
-            appointments_df.to_csv(os.path.join(self.data_dir, "appointments.csv"), index=False)
+            self.storage.append_row("appointments", new_appointment)
             
             return appointment_id
         except Exception as e:
@@ -195,18 +482,258 @@ class DataManager:
     def get_user_appointments(self, user_id):
         """Get appointments for a user"""
         try:
-            appointments_df = pd.read_csv(os.path.join(self.data_dir, "appointments.csv"))
-            user_appointments = appointments_df[appointments_df['user_id'] == user_id]
+            user_appointments = self.storage.find_rows("appointments", "user_id", user_id)
             return user_appointments.sort_values('date', ascending=False)
         except Exception as e:
             print(f"Error getting appointments: {e}")
             return pd.DataFrame()
 
+    def register_blood_donor(self, user_id, blood_group, location, contact, last_donation=None,
+                             latitude=None, longitude=None):
+        """Register a user as a blood donor, or update their existing registration.
+
+        On re-registration, details passed as None keep their stored values, and a
+        donation date newer than the stored one counts as another donation.
+        """
+        try:
+            details = {
+                "blood_group": blood_group,
+                "location": location,
+                "contact": contact,
+                "last_donation": last_donation,
+                "available": True,
+                "latitude": latitude,
+                "longitude": longitude
+            }
+            existing = self.storage.lookup("blood_donors", "user_id", user_id)
+            if existing:
+                donor = existing[0]
+                changes = {col: value for col, value in details.items() if value is not None}
+                previous = pd.to_datetime(donor.get('last_donation'), errors="coerce")
+                if last_donation is not None and (pd.isna(previous) or pd.Timestamp(last_donation) > previous):
+                    total = donor.get('total_donations')
+                    changes["total_donations"] = (0 if pd.isna(total) else int(total)) + 1
+                self.storage.update_rows("blood_donors", "user_id", user_id, changes)
+                self.places.invalidate("blood_donors")
+                return donor['donor_id']
+            
+            donor_id = str(uuid.uuid4())
+            self.storage.append_row("blood_donors", {
+                "donor_id": donor_id,
+                "user_id": user_id,
+                "total_donations": 1 if last_donation else 0,
+                **details
+            })
+            self.places.invalidate("blood_donors")
+            
+            return donor_id
+        except Exception as e:
+            print(f"Error registering blood donor: {e}")
+            return None
+
+    def get_blood_donor_by_user(self, user_id):
+        """Get a user's blood donor registration (empty if not registered)"""
+        try:
+            return pd.DataFrame(self.storage.lookup("blood_donors", "user_id", user_id), columns=TABLE_HEADERS["blood_donors"])
+        except Exception as e:
+            print(f"Error getting blood donor: {e}")
+            return pd.DataFrame()
+
+    def get_blood_donors(self, blood_group=None, near=None, radius_km=None):
+        """Get blood donors; with a recipient blood group, only available donors who can give to it now.
+
+        Compatible donor groups come from the precomputed recipient table and each group is
+        read from the blood-group index, so the registry is never scanned. Exact matches come
+        first, then the most experienced donors. With near=(latitude, longitude), only donors
+        with a location within radius_km are kept, closest first, with a distance_km column.
+        """
+        try:
+            if near is not None:
+                nearby = self.find_nearby("blood_donor", *near, radius_km=radius_km)
+                if blood_group is None:
+                    return nearby
+                donors_df = self.get_blood_donors(blood_group)
+                distances = nearby.set_index("donor_id")["distance_km"]
+                donors_df = donors_df[donors_df["donor_id"].isin(distances.index)].copy()
+                donors_df["distance_km"] = donors_df["donor_id"].map(distances)
+                exact = donors_df["blood_group"] == blood_group
+                return donors_df.assign(exact_match=exact).sort_values(
+                    ["exact_match", "distance_km"], ascending=[False, True]
+                ).drop(columns="exact_match")
+            if blood_group is None:
+                return self.storage.read_table("blood_donors")
+            donor_groups = RECIPIENT_TO_DONORS.get(blood_group, [])
+            donors = [
+                {**donor, "exact_match": group == blood_group}
+                for group in donor_groups
+                for donor in self.storage.lookup("blood_donors", "blood_group", group)
+            ]
+            donors_df = pd.DataFrame(donors, columns=TABLE_HEADERS["blood_donors"] + ["exact_match"])
+            if donors_df.empty:
+                return donors_df
+            last_donation = pd.to_datetime(donors_df['last_donation'])
+            eligible = last_donation.isna() | (last_donation <= pd.Timestamp.now() - pd.Timedelta(days=DONATION_INTERVAL_DAYS))
+            donors_df = donors_df[donors_df['available'].fillna(False).astype(bool) & eligible]
+            return donors_df.sort_values(['exact_match', 'total_donations'], ascending=False).drop(columns='exact_match')
+        except Exception as e:
+            print(f"Error getting blood donors: {e}")
+            return pd.DataFrame()
+
+    def register_organ_donor(self, user_id, organs, medical_conditions, emergency_contact, hla_typing=None,
+                             weight=None, latitude=None, longitude=None):
+        """Register a user as an organ donor (blood group taken from their profile), or update their registration"""
+        try:
+            user = self.get_user_by_id(user_id)
+            details = {
+                "organs": ",".join(organs),
+                "medical_conditions": medical_conditions,
+                "emergency_contact": emergency_contact,
+                "blood_group": user["blood_group"] if user else None,
+                "hla_typing": hla_typing,
+                "weight": weight,
+                "latitude": latitude,
+                "longitude": longitude,
+                "status": "Active"
+            }
+            existing = self.storage.find_rows("organ_donors", "user_id", user_id)
+            if not existing.empty:
+                self.storage.update_rows("organ_donors", "user_id", user_id, details)
+                return existing.iloc[0]['donor_id']
+            
+            donor_id = str(uuid.uuid4())
+            self.storage.append_row("organ_donors", {
+                "donor_id": donor_id,
+                "user_id": user_id,
+                "registered_date": datetime.now().strftime("%Y-%m-%d"),
+                **details
+            })
+            return donor_id
+        except Exception as e:
+            print(f"Error registering organ donor: {e}")
+            return None
+
+    def get_organ_donors(self):
+        """Get the active organ donors"""
+        try:
+            donors_df = self.storage.read_table("organ_donors")
+            return donors_df[donors_df['status'] == "Active"]
+        except Exception as e:
+            print(f"Error getting organ donors: {e}")
+            return pd.DataFrame()
+
+    def _load_waitlist(self):
+        return self.storage.read_table("organ_waitlist")
+
+    def add_waitlist_recipient(self, organ_needed, blood_group, urgency, listed_date=None, **details):
+        """Put a recipient on the organ waitlist; details are the other organ_waitlist columns"""
+        try:
+            entry = {
+                **{col: None for col in TABLE_HEADERS["organ_waitlist"]},
+                **details,
+                "recipient_id": str(uuid.uuid4()),
+                "organ_needed": organ_name(organ_needed),
+                "blood_group": blood_group,
+                "urgency": urgency,
+                "listed_date": listed_date or datetime.now().strftime("%Y-%m-%d"),
+                "status": "Waiting"
+            }
+            before = self.storage.table_signature("organ_waitlist")
+            self.storage.append_row("organ_waitlist", entry)
+            entry["listed_date"] = pd.Timestamp(entry["listed_date"])
+            self.waitlist.upsert(entry, before)
+            return entry["recipient_id"]
+        except Exception as e:
+            print(f"Error adding waitlist recipient: {e}")
+            return None
+
+    def update_waitlist_recipient(self, recipient_id, **changes):
+        """Change a waitlist entry's status, urgency, match score or details and re-rank it"""
+        try:
+            entry = self.waitlist.get(recipient_id, self._load_waitlist)
+            if entry is None:
+                return False
+            if changes.get("organ_needed"):
+                changes["organ_needed"] = organ_name(changes["organ_needed"])
+            before = self.storage.table_signature("organ_waitlist")
+            self.storage.update_rows("organ_waitlist", "recipient_id", recipient_id, changes)
+            self.waitlist.upsert({**entry, **changes}, before)
+            return True
+        except Exception as e:
+            print(f"Error updating waitlist recipient: {e}")
+            return False
+
+    def remove_waitlist_recipient(self, recipient_id):
+        """Take a recipient off the waitlist (the row is kept with status "Removed")"""
+        return self.update_waitlist_recipient(recipient_id, status="Removed")
+
+    def get_waitlist(self, organ_needed=None, blood_group=None, limit=WAITLIST_PAGE_SIZE, urgency=None, location=None):
+        """Get the first `limit` waiting recipients in priority order (urgency, longest wait, best match score) with wait_days.
+
+        urgency and location (a case-insensitive substring) filter while the queue is read,
+        so a page is always full when enough recipients match. limit=None returns everyone.
+        """
+        try:
+            def matches(entry):
+                if urgency and entry.get("urgency") != urgency:
+                    return False
+                return not location or location.lower() in str(entry.get("location") or "").lower()
+
+            entries = self.waitlist.ranked(
+                self._load_waitlist, organ_name(organ_needed) if organ_needed else None, blood_group, limit,
+                where=matches if urgency or location else None
+            )
+            waitlist_df = apply_schema(
+                pd.DataFrame(entries, columns=TABLE_HEADERS["organ_waitlist"]), TABLE_SCHEMAS["organ_waitlist"]
+            )
+            waitlist_df["wait_days"] = (pd.Timestamp.now().normalize() - waitlist_df["listed_date"]).dt.days
+            return waitlist_df
+        except Exception as e:
+            print(f"Error getting waitlist: {e}")
+            return pd.DataFrame()
+
+    def match_organ_recipients(self, recipients=None, k=5, donors=None):
+        """Rank the top-k compatible recipients for every active organ donor (see utils/organ_matching.py).
+
+        Recipients default to the current waitlist.
+        """
+        try:
+            if recipients is None:
+                recipients = self.get_waitlist(limit=None)
+            return match_organs(self.get_organ_donors() if donors is None else donors, recipients, k=k)
+        except Exception as e:
+            print(f"Error matching organ recipients: {e}")
+            return pd.DataFrame()
+
+    def add_place(self, kind, **fields):
+        """Add a hospital, pharmacy or blood bank (with latitude/longitude) to its directory"""
+        try:
+            table = PLACE_TABLES[kind]
+            place_id = str(uuid.uuid4())
+            self.storage.append_row(table, {TABLE_HEADERS[table][0]: place_id, **fields})
+            self.places.invalidate(table)
+            return place_id
+        except Exception as e:
+            print(f"Error adding {kind}: {e}")
+            return None
+
+    def find_nearby(self, kind, latitude, longitude, k=None, radius_km=None):
+        """Get the k nearest places of a kind and/or those within radius_km, closest first with distance_km.
+
+        kind is "hospital", "pharmacy", "blood_bank" or "blood_donor"; rows without
+        coordinates are left out.
+        """
+        try:
+            table = PLACE_TABLES[kind]
+            return self.places.query(
+                table, lambda: self.storage.read_table(table), latitude, longitude, k=k, radius_km=radius_km
+            )
+        except Exception as e:
+            print(f"Error finding nearby {kind}: {e}")
+            return pd.DataFrame()
+
     def create_community_post(self, user_id, author, title, content, category):
         """Create a community post"""
         try:
-            posts_df = pd.read_csv(os.path.join(self.data_dir, "community_posts.csv"))
-            
             post_id = str(uuid.uuid4())
             new_post = {
                 "post_id": post_id,
@@ -220,22 +747,247 @@ class DataManager:
                 "comments": 0
             }
             
-            posts_df = pd.concat([posts_df, pd.DataFrame([new_post])], ignore_index=True)
-            posts_df.to_csv(os.path.join(self.data_dir, "community_posts.csv"), index=False)
+            before = self.storage.table_signature("community_posts")
+            self.storage.append_row("community_posts", new_post)
+            self.post_search.add(new_post, before)
             
             return post_id
         except Exception as e:
             print(f"Error creating community post: {e}")
             return None
     
+    def get_community_feed(self, category=None, cursor=None, limit=10):
+        """Get one page of community posts, newest first, optionally for one category.
+
+        Returns (posts, next_cursor); pass next_cursor back to get the following page.
+        next_cursor is None once there are no older posts.
+        """
+        try:
+            posts_df = self.storage.read_page(
+                "community_posts", "date", limit + 1, cursor=cursor,
+                column="category" if category else None, value=category
+            )
+            if len(posts_df) <= limit:
+                return self._with_live_counts(posts_df), None
+            posts_df = posts_df.head(limit)
+            last = posts_df.iloc[-1]
+            return self._with_live_counts(posts_df), (last['date'], last['post_id'])
+        except Exception as e:
+            print(f"Error getting community posts: {e}")
+            return pd.DataFrame(), None
+
+    def search_community_posts(self, query, limit=10):
+        """Search post titles and content; returns matching posts ranked by BM25 score"""
+        try:
+            hits = self.post_search.search(query, lambda: self.storage.read_table("community_posts"), limit=limit)
+            return self._with_live_counts(pd.DataFrame([
+                {**post, "score": score}
+                for post_id, score in hits
+                for post in self.storage.lookup("community_posts", "post_id", post_id)
+            ]))
+        except Exception as e:
+            print(f"Error searching community posts: {e}")
+            return pd.DataFrame()
+
     def get_recent_community_posts(self, limit=10):
         """Get recent community posts"""
+        posts_df, _ = self.get_community_feed(limit=limit)
+        return posts_df
+
+    def _log_event(self, kind, user_id, **fields):
+        """Append a row to one of the typed event tables"""
         try:
-            posts_df = pd.read_csv(os.path.join(self.data_dir, "community_posts.csv"))
-            if not posts_df.empty:
-                return posts_df.sort_values('date', ascending=False).head(limit)
-            return pd.DataFrame()
+            event_id = str(uuid.uuid4())
+            event = {
+                "event_id": event_id,
+                "user_id": user_id,
+                "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                **fields
+            }
+            self.storage.append_row(EVENT_TABLES[kind], event)
+            return event_id
         except Exception as e:
-            print(f"Error getting community posts: {e}")
+            print(f"Error logging {kind} event: {e}")
+            return None
+
+    def log_activity(self, user_id, activity, duration_min, calories=None, intensity=None, category=None,
+                     distance_km=None, heart_rate=None, effort=None, mood_after=None, weather=None, notes=""):
+        """Log a workout or quick-logged activity"""
+        return self._log_event(
+            "activity", user_id, activity=activity, category=category, duration_min=duration_min,
+            intensity=intensity, calories=calories, distance_km=distance_km, heart_rate=heart_rate,
+            effort=effort, mood_after=mood_after, weather=weather, notes=notes
+        )
+
+    def log_mood(self, user_id, mood=None, emotions=None, notes=""):
+        """Log a mood check-in"""
+        return self._log_event(
+            "mood", user_id, log_type="mood", mood=mood, emotions=", ".join(emotions or []), notes=notes
+        )
+
+    def log_stress(self, user_id, stress_level, triggers="", coping=""):
+        """Log a stress level check-in (stored with mood events)"""
+        return self._log_event(
+            "mood", user_id, log_type="stress", stress_level=stress_level, triggers=triggers, coping=coping
+        )
+
+    def record_screening(self, user_id, instrument, score, max_score):
+        """Record a screening score such as PHQ-2 or GAD-2"""
+        return self._log_event("screening", user_id, instrument=instrument, score=score, max_score=max_score)
+
+    def add_prescription(self, user_id, prescription_id, doctor, hospital, prescribed_date, reason="",
+                         medicines="", notes=""):
+        """Record a digital prescription"""
+        return self._log_event(
+            "prescription", user_id, prescription_id=prescription_id, doctor=doctor, hospital=hospital,
+            prescribed_date=prescribed_date, reason=reason, medicines=medicines, notes=notes
+        )
+
+    def save_medical_alert(self, user_id, **profile):
+        """Save a version of the user's medical alert profile; the latest row is the current one"""
+        return self._log_event("medical_alert", user_id, **profile)
+
+    def grant_data_access(self, user_id, recipient_name, recipient_type, access_level, duration, reason,
+                          records=None):
+        """Record a data-sharing grant"""
+        return self._log_event(
+            "access_grant", user_id, recipient_name=recipient_name, recipient_type=recipient_type,
+            access_level=access_level, duration=duration, records=", ".join(records or []), reason=reason
+        )
+
+    def get_user_events(self, kind, user_id, start_date=None, end_date=None):
+        """Get a user's events of one kind dated within [start_date, end_date], oldest first"""
+        try:
+            events = self.storage.read_range(
+                EVENT_TABLES[kind], start_date, end_date, column="user_id", value=user_id
+            )
+            return events.sort_values('date')
+        except Exception as e:
+            print(f"Error getting {kind} events: {e}")
             return pd.DataFrame()
 
+    def _load_post_likes(self, post_id):
+        return self.storage.find_rows("post_likes", "post_id", post_id)
+
+    def _load_counter_log(self):
+        return self.storage.read_table("post_counter_log")
+
+    def _with_live_counts(self, posts_df):
+        """Add like/comment deltas still in the counter log to the compacted counts"""
+        deltas = self.post_counters.deltas(self._load_counter_log)
+        if posts_df.empty or not deltas:
+            return posts_df
+        posts_df = posts_df.copy()
+        for counter in ("likes", "comments"):
+            live = posts_df['post_id'].map(lambda post_id: deltas.get(post_id, {}).get(counter, 0))
+            posts_df[counter] = (pd.to_numeric(posts_df[counter]).fillna(0) + live).astype("Int64")
+        return posts_df
+
+    def _bump_post_counter(self, post_id, counter, delta, user_id=None):
+        """Append a like/comment delta to the counter log; compacts the log once it grows long"""
+        self.storage.append_row("post_counter_log", {
+            "entry_id": str(uuid.uuid4()),
+            "post_id": post_id,
+            "counter": counter,
+            "delta": delta,
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
+        pending = self.post_counters.record(post_id, user_id=user_id)
+        if pending >= COUNTER_LOG_COMPACT_AFTER:
+            self.compact_post_counters()
+
+    def like_post(self, post_id, user_id):
+        """Like a post; returns True if counted, False if the user already liked it"""
+        try:
+            with self.post_counters.lock:
+                if self.post_counters.has_liked(post_id, user_id, self._load_post_likes):
+                    return False
+                self.storage.append_row("post_likes", {
+                    "like_id": str(uuid.uuid4()),
+                    "post_id": post_id,
+                    "user_id": user_id,
+                    "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                })
+                self._bump_post_counter(post_id, "likes", 1, user_id=user_id)
+            return True
+        except Exception as e:
+            print(f"Error liking post: {e}")
+            return False
+
+    def has_liked_post(self, post_id, user_id):
+        """Check whether a user has liked a post"""
+        try:
+            return self.post_counters.has_liked(post_id, user_id, self._load_post_likes)
+        except Exception as e:
+            print(f"Error checking post like: {e}")
+            return False
+
+    def increment_post_comments(self, post_id, delta=1):
+        """Count a comment on a post through the counter log"""
+        try:
+            with self.post_counters.lock:
+                self._bump_post_counter(post_id, "comments", delta)
+            return True
+        except Exception as e:
+            print(f"Error counting comment: {e}")
+            return False
+
+    def compact_post_counters(self):
+        """Fold the counter log into community_posts and drop the folded entries; returns entries folded"""
+        try:
+            # The engine does the read, rewrite and delete as one locked step (one transaction
+            # on SQLite), so entries logged meanwhile, from any process, are kept for next time
+            with self.post_counters.lock:
+                folded = self.storage.fold_deltas("post_counter_log", "community_posts", "post_id")
+                self.post_counters.compacted()
+                return folded
+        except Exception as e:
+            print(f"Error compacting post counters: {e}")
+            return 0
+
+    def add_post_comment(self, post_id, user_id, author, content, parent_id=None):
+        """Add a comment to a post, or a reply when parent_id is another comment"""
+        try:
+            comment_id = str(uuid.uuid4())
+            new_comment = {
+                "comment_id": comment_id,
+                "post_id": post_id,
+                "parent_id": parent_id,
+                "thread_id": parent_id or post_id,
+                "user_id": user_id,
+                "author": author,
+                "content": content,
+                "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+            
+            self.storage.append_row("post_comments", new_comment)
+            self.increment_post_comments(post_id)
+            
+            return comment_id
+        except Exception as e:
+            print(f"Error adding comment: {e}")
+            return None
+
+    def get_post_comments(self, post_id, parent_id=None, cursor=None, limit=10):
+        """Get one page of a post's comments (or of one comment's replies), newest first.
+
+        Each comment carries its reply_count so replies can be expanded lazily.
+        Returns (comments, next_cursor); next_cursor is None on the last page.
+        """
+        try:
+            comments_df = self.storage.read_page(
+                "post_comments", "date", limit + 1, cursor=cursor, column="thread_id", value=parent_id or post_id
+            )
+            next_cursor = None
+            if len(comments_df) > limit:
+                comments_df = comments_df.head(limit)
+                last = comments_df.iloc[-1]
+                next_cursor = (last['date'], last['comment_id'])
+            comments_df = comments_df.assign(reply_count=[
+                self.storage.count_rows("post_comments", "thread_id", comment_id)
+                for comment_id in comments_df['comment_id']
+            ])
+            return comments_df, next_cursor
+        except Exception as e:
+            print(f"Error getting comments: {e}")
+            return pd.DataFrame(), None
@@ -0,0 +1,123 @@
+import re
+import uuid
+import pandas as pd
+from utils.data_manager import EVENT_TABLES
+
+# Note formats written by the pages before the typed event tables existed
+ACTIVITY_RE = re.compile(
+    r"^Activity: (?P<activity>.+?) \((?P<duration>\d+)min, (?P<intensity>[^,]+) intensity, "
+    r"(?P<calories>\d+) cal\)(?: - (?P<notes>.*))?$", re.S
+)
+QUICK_LOG_RE = re.compile(r"^Quick Log: (?P<activity>.+?) \((?P<duration>\d+)min, (?P<calories>\d+) cal\)$", re.S)
+SCREENING_RE = re.compile(r"^Completed (?P<instrument>PHQ-2|GAD-2) .*?Score: (?P<score>\d+)/(?P<max_score>\d+)\.?$", re.S)
+STRESS_RE = re.compile(r"^Stress Log: Level (?P<level>\d+)/10\. Triggers: (?P<triggers>.*)\. Coping: (?P<coping>.*)\.$", re.S)
+MOOD_RE = re.compile(r"^Mood Log: Mood was (?P<mood>.*?)\. Emotions felt: (?P<emotions>.*?)\. Notes: (?P<notes>.*)$", re.S)
+PRESCRIPTION_RE = re.compile(
+    r"^Digital Prescription (?P<rx_id>\S+): Doctor: (?P<doctor>.*?) from (?P<hospital>.*?) "
+    r"on (?P<prescribed_date>\d{4}-\d{2}-\d{2})\. Reason: (?P<reason>.*?)\."
+    r"(?: Medicines: (?P<medicines>.*?)\.)?(?: Notes: (?P<notes>.*)\.)?$", re.S
+)
+MEDICAL_ALERT_RE = re.compile(
+    r"^Medical Alert Profile: Allergies: (?P<allergies>.*?); Conditions: (?P<conditions>.*?); "
+    r"Medications: (?P<medications>.*)$", re.S
+)
+ACCESS_GRANT_RE = re.compile(
+    r"^Data access granted to (?P<name>.*?) \((?P<type>[^)]*)\) - (?P<level>.*?) "
+    r"for (?P<duration>.*?)\. Reason: (?P<reason>.*)$", re.S
+)
+
+
+def parse_note(note, record):
+    """Parse one health record note into (event kind, event fields), or None if it isn't an event"""
+    note = note.strip()
+    match = ACTIVITY_RE.match(note)
+    if match:
+        return "activity", {
+            "activity": match["activity"], "duration_min": int(match["duration"]),
+            "intensity": match["intensity"], "calories": int(match["calories"]),
+            "heart_rate": record.get("heart_rate"), "notes": match["notes"] or ""
+        }
+    match = QUICK_LOG_RE.match(note)
+    if match:
+        return "activity", {
+            "activity": match["activity"], "category": "Quick Log",
+            "duration_min": int(match["duration"]), "calories": int(match["calories"])
+        }
+    match = SCREENING_RE.match(note)
+    if match:
+        return "screening", {
+            "instrument": match["instrument"], "score": int(match["score"]), "max_score": int(match["max_score"])
+        }
+    match = STRESS_RE.match(note)
+    if match:
+        return "mood", {
+            "log_type": "stress", "stress_level": int(match["level"]),
+            "triggers": match["triggers"], "coping": match["coping"]
+        }
+    match = MOOD_RE.match(note)
+    if match:
+        return "mood", {
+            "log_type": "mood", "mood": match["mood"], "emotions": match["emotions"], "notes": match["notes"]
+        }
+    match = PRESCRIPTION_RE.match(note)
+    if match:
+        return "prescription", {
+            "prescription_id": match["rx_id"], "doctor": match["doctor"], "hospital": match["hospital"],
+            "prescribed_date": match["prescribed_date"], "reason": match["reason"],
+            "medicines": match["medicines"] or "", "notes": match["notes"] or ""
+        }
+    match = MEDICAL_ALERT_RE.match(note)
+    if match:
+        return "medical_alert", {
+            "drug_allergies": match["allergies"], "conditions": match["conditions"],
+            "medications": match["medications"]
+        }
+    match = ACCESS_GRANT_RE.match(note)
+    if match:
+        return "access_grant", {
+            "recipient_name": match["name"], "recipient_type": match["type"], "access_level": match["level"],
+            "duration": match["duration"], "reason": match["reason"]
+        }
+    return None
+
+
+def backfill_event_tables(data_manager):
+    """Copy event-style health record notes into the typed event tables.
+
+    Rows already copied (matched by source_record_id) are skipped, so this is safe to re-run.
+    The original health records are left untouched. Returns a dict of event kind -> rows added.
+    """
+    storage = data_manager.storage
+    records = storage.read_table("health_records")
+    records = records[records["notes"].notna() & (records["notes"] != "")]
+    done = {
+        kind: set(storage.read_table(table)["source_record_id"].dropna())
+        for kind, table in EVENT_TABLES.items()
+    }
+    events = {kind: [] for kind in EVENT_TABLES}
+    for record in records.to_dict("records"):
+        parsed = parse_note(record["notes"], record)
+        if parsed is None:
+            continue
+        kind, fields = parsed
+        if record["record_id"] in done[kind]:
+            continue
+        events[kind].append({
+            "event_id": str(uuid.uuid4()),
+            "user_id": record["user_id"],
+            "date": record["date"] if pd.notna(record["date"]) else None,
+            "source_record_id": record["record_id"],
+            **fields
+        })
+    for kind, rows in events.items():
+        storage.append_rows(EVENT_TABLES[kind], rows)
+    data_manager.flush()
+    return {kind: len(rows) for kind, rows in events.items()}
+
+
+if __name__ == "__main__":
+    # One-shot backfill: python -m utils.event_backfill
+    from utils.data_manager import DataManager
+
+    for kind, count in backfill_event_tables(DataManager()).items():
+        print(f"{EVENT_TABLES[kind]}: {count} rows added")
@@ -1,33 +1,504 @@
+import os
+import re
+import json
+import time
+import heapq
+import random
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from concurrent.futures import Future
 import streamlit as st
 import google.generativeai as genai
 
-def get_gemini_response(prompt: str):
+DEFAULT_MODEL = "gemini-1.5-flash"
+DEFAULT_TIMEOUT = 60
+CACHE_PATH = os.path.join("data", "gemini_cache.db")
+# Least recently used responses are evicted once the cache holds more than this
+CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+# Client-side quota: requests per minute and burst size (set GEMINI_RPM to the project's quota)
+RATE_LIMIT_RPM = float(os.environ.get("GEMINI_RPM", 15))
+RATE_LIMIT_BURST = int(os.environ.get("GEMINI_BURST", 5))
+# Callers waiting for quota beyond this many (lowest priority first), or for longer than QUEUE_TIMEOUT seconds, are turned away
+QUEUE_MAX = 32
+QUEUE_TIMEOUT = 60
+# Retries on 429/5xx with full-jitter exponential backoff: uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 20.0
+DEFAULT_PRIORITY = 1
+
+# Per-call-site settings. cache_ttl: seconds a response is reused for the same prompt
+# (None: never cached, e.g. personal mental health messages). priority: lower values get
+# quota first when callers are queued.
+CALL_SITES = {
+    "hospital_lookup": {"cache_ttl": 7 * 24 * 3600, "priority": 0},
+    "hospital_assistant": {"cache_ttl": 24 * 3600, "priority": 0},
+    "health_qa": {"cache_ttl": 24 * 3600, "priority": 2},
+    "stress_coach": {"cache_ttl": None, "priority": 1}
+}
+
+
+class RateLimitExceeded(Exception):
+    """Raised when the wait queue for Gemini quota is full or a caller waited too long"""
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every call on one API key, with a bounded priority wait queue.
+
+    Tokens refill at rate_per_minute up to burst. Callers that find the bucket empty wait
+    in a heap ordered by (priority, arrival), so emergency lookups are served before
+    education questions, and are turned away once their wait times out. When the queue is
+    full a newcomer that outranks the last waiter in line takes its place; otherwise the
+    newcomer is turned away.
+    """
+
+    def __init__(self, rate_per_minute=RATE_LIMIT_RPM, burst=RATE_LIMIT_BURST, max_queue=QUEUE_MAX,
+                 queue_timeout=QUEUE_TIMEOUT):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiters = []
+        # Waiters pushed out of a full queue by a higher-priority caller; they raise when they wake
+        self._evicted = set()
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._stats = {"admitted": 0, "rejected": 0, "retries": 0, "total_wait": 0.0, "max_wait": 0.0,
+                       "max_queue_depth": 0}
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority=DEFAULT_PRIORITY):
+        """Block until a token is available for this caller; raises RateLimitExceeded if it can't wait"""
+        start = time.monotonic()
+        deadline = start + self.queue_timeout
+        with self._cond:
+            self._seq += 1
+            entry = (priority, self._seq)
+            if len(self._waiters) >= self.max_queue:
+                last = max(self._waiters)
+                if entry > last:
+                    self._stats["rejected"] += 1
+                    raise RateLimitExceeded("Too many requests are waiting for the Gemini API")
+                self._waiters.remove(last)
+                heapq.heapify(self._waiters)
+                self._evicted.add(last)
+                self._cond.notify_all()
+            heapq.heappush(self._waiters, entry)
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], len(self._waiters))
+            try:
+                while True:
+                    if entry in self._evicted:
+                        self._evicted.remove(entry)
+                        self._stats["rejected"] += 1
+                        raise RateLimitExceeded("Too many requests are waiting for the Gemini API")
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] == entry and self._tokens >= 1:
+                        heapq.heappop(self._waiters)
+                        self._tokens -= 1
+                        waited = now - start
+                        self._stats["admitted"] += 1
+                        self._stats["total_wait"] += waited
+                        self._stats["max_wait"] = max(self._stats["max_wait"], waited)
+                        return waited
+                    if now >= deadline:
+                        self._waiters.remove(entry)
+                        heapq.heapify(self._waiters)
+                        self._stats["rejected"] += 1
+                        raise RateLimitExceeded("Timed out waiting for the Gemini API rate limit")
+                    # The head sleeps until its token is due; the others until notified or timed out
+                    wait = deadline - now
+                    if self._waiters[0] == entry:
+                        wait = min(wait, (1 - self._tokens) / self.rate)
+                    self._cond.wait(wait)
+            finally:
+                # Let the next caller in line re-check
+                self._cond.notify_all()
+
+    def record_retry(self):
+        with self._cond:
+            self._stats["retries"] += 1
+
+    def stats(self):
+        """Current queue depth and tokens, plus admitted/rejected/retry counts and wait times in seconds"""
+        with self._cond:
+            self._refill(time.monotonic())
+            stats = dict(self._stats)
+            depth, tokens = len(self._waiters), self._tokens
+        total_wait = stats.pop("total_wait")
+        return {**stats, "queue_depth": depth, "tokens": tokens,
+                "avg_wait": total_wait / stats["admitted"] if stats["admitted"] else 0.0}
+
+
+def retry_delay(error, attempt):
+    """Backoff in seconds before retrying after error, or None if it shouldn't be retried"""
+    # google.api_core errors carry the HTTP status as .code (429 quota, 5xx server errors)
+    code = getattr(error, "code", None)
+    if attempt >= MAX_RETRIES or not isinstance(code, int) or not (code == 429 or 500 <= code < 600):
+        return None
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+class GeminiClient:
+    """
+    Long-lived Gemini client shared by every page and session.
+
+    The API key is configured once, so the library keeps one warm transport (gRPC channel)
+    and reuses its connections; GenerativeModel objects are built once per model name.
+    """
+
+    def __init__(self, api_key):
+        genai.configure(api_key=api_key)
+        self._models = {}
+        self._lock = threading.Lock()
+        # The quota belongs to the key, so every call through this client shares one limiter
+        self.limiter = RateLimiter()
+
+    def model(self, model_name=DEFAULT_MODEL):
+        """Return the cached GenerativeModel for a model name"""
+        with self._lock:
+            if model_name not in self._models:
+                self._models[model_name] = genai.GenerativeModel(model_name)
+            return self._models[model_name]
+
+    def generate(self, prompt, model_name=DEFAULT_MODEL, temperature=None, timeout=DEFAULT_TIMEOUT,
+                 priority=DEFAULT_PRIORITY):
+        """Send one prompt within the rate limit and return the response text, retrying on 429/5xx"""
+        generation_config = {"temperature": temperature} if temperature is not None else None
+        attempt = 0
+        while True:
+            self.limiter.acquire(priority)
+            try:
+                response = self.model(model_name).generate_content(
+                    prompt, generation_config=generation_config, request_options={"timeout": timeout}
+                )
+                return response.text
+            except Exception as e:
+                delay = retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            self.limiter.record_retry()
+            time.sleep(delay)
+            attempt += 1
+
+    def stream(self, prompt, model_name=DEFAULT_MODEL, temperature=None, timeout=DEFAULT_TIMEOUT,
+               priority=DEFAULT_PRIORITY):
+        """Send one prompt within the rate limit and yield the response text chunk by chunk as it arrives.
+
+        A failed request is retried only if nothing has been yielded yet.
+        """
+        generation_config = {"temperature": temperature} if temperature is not None else None
+        attempt = 0
+        while True:
+            self.limiter.acquire(priority)
+            started = False
+            try:
+                response = self.model(model_name).generate_content(
+                    prompt, generation_config=generation_config, request_options={"timeout": timeout}, stream=True
+                )
+                for chunk in response:
+                    if chunk.text:
+                        started = True
+                        yield chunk.text
+                return
+            except Exception as e:
+                delay = None if started else retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            self.limiter.record_retry()
+            time.sleep(delay)
+            attempt += 1
+
+
+def cache_key(prompt, model_name=DEFAULT_MODEL, temperature=None):
+    """Key for a prompt and its model parameters; case and whitespace differences don't matter"""
+    normalized = re.sub(r"\s+", " ", unicodedata.normalize("NFC", prompt)).strip().casefold()
+    payload = json.dumps({"prompt": normalized, "model": model_name, "temperature": temperature}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Disk-backed Gemini response cache in SQLite with per-entry TTLs and LRU eviction by size.
+
+    Entries survive restarts and are shared by every session. Hit/miss/eviction counters
+    are kept in memory for the process.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT, size INTEGER, "
+                "expires REAL, last_access REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, stat, n=1):
+        with self._lock:
+            self._stats[stat] += n
+
+    def get(self, key):
+        """Return the cached response, or None if missing or expired"""
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute("SELECT response, expires FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] <= now:
+            self._count("misses")
+            if row is not None:
+                self._count("expired")
+                with conn:
+                    conn.execute("DELETE FROM responses WHERE key = ? AND expires <= ?", (key, now))
+            return None
+        with conn:
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        self._count("hits")
+        return row[0]
+
+    def put(self, key, response, ttl):
+        """Store a response for ttl seconds, then evict expired and least recently used entries over max_bytes"""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, response, len(response.encode("utf-8")), now + ttl, now)
+            )
+            conn.execute("DELETE FROM responses WHERE expires <= ?", (now,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                evicted = []
+                for old_key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+                    if total <= self.max_bytes:
+                        break
+                    evicted.append((old_key,))
+                    total -= size
+                conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+                self._count("evictions", len(evicted))
+
+    def delete(self, key):
+        """Drop one entry, e.g. a response the caller couldn't use"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def stats(self):
+        """Hit/miss/eviction counters, hit rate, and the entries and bytes currently stored"""
+        entries, size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        return {**stats, "hit_rate": stats["hits"] / lookups if lookups else 0.0, "entries": entries, "bytes": size}
+
+
+class SingleFlight:
+    """
+    Coalesces identical requests that are in flight at the same time.
+
+    The first caller for a key becomes the leader and makes the request; callers that
+    arrive before it finishes wait for the leader's Future and share its result or error.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def begin(self, key):
+        """Return (future, is_leader) for a key; the leader must call finish()"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def finish(self, key, future, result=None, error=None):
+        """Publish the leader's result (or error) to the waiting callers"""
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if error is not None:
+            if not isinstance(error, Exception):
+                # The leader's script was stopped or rerun; don't stop the waiters' scripts too
+                error = RuntimeError("The shared Gemini request was interrupted")
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn, timeout=None):
+        """Run fn() once for all concurrent callers with this key and return its result"""
+        future, leader = self.begin(key)
+        if not leader:
+            return future.result(timeout=timeout)
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+        self.finish(key, future, result=result)
+        return result
+
+
+@st.cache_resource
+def get_single_flight():
+    """Return the process-wide registry of in-flight Gemini requests"""
+    return SingleFlight()
+
+
+@st.cache_resource
+def get_response_cache():
+    """Return the process-wide response cache"""
+    return ResponseCache()
+
+
+@st.cache_resource
+def _client_for_key(api_key):
+    return GeminiClient(api_key)
+
+
+def get_gemini_client():
+    """Return the shared client for the configured API key, or None if no key is set"""
+    api_key = st.secrets.get("GEMINI_API_KEY")
+    if not api_key:
+        return None
+    return _client_for_key(api_key)
+
+
+def get_gemini_response(prompt: str, model_name=DEFAULT_MODEL, temperature=None, timeout=DEFAULT_TIMEOUT,
+                        call_site=None):
     """
     Sends a prompt to the Gemini API and returns the response.
 
     Args:
         prompt (str): The text prompt to send to the model.
+        model_name (str): The Gemini model to use.
+        temperature (float): Sampling temperature; None uses the model default.
+        timeout (float): Seconds to wait for the response.
+        call_site (str): Key in CALL_SITES; sites with a cache_ttl reuse responses to the same prompt.
 
     Returns:
         str: The generated text response from the model.
     """
     try:
-        # Configure the Gemini API with the key from st.secrets
-        # This will work both locally and when deployed.
-        api_key = st.secrets.get("GEMINI_API_KEY")
-        if not api_key:
+        # The key comes from st.secrets, which works both locally and when deployed.
+        client = get_gemini_client()
+        if client is None:
             return "Error: Gemini API key not found. Please configure it in your secrets."
-            
-        genai.configure(api_key=api_key)
-        
-        # Create the model
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
-        # Generate content
-        response = model.generate_content(prompt)
-        
-        return response.text
 
+        settings = CALL_SITES.get(call_site, {})
+        ttl = settings.get("cache_ttl")
+        key = cache_key(prompt, model_name, temperature)
+        if ttl:
+            response = get_response_cache().get(key)
+            if response is not None:
+                return response
+
+        def fetch():
+            response = client.generate(prompt, model_name=model_name, temperature=temperature, timeout=timeout,
+                                       priority=settings.get("priority", DEFAULT_PRIORITY))
+            if ttl:
+                get_response_cache().put(key, response, ttl)
+            return response
+
+        # Concurrent callers with the same prompt share one upstream request
+        return get_single_flight().do(key, fetch)
+
+    except RateLimitExceeded:
+        st.warning("The AI assistant is busy right now. Please try again in a minute.")
+        return "Sorry, I am unable to process your request at the moment."
     except Exception as e:
         st.error(f"An error occurred with the Gemini API: {e}")
         return "Sorry, I am unable to process your request at the moment."
+
+
+def stream_gemini_response(prompt: str, model_name=DEFAULT_MODEL, temperature=None, timeout=DEFAULT_TIMEOUT,
+                           call_site=None):
+    """
+    Streaming variant of get_gemini_response for st.write_stream: yields the answer in chunks as they arrive.
+
+    A cached answer is yielded in one piece; a streamed answer is cached once it completes.
+    Callers asking the same question while it streams wait for it and get the full answer.
+    """
+    try:
+        client = get_gemini_client()
+        if client is None:
+            yield "Error: Gemini API key not found. Please configure it in your secrets."
+            return
+
+        settings = CALL_SITES.get(call_site, {})
+        ttl = settings.get("cache_ttl")
+        key = cache_key(prompt, model_name, temperature)
+        if ttl:
+            cached = get_response_cache().get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        flights = get_single_flight()
+        future, leader = flights.begin(key)
+        if not leader:
+            yield future.result()
+            return
+
+        chunks = []
+        try:
+            for text in client.stream(prompt, model_name=model_name, temperature=temperature, timeout=timeout,
+                                      priority=settings.get("priority", DEFAULT_PRIORITY)):
+                chunks.append(text)
+                yield text
+        except BaseException as e:
+            # Includes GeneratorExit when the page stops reading, so waiters are never left hanging
+            flights.finish(key, future, error=e)
+            raise
+        response = "".join(chunks)
+        if ttl:
+            get_response_cache().put(key, response, ttl)
+        flights.finish(key, future, result=response)
+
+    except RateLimitExceeded:
+        st.warning("The AI assistant is busy right now. Please try again in a minute.")
+        yield "Sorry, I am unable to process your request at the moment."
+    except Exception as e:
+        st.error(f"An error occurred with the Gemini API: {e}")
+        yield "Sorry, I am unable to process your request at the moment."
+
+
+def forget_gemini_response(prompt: str, model_name=DEFAULT_MODEL, temperature=None):
+    """Remove a cached response so the next call asks Gemini again (e.g. when it couldn't be parsed)"""
+    get_response_cache().delete(cache_key(prompt, model_name, temperature))
+
+
+def get_gemini_cache_stats():
+    """Return the response cache's hit/miss/eviction counters and size, and how many calls shared an in-flight request"""
+    return {**get_response_cache().stats(), "coalesced": get_single_flight().coalesced}
+
+
+def get_gemini_rate_stats():
+    """Return the rate limiter's queue depth, wait times and admitted/rejected/retry counts"""
+    client = get_gemini_client()
+    return client.limiter.stats() if client is not None else {}
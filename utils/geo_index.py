@@ -0,0 +1,146 @@
+import os
+import math
+import threading
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# Search origin and map centre until the user sets their location (New Delhi)
+DEFAULT_LOCATION = (28.6139, 77.2090)
+
+
+def haversine_km(lat, lon, latitudes, longitudes):
+    """Great-circle distances in km from a point (or array of points) to arrays of points, broadcasting like NumPy"""
+    lat1 = np.radians(np.asarray(lat, dtype="float64"))
+    lon1 = np.radians(np.asarray(lon, dtype="float64"))
+    lat2 = np.radians(np.asarray(latitudes, dtype="float64"))
+    lon2 = np.radians(np.asarray(longitudes, dtype="float64"))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class GeoIndex:
+    """Grid index over lat/lon points for within-radius and k-nearest queries.
+
+    Points are bucketed into fixed-size degree cells, like a geohash prefix. A query only
+    measures the points in the cells its bounding box overlaps, with one vectorised
+    haversine pass, so it never scans the whole set unless the radius covers most cells.
+    """
+
+    def __init__(self, latitudes, longitudes, cell_deg=0.05):
+        self.latitudes = np.asarray(latitudes, dtype="float64")
+        self.longitudes = np.asarray(longitudes, dtype="float64")
+        self.cell_deg = cell_deg
+        self.lon_cells = int(math.ceil(360 / cell_deg))
+        self.valid = np.flatnonzero(
+            np.isfinite(self.latitudes) & np.isfinite(self.longitudes)
+            & (np.abs(self.latitudes) <= 90) & (np.abs(self.longitudes) <= 180)
+        )
+        keys = self._cell_rows(self.latitudes[self.valid]) * self.lon_cells + self._cell_cols(self.longitudes[self.valid])
+        order = np.argsort(keys, kind="stable")
+        keys, positions = keys[order], self.valid[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype="int64")
+        self.cells = {int(keys[start]): chunk for start, chunk in zip(starts, np.split(positions, starts[1:]))}
+
+    def __len__(self):
+        return len(self.valid)
+
+    def _cell_rows(self, latitudes):
+        return np.floor((np.asarray(latitudes) + 90) / self.cell_deg).astype("int64")
+
+    def _cell_cols(self, longitudes):
+        return np.floor((np.asarray(longitudes) + 180) / self.cell_deg).astype("int64") % self.lon_cells
+
+    def _candidates(self, lat, lon, radius_km):
+        """Positions of the points in the cells overlapping the circle's bounding box"""
+        angle = radius_km / EARTH_RADIUS_KM
+        lat_low, lat_high = lat - math.degrees(angle), lat + math.degrees(angle)
+        row_low, row_high = (int(r) for r in self._cell_rows([max(lat_low, -90), min(lat_high, 90)]))
+        cos_lat = math.cos(math.radians(lat))
+        if lat_low <= -90 or lat_high >= 90 or cos_lat <= 0 or math.sin(angle) >= cos_lat:
+            # The circle reaches a pole, so it spans every longitude
+            cols = range(self.lon_cells)
+        else:
+            # Widest longitude span of a spherical cap centred at this latitude
+            spread = math.degrees(math.asin(math.sin(angle) / cos_lat))
+            first = int(math.floor((lon - spread + 180) / self.cell_deg))
+            last = int(math.floor((lon + spread + 180) / self.cell_deg))
+            cols = range(first, min(last, first + self.lon_cells - 1) + 1)
+        if (row_high - row_low + 1) * len(cols) >= len(self.cells):
+            # Fewer occupied cells than cells in the box: checking every point is cheaper
+            return self.valid
+        found = [
+            self.cells[key]
+            for row in range(row_low, row_high + 1)
+            for key in (row * self.lon_cells + col % self.lon_cells for col in cols)
+            if key in self.cells
+        ]
+        return np.concatenate(found) if found else np.array([], dtype="int64")
+
+    def within(self, lat, lon, radius_km):
+        """Return (positions, distances in km) of the points within radius_km, nearest first"""
+        candidates = self._candidates(lat, lon, radius_km)
+        distances = haversine_km(lat, lon, self.latitudes[candidates], self.longitudes[candidates])
+        keep = distances <= radius_km
+        candidates, distances = candidates[keep], distances[keep]
+        order = np.argsort(distances, kind="stable")
+        return candidates[order], distances[order]
+
+    def nearest(self, lat, lon, k, radius_km=None):
+        """Return (positions, distances in km) of the k closest points, optionally only within radius_km"""
+        limit = math.pi * EARTH_RADIUS_KM if radius_km is None else radius_km
+        radius = min(self.cell_deg * KM_PER_DEGREE, limit)
+        while True:
+            positions, distances = self.within(lat, lon, radius)
+            # Everything outside the searched circle is farther than everything in it
+            if len(positions) >= k or radius >= limit:
+                return positions[:k], distances[:k]
+            radius = min(radius * 4, limit)
+
+
+def nearby(df, lat, lon, k=None, radius_km=None, index=None):
+    """Rows of df (with latitude/longitude columns) ranked by distance, with a distance_km column.
+
+    Returns the k nearest, everything within radius_km, or both limits combined. Rows
+    without coordinates are left out. Pass a prebuilt GeoIndex over df to reuse it.
+    """
+    if index is None:
+        index = GeoIndex(df["latitude"], df["longitude"])
+    if k is None:
+        positions, distances = index.within(lat, lon, math.pi * EARTH_RADIUS_KM if radius_km is None else radius_km)
+    else:
+        positions, distances = index.nearest(lat, lon, k, radius_km)
+    rows = df.iloc[positions].copy()
+    rows["distance_km"] = distances
+    return rows
+
+
+class PlaceIndex:
+    """GeoIndexes over the tables with coordinates (facilities and blood donors).
+
+    Each table's index is built on first query and dropped whenever the DataManager
+    writes to the table. Like the other in-memory indexes it is shared by every
+    DataManager over the same storage in the process.
+    """
+
+    _indexes = {}
+    _lock = threading.RLock()
+
+    def __init__(self, source):
+        self.source = os.path.abspath(source)
+
+    def query(self, table, load, lat, lon, k=None, radius_km=None):
+        """Rank a table's rows by distance from (lat, lon), building its index with load() -> DataFrame on first use"""
+        key = (self.source, table)
+        with PlaceIndex._lock:
+            if key not in PlaceIndex._indexes:
+                df = load()
+                df = df[df["latitude"].notna() & df["longitude"].notna()].reset_index(drop=True)
+                PlaceIndex._indexes[key] = (df, GeoIndex(df["latitude"], df["longitude"]))
+            df, index = PlaceIndex._indexes[key]
+        return nearby(df, lat, lon, k=k, radius_km=radius_km, index=index)
+
+    def invalidate(self, table):
+        """Drop a table's index so it is rebuilt on next query"""
+        with PlaceIndex._lock:
+            PlaceIndex._indexes.pop((self.source, table), None)
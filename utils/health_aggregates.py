@@ -0,0 +1,131 @@
+import os
+import threading
+import pandas as pd
+
+VITALS = ["heart_rate", "weight", "height", "temperature"]
+
+
+def _empty_summary():
+    return {
+        "record_count": 0,
+        "last_update": None,
+        "dates": set(),
+        "vitals": {col: {"count": 0, "sum": 0.0, "min": None, "max": None} for col in VITALS},
+        "first_weight": None, "first_weight_date": None,
+        "last_weight": None, "last_weight_date": None
+    }
+
+
+def summarize(records):
+    """Build a user's summary from their health records in one vectorised pass"""
+    summary = _empty_summary()
+    if records.empty:
+        return summary
+    dates = pd.to_datetime(records["date"], errors="coerce")
+    summary["record_count"] = len(records)
+    summary["last_update"] = dates.max() if dates.notna().any() else None
+    summary["dates"] = set(dates.dropna().dt.normalize())
+    for col in VITALS:
+        values = pd.to_numeric(records[col], errors="coerce").astype("float64")
+        present = values.dropna()
+        if not present.empty:
+            summary["vitals"][col] = {
+                "count": len(present), "sum": float(present.sum()),
+                "min": float(present.min()), "max": float(present.max())
+            }
+    weights = pd.DataFrame({"date": dates, "weight": pd.to_numeric(records["weight"], errors="coerce")})
+    weights = weights.dropna().sort_values("date", kind="stable")
+    if not weights.empty:
+        summary["first_weight"], summary["first_weight_date"] = float(weights["weight"].iloc[0]), weights["date"].iloc[0]
+        summary["last_weight"], summary["last_weight_date"] = float(weights["weight"].iloc[-1]), weights["date"].iloc[-1]
+    return summary
+
+
+class HealthAggregates:
+    """Running per-user health record summaries: counts, last update, days tracked,
+    mean/min/max per vital and first/last weight.
+
+    A user's summary is built once from their records and then updated in O(1) for
+    every record added through the DataManager. Summaries are shared by every
+    DataManager over the same storage in the process, like the parsed-file cache, and
+    each user's summary has its own lock, so one user's rebuild never blocks another.
+    Records are only ever appended, so a summary whose record count no longer matches
+    storage (another process added records, or a rebuild already saw a record that
+    add() then counted again) is rebuilt on read.
+    """
+
+    _summaries = {}
+    _locks = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, source):
+        self.source = os.path.abspath(source)
+
+    def _user_lock(self, key):
+        with HealthAggregates._locks_guard:
+            return HealthAggregates._locks.setdefault(key, threading.RLock())
+
+    def get(self, user_id, load, count):
+        """Return the user's summary, building it with load(user_id) -> DataFrame on first use.
+
+        count(user_id) -> number of stored records; a summary that disagrees with it is rebuilt.
+        """
+        key = (self.source, user_id)
+        with self._user_lock(key):
+            summary = HealthAggregates._summaries.get(key)
+            if summary is None or summary["record_count"] != count(user_id):
+                summary = HealthAggregates._summaries[key] = summarize(load(user_id))
+            return self._public(summary)
+
+    def add(self, user_id, record):
+        """Fold one record, already written to storage, into the user's summary if it has been built"""
+        key = (self.source, user_id)
+        with self._user_lock(key):
+            summary = HealthAggregates._summaries.get(key)
+            if summary is None:
+                # Built from storage (including this record) on first read
+                return
+            day = pd.Timestamp(record["date"]).normalize()
+            summary["record_count"] += 1
+            if summary["last_update"] is None or day > summary["last_update"]:
+                summary["last_update"] = day
+            summary["dates"].add(day)
+            for col in VITALS:
+                value = pd.to_numeric(record.get(col), errors="coerce")
+                if value is None or pd.isna(value):
+                    continue
+                value = float(value)
+                stats = summary["vitals"][col]
+                stats["count"] += 1
+                stats["sum"] += value
+                stats["min"] = value if stats["min"] is None else min(stats["min"], value)
+                stats["max"] = value if stats["max"] is None else max(stats["max"], value)
+                if col == "weight":
+                    if summary["first_weight_date"] is None or day < summary["first_weight_date"]:
+                        summary["first_weight"], summary["first_weight_date"] = value, day
+                    if summary["last_weight_date"] is None or day >= summary["last_weight_date"]:
+                        summary["last_weight"], summary["last_weight_date"] = value, day
+
+    def invalidate(self, user_ids):
+        """Drop summaries so they are rebuilt on next read (e.g. after a bulk import)"""
+        for user_id in user_ids:
+            with self._user_lock((self.source, user_id)):
+                HealthAggregates._summaries.pop((self.source, user_id), None)
+
+    def _public(self, summary):
+        vitals = {}
+        for col, stats in summary["vitals"].items():
+            vitals[col] = {
+                "count": stats["count"],
+                "mean": stats["sum"] / stats["count"] if stats["count"] else None,
+                "min": stats["min"],
+                "max": stats["max"]
+            }
+        return {
+            "record_count": summary["record_count"],
+            "last_update": summary["last_update"],
+            "days_tracked": len(summary["dates"]),
+            "vitals": vitals,
+            "first_weight": summary["first_weight"],
+            "last_weight": summary["last_weight"]
+        }
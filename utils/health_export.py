@@ -0,0 +1,169 @@
+import io
+import json
+import uuid
+import pandas as pd
+
+EXPORT_COLUMNS = ["record_id", "date", "heart_rate", "blood_pressure", "weight", "height", "temperature", "notes"]
+# Free text that may hold mental health or other sensitive details; left out unless the user asks for it
+SENSITIVE_COLUMNS = ["notes"]
+# Vitals are stored as float32; rounding drops the float32 -> float64 noise (72.30000305175781)
+FLOAT_DECIMALS = 2
+
+# LOINC codes and UCUM units for the vitals kept in health_records
+FHIR_VITALS = {
+    "heart_rate": ("8867-4", "Heart rate", "/min"),
+    "weight": ("29463-7", "Body weight", "kg"),
+    "height": ("8302-2", "Body height", "cm"),
+    "temperature": ("8310-5", "Body temperature", "[degF]")
+}
+FHIR_BLOOD_PRESSURE = ("85354-9", "Blood pressure panel")
+FHIR_BP_COMPONENTS = [("8480-6", "Systolic blood pressure"), ("8462-4", "Diastolic blood pressure")]
+
+
+def export_columns(include_sensitive=True):
+    """Columns written to an export"""
+    return [col for col in EXPORT_COLUMNS if include_sensitive or col not in SENSITIVE_COLUMNS]
+
+
+def _frame(chunk, columns):
+    """Select the export columns with ISO dates and rounded vitals"""
+    out = chunk[columns].copy()
+    out["date"] = pd.to_datetime(out["date"]).dt.strftime("%Y-%m-%d")
+    for col in out.columns:
+        if pd.api.types.is_float_dtype(out[col]):
+            out[col] = out[col].astype("float64").round(FLOAT_DECIMALS)
+    return out
+
+
+def _rows(chunk, columns=EXPORT_COLUMNS):
+    """Turn a health record chunk into JSON-ready dicts (ISO dates, Python floats, no NaN)"""
+    out = _frame(chunk, columns)
+    out = out.astype(object).where(out.notna(), None)
+    return out.to_dict("records")
+
+
+def stream_csv(chunks, columns=EXPORT_COLUMNS):
+    """Yield a CSV export: the header, then one block of lines per chunk"""
+    yield (",".join(columns) + "\n").encode("utf-8")
+    for chunk in chunks:
+        yield _frame(chunk, columns).to_csv(index=False, header=False, lineterminator="\n").encode("utf-8")
+
+
+def stream_ndjson(chunks, columns=EXPORT_COLUMNS):
+    """Yield one JSON object per line per record"""
+    for chunk in chunks:
+        yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in _rows(chunk, columns)).encode("utf-8")
+
+
+def _quantity(value, unit):
+    return {"value": round(float(value), 2), "unit": unit, "system": "http://unitsofmeasure.org", "code": unit}
+
+
+def _concept(code, display):
+    return {"coding": [{"system": "http://loinc.org", "code": code, "display": display}], "text": display}
+
+
+def fhir_observations(row, user_id):
+    """Build the FHIR vital-signs Observations for one health record"""
+    base = {
+        "resourceType": "Observation",
+        "status": "final",
+        "category": [{"coding": [{
+            "system": "http://terminology.hl7.org/CodeSystem/observation-category", "code": "vital-signs"
+        }]}],
+        "subject": {"reference": f"Patient/{user_id}"},
+        "effectiveDateTime": row["date"]
+    }
+    if row.get("notes"):
+        base["note"] = [{"text": row["notes"]}]
+    observations = []
+    for col, (code, display, unit) in FHIR_VITALS.items():
+        if row[col] is not None:
+            observations.append({
+                **base, "id": f"{row['record_id']}-{col}", "code": _concept(code, display),
+                "valueQuantity": _quantity(row[col], unit)
+            })
+    systolic, _, diastolic = str(row["blood_pressure"] or "").partition("/")
+    if systolic.isdigit() and diastolic.isdigit():
+        observations.append({
+            **base, "id": f"{row['record_id']}-blood_pressure", "code": _concept(*FHIR_BLOOD_PRESSURE),
+            "component": [
+                {"code": _concept(code, display), "valueQuantity": _quantity(value, "mm[Hg]")}
+                for (code, display), value in zip(FHIR_BP_COMPONENTS, (systolic, diastolic))
+            ]
+        })
+    return observations
+
+
+def stream_fhir_bundle(chunks, user_id, columns=EXPORT_COLUMNS):
+    """Yield a FHIR R4 collection Bundle of vital-sign Observations, one chunk of entries at a time"""
+    yield b'{"resourceType": "Bundle", "type": "collection", "entry": ['
+    first = True
+    for chunk in chunks:
+        entries = []
+        for row in _rows(chunk, columns):
+            for observation in fhir_observations(row, user_id):
+                entries.append(json.dumps({
+                    "fullUrl": f"urn:uuid:{uuid.uuid5(uuid.NAMESPACE_URL, observation['id'])}", "resource": observation
+                }, ensure_ascii=False))
+        if entries:
+            yield (("" if first else ",") + ",".join(entries)).encode("utf-8")
+            first = False
+    yield b"]}"
+
+
+class GeneratorReader(io.RawIOBase):
+    """Read-only file object over a generator of byte blocks, pulled as the reader asks for data"""
+
+    def __init__(self, blocks):
+        self._blocks = iter(blocks)
+        self._buffer = b""
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer:
+            try:
+                self._buffer = next(self._blocks)
+            except StopIteration:
+                return 0
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        self._position += n
+        return n
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        # Consumers like st.download_button rewind before reading; that is only possible before the first read
+        if whence == io.SEEK_SET and offset == self._position == 0:
+            return 0
+        raise io.UnsupportedOperation("stream is not seekable")
+
+
+# format name -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "csv": ("csv", "text/csv"),
+    "ndjson": ("ndjson", "application/x-ndjson"),
+    "fhir": ("json", "application/fhir+json")
+}
+
+
+def export_health_records(data_manager, user_id, fmt, start_date=None, end_date=None, include_sensitive=True):
+    """Return a file object streaming a user's health records in [start_date, end_date] as csv, ndjson or fhir.
+
+    With include_sensitive=False the free-text notes are left out.
+    """
+    chunks = data_manager.iter_user_health_records(user_id, start_date, end_date)
+    columns = export_columns(include_sensitive)
+    if fmt == "csv":
+        return GeneratorReader(stream_csv(chunks, columns))
+    if fmt == "ndjson":
+        return GeneratorReader(stream_ndjson(chunks, columns))
+    if fmt == "fhir":
+        return GeneratorReader(stream_fhir_bundle(chunks, user_id, columns))
+    raise ValueError(f"Unknown export format: {fmt!r}")
@@ -0,0 +1,17 @@
+import streamlit as st
+from utils.geo_index import DEFAULT_LOCATION
+
+
+def get_user_location(key):
+    """Latitude/longitude inputs for the user's position, remembered across the locator pages.
+
+    key keeps the inputs apart when a page shows them more than once.
+    """
+    default_lat, default_lon = st.session_state.get("user_location", DEFAULT_LOCATION)
+    col_lat, col_lon = st.columns(2)
+    with col_lat:
+        latitude = st.number_input("📍 Your Latitude", -90.0, 90.0, float(default_lat), format="%.4f", key=f"{key}_latitude")
+    with col_lon:
+        longitude = st.number_input("📍 Your Longitude", -180.0, 180.0, float(default_lon), format="%.4f", key=f"{key}_longitude")
+    st.session_state.user_location = (latitude, longitude)
+    return latitude, longitude
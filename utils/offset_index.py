@@ -0,0 +1,209 @@
+import pandas as pd
+import os
+import io
+import csv
+import threading
+from collections import defaultdict
+
+INDEX_VERSION = "healthtech-offset-index-v1"
+
+
+class OffsetIndex:
+    """Persistent key -> byte range index for the rows of a CSV file.
+
+    The sidecar file (``<csv>.idx``) holds one ``key<TAB>start<TAB>end`` line per row
+    and is appended to alongside the CSV, so a single key's rows can be read by
+    seeking straight to them instead of parsing the whole file.
+    """
+
+    # One index per file in the process, shared by every storage instance
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    @classmethod
+    def for_file(cls, csv_path, column, fsync_policy="none"):
+        """Return the shared index for a CSV file, loading or building it on first use"""
+        key = (os.path.abspath(csv_path), column)
+        with cls._registry_lock:
+            if key not in cls._registry:
+                cls._registry[key] = cls(csv_path, column, fsync_policy)
+            return cls._registry[key]
+
+    def __init__(self, csv_path, column, fsync_policy="none"):
+        self.csv_path = csv_path
+        self.column = column
+        self.index_path = f"{csv_path}.idx"
+        self.fsync_policy = fsync_policy
+        self._lock = threading.RLock()
+        self._offsets = defaultdict(list)
+        self._header = b""
+        self._covered = 0
+        self._load()
+
+    def _read_header(self):
+        """Read the CSV header record and locate the indexed column"""
+        with open(self.csv_path, "rb") as f:
+            self._header = f.readline()
+        header = next(csv.reader(io.StringIO(self._header.decode("utf-8"))))
+        self._column_pos = header.index(self.column)
+
+    def _scan(self, start):
+        """Yield (key, start, end) for every complete row from a byte offset to EOF.
+
+        Rows are split on newlines outside quotes, so notes with embedded newlines stay whole.
+        """
+        with open(self.csv_path, "rb") as f:
+            f.seek(start)
+            row_start, record, quotes = start, b"", 0
+            for line in f:
+                record += line
+                quotes += line.count(b'"')
+                if quotes % 2 or not line.endswith(b"\n"):
+                    continue
+                row_end = row_start + len(record)
+                if record.strip():
+                    fields = next(csv.reader(io.StringIO(record.decode("utf-8"))))
+                    yield fields[self._column_pos], row_start, row_end
+                row_start, record, quotes = row_end, b"", 0
+
+    def _sync(self, f):
+        f.flush()
+        if self.fsync_policy == "always":
+            os.fsync(f.fileno())
+
+    def _load(self):
+        """Load the sidecar, rebuilding it if missing or stale and catching up on unindexed rows"""
+        self._read_header()
+        size = os.path.getsize(self.csv_path)
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                if f.readline().strip() != f"{INDEX_VERSION}\t{self.column}":
+                    raise ValueError("index version mismatch")
+                covered = len(self._header)
+                for line in f:
+                    key, start, end = line.rstrip("\n").split("\t")
+                    self._offsets[key].append((int(start), int(end)))
+                    covered = max(covered, int(end))
+        except FileNotFoundError:
+            # First read of a new partition: build its sidecar
+            self.rebuild()
+            return
+        except (OSError, ValueError) as e:
+            print(f"Error reading offset index for {self.csv_path}, rebuilding: {e}")
+            self.rebuild()
+            return
+        if covered > size:
+            self.rebuild()
+            return
+        self._covered = covered
+        if covered < size:
+            self._catch_up(persist=True)
+
+    def rebuild(self):
+        """Rebuild the sidecar from a full scan of the CSV file"""
+        with self._lock:
+            self._read_header()
+            self._offsets = defaultdict(list)
+            tmp_path = f"{self.index_path}.tmp"
+            covered = len(self._header)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(f"{INDEX_VERSION}\t{self.column}\n")
+                for key, start, end in self._scan(len(self._header)):
+                    self._offsets[key].append((start, end))
+                    f.write(f"{key}\t{start}\t{end}\n")
+                    covered = end
+                self._sync(f)
+            os.replace(tmp_path, self.index_path)
+            self._covered = covered
+
+    def _catch_up(self, persist=False):
+        """Index rows appended past the covered offset, e.g. by another process"""
+        entries = list(self._scan(self._covered))
+        for key, start, end in entries:
+            self._offsets[key].append((start, end))
+            self._covered = end
+        if persist and entries:
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.writelines(f"{key}\t{start}\t{end}\n" for key, start, end in entries)
+                self._sync(f)
+
+    def add(self, key, start, end):
+        """Record a row that was just appended at [start, end)"""
+        self.add_many([(key, start, end)])
+
+    def add_many(self, entries):
+        """Record contiguous rows that were just appended, with a single sidecar write"""
+        with self._lock:
+            entries = [entry for entry in entries if entry[2] > self._covered]
+            if not entries:
+                return
+            if entries[0][1] != self._covered:
+                self._catch_up()
+            for key, start, end in entries:
+                self._offsets[key].append((start, end))
+                self._covered = end
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.writelines(f"{key}\t{start}\t{end}\n" for key, start, end in entries)
+                self._sync(f)
+
+    def _read_ranges(self, ranges):
+        """Read byte ranges from the CSV, merging adjacent ones into a single read"""
+        chunks = []
+        with open(self.csv_path, "rb") as f:
+            for start, end in sorted(ranges):
+                if chunks and chunks[-1][1] == start:
+                    chunks[-1][1] = end
+                else:
+                    chunks.append([start, end])
+            data = []
+            for start, end in chunks:
+                f.seek(start)
+                data.append(f.read(end - start))
+        return b"".join(data)
+
+    def _refresh(self):
+        """Pick up rows appended (or a rewrite made) since the index was last brought up to date"""
+        if os.path.getsize(self.csv_path) != self._covered:
+            if os.path.getsize(self.csv_path) < self._covered:
+                self.rebuild()
+            else:
+                self._catch_up()
+
+    def count(self, key):
+        """Return the number of rows for one key without reading them"""
+        with self._lock:
+            self._refresh()
+            return len(self._offsets.get(key, []))
+
+    def read_rows(self, key, parse=pd.read_csv):
+        """Return the rows for one key as a DataFrame, reading only their byte ranges.
+
+        ``parse`` turns the CSV bytes (header included) into a DataFrame.
+        """
+        with self._lock:
+            self._refresh()
+            ranges = list(self._offsets.get(key, []))
+            header = self._header
+        df = parse(io.BytesIO(header + self._read_ranges(ranges)))
+        if not df.empty and not (df[self.column].astype(str) == str(key)).all():
+            # Offsets point at the wrong rows: the file was rewritten behind our back
+            self.rebuild()
+            with self._lock:
+                ranges = list(self._offsets.get(key, []))
+            df = parse(io.BytesIO(self._header + self._read_ranges(ranges)))
+        return df
+
+
+if __name__ == "__main__":
+    # Rebuild command: python -m utils.offset_index [csv_path ...] [--column user_id]
+    # With no paths, every health record partition under data/health_records/ is rebuilt.
+    import sys
+    import glob
+
+    args = sys.argv[1:]
+    column = "user_id"
+    if "--column" in args:
+        column = args[args.index("--column") + 1]
+        args = args[:args.index("--column")] + args[args.index("--column") + 2:]
+    for csv_path in args or sorted(glob.glob(os.path.join("data", "health_records", "*.csv"))):
+        OffsetIndex(csv_path, column).rebuild()
@@ -0,0 +1,233 @@
+import re
+import numpy as np
+import pandas as pd
+from utils.blood_compatibility import BLOOD_GROUPS, DONOR_TO_RECIPIENTS
+from utils.geo_index import EARTH_RADIUS_KM
+
+ORGANS = ["Heart", "Liver", "Kidney", "Lungs", "Pancreas", "Intestine", "Cornea", "Skin", "Bone", "Heart Valves"]
+# Names used by the registration form and older records -> ORGANS entry
+ORGAN_ALIASES = {"Kidneys": "Kidney", "Corneas": "Cornea", "Intestines": "Intestine", "Lung": "Lungs", "Heart Valve": "Heart Valves"}
+HLA_LOCI = ["A", "B", "DR"]
+HLA_RE = re.compile(r"\b(DR|A|B)\*?0*(\d+)", re.I)
+URGENCY_LEVELS = {"Low": 0.0, "Medium": 1 / 3, "High": 2 / 3, "Critical": 1.0}
+
+# Points out of 100 per factor, as in the matching score calculator
+WEIGHTS = {"blood": 40, "hla": 25, "size": 15, "distance": 10, "urgency": 5, "wait": 5}
+# A compatible but different blood group earns 30 of the 40 blood points
+COMPATIBLE_BLOOD_SHARE = 0.75
+# Distance points fall to zero at about 500 miles
+MAX_DISTANCE_KM = 800
+# Wait points are full after two years on the list
+FULL_WAIT_DAYS = 730
+# Factor score used when a donor or recipient hasn't recorded the measurement
+UNKNOWN_SHARE = 0.5
+
+# [donor group, recipient group] -> share of the blood points (0 when incompatible)
+BLOOD_SCORES = np.array([
+    [1.0 if donor == recipient else COMPATIBLE_BLOOD_SHARE if recipient in DONOR_TO_RECIPIENTS[donor] else 0.0
+     for recipient in BLOOD_GROUPS]
+    for donor in BLOOD_GROUPS
+], dtype="float32")
+
+
+def organ_name(name):
+    """Normalise an organ name to its ORGANS entry"""
+    name = str(name).strip().title()
+    return ORGAN_ALIASES.get(name, name)
+
+
+def parse_hla(typing):
+    """Parse an HLA typing like "A1,A2;B7,B8;DR2,DR4" into six antigens (A, A, B, B, DR, DR); missing ones are None"""
+    antigens = {locus: [] for locus in HLA_LOCI}
+    for locus, number in HLA_RE.findall(str(typing or "")):
+        locus = locus.upper()
+        if len(antigens[locus]) < 2:
+            antigens[locus].append(f"{locus}{number}")
+    return [antigens[locus][i] if i < len(antigens[locus]) else None for locus in HLA_LOCI for i in range(2)]
+
+
+def hla_match_count(donor_hla, recipient_hla):
+    """Number of the donor's six A/B/DR antigens that the recipient shares at the same locus (0-6)"""
+    codes = _hla_codes([donor_hla, recipient_hla])
+    recipient = codes[1:]
+    recipient[recipient < 0] = -2
+    return int(_hla_matches(codes[:1], recipient)[0, 0])
+
+
+def _column(df, name, default=np.nan):
+    return df[name] if name in df.columns else pd.Series(default, index=df.index)
+
+
+def _hla_codes(typings):
+    """Encode HLA typings as an (n, 6) int16 array of antigen codes, -1 where missing"""
+    antigens = np.array([parse_hla(typing) for typing in typings], dtype=object).reshape(-1, 6)
+    codes, _ = pd.factorize(pd.Series(antigens.ravel()), use_na_sentinel=True)
+    return codes.reshape(antigens.shape).astype("int16")
+
+
+def _hla_matches(donor_codes, recipient_codes):
+    """(donors, recipients) count of donor antigens present at the same locus in the recipient.
+
+    Missing donor antigens are coded -1 and missing recipient antigens -2, so they never match.
+    """
+    matches = np.zeros((len(donor_codes), len(recipient_codes)), dtype="int8")
+    for locus in range(len(HLA_LOCI)):
+        first = recipient_codes[None, :, 2 * locus]
+        second = recipient_codes[None, :, 2 * locus + 1]
+        for slot in (2 * locus, 2 * locus + 1):
+            antigen = donor_codes[:, slot, None]
+            matches += (antigen == first) | (antigen == second)
+    return matches
+
+
+def _unit_vectors(latitudes, longitudes):
+    """(n, 3) points on the unit sphere, NaN where coordinates are missing"""
+    lat = np.radians(pd.to_numeric(latitudes, errors="coerce").to_numpy("float64"))
+    lon = np.radians(pd.to_numeric(longitudes, errors="coerce").to_numpy("float64"))
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=1)
+
+
+def _blood_codes(groups):
+    return pd.Categorical(pd.Series(groups, dtype=object).astype(str), categories=BLOOD_GROUPS).codes
+
+
+def _encode(donors, recipients):
+    """Turn the donor and recipient frames into the arrays the scorer broadcasts over"""
+    organ_bits = {organ: 1 << i for i, organ in enumerate(ORGANS)}
+    donor_organs = np.array([
+        sum({organ_bits.get(organ_name(organ), 0) for organ in (organs if isinstance(organs, list) else str(organs).split(","))
+             if str(organ).strip()})
+        for organs in _column(donors, "organs", "")
+    ], dtype="int64")
+    needed = np.array([organ_bits.get(organ_name(organ), 0) for organ in _column(recipients, "organ_needed", "")], dtype="int64")
+    hla = _hla_codes(list(_column(donors, "hla_typing", None)) + list(_column(recipients, "hla_typing", None)))
+    recipient_hla = hla[len(donors):]
+    recipient_hla[recipient_hla < 0] = -2
+    urgency = _column(recipients, "urgency", None).map(URGENCY_LEVELS).fillna(0).to_numpy("float32")
+    wait_days = pd.to_numeric(_column(recipients, "wait_days"), errors="coerce").fillna(0).to_numpy("float32")
+    return {
+        "donor_organs": donor_organs,
+        "donor_blood": _blood_codes(_column(donors, "blood_group", None)),
+        "donor_hla": hla[:len(donors)],
+        "donor_weight": pd.to_numeric(_column(donors, "weight"), errors="coerce").to_numpy("float32"),
+        "donor_position": _unit_vectors(_column(donors, "latitude"), _column(donors, "longitude")),
+        "needed": needed,
+        "recipient_blood": _blood_codes(_column(recipients, "blood_group", None)),
+        "recipient_hla": recipient_hla,
+        "recipient_weight": pd.to_numeric(_column(recipients, "weight"), errors="coerce").to_numpy("float32"),
+        "recipient_position": _unit_vectors(_column(recipients, "latitude"), _column(recipients, "longitude")),
+        # Urgency and wait only depend on the recipient, so they are scored once
+        "priority": (WEIGHTS["urgency"] * urgency + WEIGHTS["wait"] * np.minimum(wait_days / FULL_WAIT_DAYS, 1)).astype("float32")
+    }
+
+
+def _score_block(arrays, rows):
+    """Score donors[rows] against every recipient; incompatible pairs get -inf"""
+    blood_codes = arrays["donor_blood"][rows]
+    blood = BLOOD_SCORES[blood_codes[:, None], arrays["recipient_blood"][None, :]]
+    # Unknown blood groups (code -1) are never compatible
+    blood[(blood_codes < 0)[:, None] | (arrays["recipient_blood"] < 0)[None, :]] = 0
+    hla = _hla_matches(arrays["donor_hla"][rows], arrays["recipient_hla"])
+    ratio = arrays["donor_weight"][rows, None] / arrays["recipient_weight"][None, :]
+    size = np.clip(1 - np.abs(np.log2(ratio)), 0, 1)
+    size[np.isnan(size)] = UNKNOWN_SHARE
+    # Great-circle distance from the chord between unit vectors: one matrix product for the block
+    # (float64 so nearby points keep their precision), then sqrt/arcsin in float32
+    chord_squared = (2 - 2 * (arrays["donor_position"][rows] @ arrays["recipient_position"].T)).astype("float32")
+    distance_km = 2 * np.float32(EARTH_RADIUS_KM) * np.arcsin(np.sqrt(np.clip(chord_squared, 0, 4)) / 2)
+    distance = np.clip(1 - distance_km / MAX_DISTANCE_KM, 0, 1)
+    distance[np.isnan(distance)] = UNKNOWN_SHARE
+    score = (
+        WEIGHTS["blood"] * blood + WEIGHTS["hla"] / 6 * hla + WEIGHTS["size"] * size
+        + WEIGHTS["distance"] * distance + arrays["priority"][None, :]
+    )
+    organ_ok = (arrays["donor_organs"][rows, None] & arrays["needed"][None, :]) != 0
+    score[~organ_ok | (blood == 0)] = -np.inf
+    return score, blood, hla, distance_km
+
+
+def match_organs(donors, recipients, k=5, block_size=256):
+    """Rank the top-k compatible recipients for every donor.
+
+    donors has donor_id, blood_group, organs (comma-separated or list) and optionally
+    hla_typing, weight (kg), latitude and longitude; recipients has recipient_id,
+    organ_needed, blood_group, urgency, wait_days and the same optional columns. Blood
+    compatibility, HLA antigen overlap, size, distance, urgency and wait are scored for
+    all pairs with NumPy broadcasting, block_size donors at a time to bound memory.
+    Returns one row per (donor, recipient) match with rank, score out of 100, blood
+    ("Perfect" or "Compatible"), hla_matches and distance_km.
+    """
+    columns = ["donor_id", "rank", "recipient_id", "score", "blood", "hla_matches", "distance_km"]
+    if donors.empty or recipients.empty or k <= 0:
+        return pd.DataFrame(columns=columns)
+    arrays = _encode(donors, recipients)
+    donor_ids = _column(donors, "donor_id").to_numpy()
+    recipient_ids = _column(recipients, "recipient_id").to_numpy()
+    k = min(k, len(recipients))
+    frames = []
+    for start in range(0, len(donors), block_size):
+        rows = np.arange(start, min(start + block_size, len(donors)))
+        score, blood, hla, distance_km = _score_block(arrays, rows)
+        top = np.argpartition(-score, k - 1, axis=1)[:, :k]
+        top_score = np.take_along_axis(score, top, axis=1)
+        order = np.argsort(-top_score, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_score = np.take_along_axis(top_score, order, axis=1)
+        keep = np.isfinite(top_score)
+        donor_rows = np.broadcast_to(rows[:, None], top.shape)[keep]
+        recipient_cols = top[keep]
+        frames.append(pd.DataFrame({
+            "donor_id": donor_ids[donor_rows],
+            "rank": np.broadcast_to(np.arange(1, k + 1), top.shape)[keep],
+            "recipient_id": recipient_ids[recipient_cols],
+            "score": np.round(top_score[keep], 1),
+            "blood": np.where(blood[donor_rows - start, recipient_cols] == 1, "Perfect", "Compatible"),
+            "hla_matches": hla[donor_rows - start, recipient_cols],
+            "distance_km": distance_km[donor_rows - start, recipient_cols]
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def synthetic_pairs(n_donors, n_recipients, seed=0):
+    """Random donor and recipient frames for benchmarking the matcher"""
+    rng = np.random.default_rng(seed)
+
+    def typings(n):
+        numbers = rng.integers(1, 30, size=(n, 6))
+        return [f"A{a},A{b};B{c},B{d};DR{e},DR{f}" for a, b, c, d, e, f in numbers]
+
+    donors = pd.DataFrame({
+        "donor_id": [f"D{i}" for i in range(n_donors)],
+        "blood_group": rng.choice(BLOOD_GROUPS, n_donors),
+        "organs": [",".join(rng.choice(ORGANS, 3, replace=False)) for _ in range(n_donors)],
+        "hla_typing": typings(n_donors),
+        "weight": rng.uniform(40, 110, n_donors),
+        "latitude": rng.uniform(8, 35, n_donors),
+        "longitude": rng.uniform(68, 97, n_donors)
+    })
+    recipients = pd.DataFrame({
+        "recipient_id": [f"R{i}" for i in range(n_recipients)],
+        "organ_needed": rng.choice(ORGANS, n_recipients),
+        "blood_group": rng.choice(BLOOD_GROUPS, n_recipients),
+        "hla_typing": typings(n_recipients),
+        "weight": rng.uniform(10, 110, n_recipients),
+        "latitude": rng.uniform(8, 35, n_recipients),
+        "longitude": rng.uniform(68, 97, n_recipients),
+        "urgency": rng.choice(list(URGENCY_LEVELS), n_recipients),
+        "wait_days": rng.integers(0, 1500, n_recipients)
+    })
+    return donors, recipients
+
+
+if __name__ == "__main__":
+    # Benchmark: python -m utils.organ_matching [donors] [recipients]
+    import sys
+    import time
+
+    n_donors, n_recipients = (int(arg) for arg in (sys.argv[1:3] + ["10000", "10000"][len(sys.argv[1:3]):]))
+    donors, recipients = synthetic_pairs(n_donors, n_recipients)
+    started = time.perf_counter()
+    matches = match_organs(donors, recipients, k=5)
+    elapsed = time.perf_counter() - started
+    print(f"Scored {n_donors:,} x {n_recipients:,} pairs in {elapsed:.2f}s "
+          f"({n_donors * n_recipients / elapsed:,.0f} pairs/sec), {len(matches):,} matches kept")
@@ -0,0 +1,76 @@
+import os
+import threading
+
+
+class PostCounters:
+    """Like/comment counts still in the counter log, and which users liked which posts.
+
+    Likes and comments are appended to ``post_counter_log`` instead of rewriting
+    ``community_posts`` on every click; ``deltas`` sums the log per post so feeds can add
+    the live deltas to the compacted counts. The sums are recomputed whenever the log has
+    changed (compaction keeps it short), so writes from other processes are never missed.
+    Likes already seen are remembered per (post, user) pair; likes are never removed, so
+    that cache can't go stale. Misses are remembered too and dropped when the like is
+    recorded, so feeds don't reload ``post_likes`` for every post a user hasn't liked.
+    """
+
+    _liked = {}
+    _not_liked = {}
+    _sums = {}
+    _appended = {}
+    _lock = threading.RLock()
+
+    def __init__(self, source):
+        self.source = os.path.abspath(source)
+
+    @property
+    def lock(self):
+        """Held while recording or compacting so a user's like is only logged once"""
+        return PostCounters._lock
+
+    def has_liked(self, post_id, user_id, load_likes):
+        """Check whether the user already liked the post; load_likes(post_id) -> that post's post_likes rows"""
+        with PostCounters._lock:
+            liked = PostCounters._liked.setdefault(self.source, set())
+            not_liked = PostCounters._not_liked.setdefault(self.source, set())
+            if (post_id, user_id) in liked:
+                return True
+            if (post_id, user_id) in not_liked:
+                return False
+            likes = load_likes(post_id)
+            liked.update((post_id, uid) for uid in likes["user_id"])
+            if (post_id, user_id) in liked:
+                return True
+            not_liked.add((post_id, user_id))
+            return False
+
+    def record(self, post_id, user_id=None):
+        """Note a counter log entry appended by this process; returns the entries appended since the last compaction"""
+        with PostCounters._lock:
+            if user_id is not None:
+                PostCounters._liked.setdefault(self.source, set()).add((post_id, user_id))
+                PostCounters._not_liked.get(self.source, set()).discard((post_id, user_id))
+            PostCounters._appended[self.source] = PostCounters._appended.get(self.source, 0) + 1
+            return PostCounters._appended[self.source]
+
+    def deltas(self, load_log):
+        """Get {post_id: {counter: delta}} for the entries not yet compacted, from load_log() -> post_counter_log"""
+        log = load_log()
+        with PostCounters._lock:
+            cached = PostCounters._sums.get(self.source)
+            # The CSV engine hands back the same frame until the file changes
+            if cached is not None and cached[0] is log:
+                return cached[1]
+        sums = {}
+        if not log.empty:
+            for (post_id, counter), delta in log.groupby(["post_id", "counter"], observed=True)["delta"].sum().items():
+                sums.setdefault(post_id, {})[counter] = int(delta)
+        with PostCounters._lock:
+            PostCounters._sums[self.source] = (log, sums)
+        return sums
+
+    def compacted(self):
+        """Restart the count of appended entries once the log has been folded into community_posts"""
+        with PostCounters._lock:
+            PostCounters._appended[self.source] = 0
+            PostCounters._sums.pop(self.source, None)
@@ -0,0 +1,130 @@
+import os
+import re
+import math
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+# Latin words/numbers, Devanagari (Hindi) words without the danda marks, and Tamil words
+TOKEN_RE = re.compile(r"[a-z0-9]+|[\u0900-\u0963\u0966-\u097F]+|[\u0B80-\u0BFF]+")
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "has", "have", "i", "in", "is",
+    "it", "its", "me", "my", "of", "on", "or", "so", "that", "the", "their", "this", "to", "was", "we",
+    "were", "what", "with", "you", "your"
+}
+VOWELS = set("aeiouy")
+
+
+def stem(word):
+    """Light English suffix stripping so "walks", "walked" and "walking" share a term.
+
+    Non-Latin tokens (Hindi, Tamil) are returned unchanged.
+    """
+    if len(word) <= 3 or not word.isascii() or not word.isalpha():
+        return word
+    if word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    for suffix in ("ingly", "edly", "ing", "ed"):
+        base = word[:-len(suffix)]
+        if word.endswith(suffix) and len(base) >= 3 and VOWELS & set(base):
+            word = base
+            # running -> run, but keep "ll"/"ss"/"zz"
+            if word[-1] == word[-2] and word[-1] not in "lsz":
+                word = word[:-1]
+            break
+    for suffix, replacement in (("ational", "ate"), ("ization", "ize"), ("fulness", "ful"), ("iveness", "ive"),
+                                ("ousness", "ous"), ("ness", ""), ("ment", ""), ("ly", "")):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)] + replacement
+            break
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Split text into normalised index terms"""
+    text = unicodedata.normalize("NFC", str(text or "")).lower()
+    return [stem(token) for token in TOKEN_RE.findall(text) if token not in STOP_WORDS]
+
+
+class PostSearchIndex:
+    """Incremental inverted index over community post titles and content, ranked with BM25.
+
+    The index is built once from the posts table and then extended by every post created
+    through the DataManager. Posts are never edited, so when signature() shows the table
+    was written elsewhere (another process) only the posts not indexed yet are added. Like
+    the health aggregates, it is shared by every DataManager over the same storage in the
+    process.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    # Title terms count this many times so title matches rank higher
+    TITLE_WEIGHT = 2
+
+    _indexes = {}
+    _lock = threading.RLock()
+
+    def __init__(self, source, signature):
+        self.source = os.path.abspath(source)
+        # signature() -> value that changes when the posts table is written (storage.table_signature)
+        self.signature = signature
+
+    def _state(self, load=None):
+        state = PostSearchIndex._indexes.get(self.source)
+        if load is None:
+            return state
+        if state is None:
+            state = {"postings": defaultdict(dict), "lengths": {}, "total_length": 0, "signature": None}
+            PostSearchIndex._indexes[self.source] = state
+        signature = self.signature()
+        if state["signature"] != signature:
+            for post in load().to_dict("records"):
+                self._add(state, post)
+            state["signature"] = signature
+        return state
+
+    def _add(self, state, post):
+        doc_id = post["post_id"]
+        if doc_id in state["lengths"]:
+            return
+        terms = tokenize(post.get("title")) * self.TITLE_WEIGHT + tokenize(post.get("content"))
+        for term, count in Counter(terms).items():
+            state["postings"][term][doc_id] = count
+        state["lengths"][doc_id] = len(terms)
+        state["total_length"] += len(terms)
+
+    def add(self, post, before):
+        """Index a post just written by this process, given the table's signature from before the write"""
+        with PostSearchIndex._lock:
+            state = self._state()
+            if state is not None:
+                self._add(state, post)
+                # Skip the rescan on the next search, unless the index was already behind
+                if state["signature"] == before:
+                    state["signature"] = self.signature()
+
+    def search(self, query, load, limit=10):
+        """Return [(post_id, score), ...] best first, building or catching up the index with load() -> DataFrame"""
+        terms = set(tokenize(query))
+        with PostSearchIndex._lock:
+            state = self._state(load)
+            n_docs = len(state["lengths"])
+            if not terms or not n_docs:
+                return []
+            avg_length = state["total_length"] / n_docs
+            scores = defaultdict(float)
+            for term in terms:
+                postings = state["postings"].get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.K1 * (1 - self.B + self.B * state["lengths"][doc_id] / avg_length)
+                    scores[doc_id] += idf * tf * (self.K1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
@@ -0,0 +1,862 @@
+import pandas as pd
+import os
+import io
+import csv
+import re
+import sqlite3
+import threading
+from bisect import bisect_left, insort
+from datetime import timedelta
+from utils.offset_index import OffsetIndex
+
+FSYNC_POLICIES = ("none", "always")
+PARTITION_RE = re.compile(r"^\d{4}-\d{2}")
+UNDATED_PARTITION = "undated"
+
+
+# Column kinds used in table schemas; "date"/"datetime" parse to datetime64 and are written back with these formats
+DATE_FORMATS = {"date": "%Y-%m-%d", "datetime": "%Y-%m-%d %H:%M:%S"}
+BOOLEAN_VALUES = {"true": True, "false": False, "1": True, "0": False, "yes": True, "no": False}
+
+# One lock per file path for the whole process: every page caches its own DataManager (and
+# storage), so a per-instance lock would not keep their read-modify-writes apart
+_file_locks = {}
+_file_locks_guard = threading.Lock()
+
+
+def file_lock(path):
+    """Return the process-wide lock for a path, held across a file's read-modify-write and appends"""
+    path = os.path.abspath(path)
+    with _file_locks_guard:
+        return _file_locks.setdefault(path, threading.RLock())
+
+
+def read_csv_dtypes(schema):
+    """read_csv dtypes for text columns, so IDs and phone numbers are never inferred as numbers"""
+    return {col: ("category" if kind == "category" else str) for col, kind in schema.items() if kind in ("str", "category")}
+
+
+def apply_schema(df, schema):
+    """Cast a freshly parsed frame to its schema: categories, nullable ints, float32, booleans and datetimes"""
+    for col, kind in schema.items():
+        if col not in df.columns:
+            continue
+        if kind in DATE_FORMATS:
+            df[col] = pd.to_datetime(df[col], format="ISO8601", errors="coerce")
+        elif kind == "category":
+            df[col] = df[col].astype("category")
+        elif kind == "boolean":
+            df[col] = df[col].astype(str).str.lower().map(BOOLEAN_VALUES).astype("boolean")
+        elif kind in ("Int64", "float32"):
+            numbers = pd.to_numeric(df[col], errors="coerce")
+            try:
+                df[col] = numbers.astype(kind)
+            except (TypeError, ValueError):
+                df[col] = numbers
+    return df
+
+
+def encode_value(value, kind=None):
+    """Convert a Python/pandas value into what gets written to a CSV cell or SQLite column"""
+    if value is None:
+        return None
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    if kind in DATE_FORMATS and hasattr(value, "strftime"):
+        return value.strftime(DATE_FORMATS[kind])
+    if hasattr(value, "item"):
+        # numpy scalars
+        return value.item()
+    return value
+
+
+def encode_frame(df, schema):
+    """Format datetime columns with their schema format before writing a frame"""
+    out = df.copy()
+    for col, kind in schema.items():
+        if kind in DATE_FORMATS and col in out.columns and pd.api.types.is_datetime64_any_dtype(out[col]):
+            out[col] = out[col].dt.strftime(DATE_FORMATS[kind])
+    return out
+
+
+def _day_bounds(start, end):
+    """Normalise inclusive start/end days; returns (start, end, day after end)"""
+    start = pd.Timestamp(start).date() if start is not None else None
+    end = pd.Timestamp(end).date() if end is not None else None
+    return start, end, (end + timedelta(days=1)) if end is not None else None
+
+
+class CSVStorage:
+    """Table storage backed by CSV files under the data directory.
+
+    Most tables are one ``<table>.csv`` file; tables listed in ``partitioned`` are split
+    into monthly files ``<table>/YYYY-MM.csv`` by their date column.
+    """
+
+    # Parsed files shared by every storage instance in the process (each page caches its own DataManager)
+    _table_cache = {}
+    _write_versions = {}
+    _cache_lock = threading.Lock()
+    _cache_stats = {"hits": 0, "misses": 0}
+    # (path, column) -> (file signature, {value: [row dict, ...]})
+    _hash_indexes = {}
+    # path -> (file signature, {group value or None: [(sort value, id), ...] ascending}, {id: row dict})
+    _sorted_indexes = {}
+
+    def __init__(self, data_dir, fsync_policy="none", indexed=None, hash_indexed=None, partitioned=None, sorted_indexed=None):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"fsync_policy must be one of {FSYNC_POLICIES}, got {fsync_policy!r}")
+        self.data_dir = data_dir
+        self.fsync_policy = fsync_policy
+        # table -> column with a persistent offset index (see utils/offset_index.py)
+        self.indexed = indexed or {}
+        # table -> columns with an in-memory hash index for O(1) equality lookups (unpartitioned tables only)
+        self.hash_indexed = hash_indexed or {}
+        # table -> date column used to split rows into monthly partition files
+        self.partitioned = partitioned or {}
+        # table -> (sort column, group column) with an in-memory sorted index for paged newest-first reads
+        self.sorted_indexed = sorted_indexed or {}
+        self._headers = {}
+        self._columns = {}
+        self._schemas = {}
+
+    def _path(self, table, partition=None):
+        if table in self.partitioned:
+            return os.path.join(self.data_dir, table, f"{partition}.csv")
+        return os.path.join(self.data_dir, f"{table}.csv")
+
+    def _partition_of(self, table, row):
+        """Return the YYYY-MM partition a row belongs to"""
+        value = str(row.get(self.partitioned[table]) or "")
+        return value[:7] if PARTITION_RE.match(value) else UNDATED_PARTITION
+
+    def _files(self, table, start=None, end=None):
+        """Return the files holding a table, limited to partitions overlapping [start, end]"""
+        if table not in self.partitioned:
+            return [self._path(table)]
+        directory = os.path.join(self.data_dir, table)
+        first = start.strftime("%Y-%m") if start else None
+        last = end.strftime("%Y-%m") if end else None
+        files = []
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".csv"):
+                continue
+            partition = name[:-4]
+            if (first or last) and partition == UNDATED_PARTITION:
+                continue
+            if (first and partition < first) or (last and partition > last):
+                continue
+            files.append(os.path.join(directory, name))
+        return files
+
+    def table_lock(self, table):
+        """Lock taken by every write to an unpartitioned table; hold it to read and rewrite the table as one step"""
+        return file_lock(self._path(table))
+
+    def _create_file(self, filepath, columns):
+        pd.DataFrame(columns=columns).to_csv(filepath, index=False)
+
+    def ensure_table(self, table, columns, schema=None):
+        """Create the table file (or partition directory) with its header row if it doesn't exist"""
+        self._columns[table] = list(columns)
+        self._schemas[table] = schema or {}
+        if table not in self.partitioned:
+            # Locked so a DataManager created at the same time never reads a half-written header
+            with file_lock(self._path(table)):
+                if not os.path.exists(self._path(table)):
+                    self._create_file(self._path(table), columns)
+                else:
+                    self._add_missing_columns(self._path(table), columns)
+            return
+        os.makedirs(os.path.join(self.data_dir, table), exist_ok=True)
+        legacy_path = os.path.join(self.data_dir, f"{table}.csv")
+        if not os.path.exists(legacy_path):
+            return
+        # One-time split of a flat table into monthly partitions; DataManagers created at the
+        # same time wait here, and find the file already moved once they get the lock
+        with file_lock(legacy_path):
+            if not os.path.exists(legacy_path):
+                return
+            legacy = pd.read_csv(legacy_path, dtype=str, keep_default_na=False)
+            rows = legacy.to_dict("records")
+            self.append_rows(table, [{k: (v if v != "" else None) for k, v in row.items()} for row in rows])
+            os.replace(legacy_path, f"{legacy_path}.migrated")
+            if os.path.exists(f"{legacy_path}.idx"):
+                os.remove(f"{legacy_path}.idx")
+
+    def _add_missing_columns(self, filepath, columns):
+        """Append empty columns that were added to the schema after the file was created"""
+        with file_lock(filepath):
+            missing = [col for col in columns if col not in self._get_header(filepath)]
+            if not missing:
+                return
+            df = pd.read_csv(filepath, dtype=str, keep_default_na=False)
+            for col in missing:
+                df[col] = ""
+            tmp_path = f"{filepath}.tmp"
+            with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+                df.to_csv(f, index=False)
+                self._sync(f)
+            os.replace(tmp_path, filepath)
+            self._headers.pop(filepath, None)
+            self._bump_version(filepath)
+
+    def _get_header(self, filepath):
+        """Return the column order of a CSV file, read once from its header line"""
+        if filepath not in self._headers:
+            with open(filepath, newline="", encoding="utf-8") as f:
+                self._headers[filepath] = next(csv.reader(f))
+        return self._headers[filepath]
+
+    def _bump_version(self, filepath):
+        """Mark a file as written so cached copies are invalidated"""
+        with CSVStorage._cache_lock:
+            key = os.path.abspath(filepath)
+            CSVStorage._write_versions[key] = CSVStorage._write_versions.get(key, 0) + 1
+
+    def _parse(self, table, source):
+        """Parse CSV data with the table's schema"""
+        schema = self._schemas.get(table, {})
+        return apply_schema(pd.read_csv(source, dtype=read_csv_dtypes(schema)), schema)
+
+    def _read_file(self, table, filepath):
+        """Return a parsed file from the shared cache, re-reading only when the file changed.
+
+        The returned DataFrame is shared between sessions and must not be modified in place.
+        """
+        filepath = os.path.abspath(filepath)
+        signature = self._signature(filepath)
+        with CSVStorage._cache_lock:
+            version = CSVStorage._write_versions.get(filepath, 0)
+            cached = CSVStorage._table_cache.get(filepath)
+            if cached and cached[0] == signature and cached[1] == version:
+                CSVStorage._cache_stats["hits"] += 1
+                return cached[2]
+            CSVStorage._cache_stats["misses"] += 1
+        df = self._parse(table, filepath)
+        with CSVStorage._cache_lock:
+            CSVStorage._table_cache[filepath] = (signature, version, df)
+        return df
+
+    def _concat(self, table, frames):
+        frames = [df for df in frames if not df.empty]
+        if not frames:
+            return apply_schema(pd.DataFrame(columns=self._columns.get(table)), self._schemas.get(table, {}))
+        if len(frames) == 1:
+            return frames[0]
+        # Categories differ between files, so re-apply the schema to the combined frame
+        return apply_schema(pd.concat(frames, ignore_index=True), self._schemas.get(table, {}))
+
+    def read_table(self, table):
+        """Return a whole table; unpartitioned tables come straight from the shared cache and must not be modified in place"""
+        if table not in self.partitioned:
+            return self._read_file(table, self._path(table))
+        return self._concat(table, [self._read_file(table, path) for path in self._files(table)])
+
+    def _offset_index(self, table, filepath):
+        return OffsetIndex.for_file(filepath, self.indexed[table], self.fsync_policy)
+
+    def rebuild_index(self, table):
+        """Rebuild a table's offset index from a full scan"""
+        for filepath in self._files(table):
+            self._offset_index(table, filepath).rebuild()
+
+    def _signature(self, filepath):
+        stat = os.stat(filepath)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _build_hash_index(self, df, column):
+        rows = {}
+        for row in df.to_dict("records"):
+            rows.setdefault(row[column], []).append(row)
+        return rows
+
+    def lookup(self, table, column, value):
+        """Return the rows whose column equals value as a list of dicts.
+
+        Hash-indexed columns are answered from the in-memory index, which is built once
+        and rebuilt only if the file was changed outside this process.
+        """
+        if column not in self.hash_indexed.get(table, ()):
+            return self.find_rows(table, column, value).to_dict("records")
+        filepath = os.path.abspath(self._path(table))
+        key = (filepath, column)
+        signature = self._signature(filepath)
+        with CSVStorage._cache_lock:
+            entry = CSVStorage._hash_indexes.get(key)
+        if entry is None or entry[0] != signature:
+            entry = (signature, self._build_hash_index(self._read_file(table, filepath), column))
+            with CSVStorage._cache_lock:
+                CSVStorage._hash_indexes[key] = entry
+        return [dict(row) for row in entry[1].get(value, [])]
+
+    def _typed_rows(self, table, filepath, rows):
+        """Type freshly written rows the way they would be read back, for in-memory indexes"""
+        typed = pd.DataFrame(rows, columns=self._get_header(filepath))
+        return apply_schema(typed, self._schemas.get(table, {})).to_dict("records")
+
+    def _sort_key(self, row, sort_column, id_column):
+        value = row.get(sort_column)
+        return (pd.Timestamp.min if pd.isna(value) else value, str(row.get(id_column)))
+
+    def _build_sorted_index(self, table, df):
+        sort_column, group_column = self.sorted_indexed[table]
+        id_column = df.columns[0]
+        groups, rows = {None: []}, {}
+        for row in df.to_dict("records"):
+            key = self._sort_key(row, sort_column, id_column)
+            groups[None].append(key)
+            groups.setdefault(row.get(group_column), []).append(key)
+            rows[key[1]] = row
+        for keys in groups.values():
+            keys.sort()
+        return groups, rows
+
+    def read_page(self, table, sort_column, limit, cursor=None, column=None, value=None):
+        """Return up to limit rows newest-first by sort_column, strictly before cursor = (sort value, id).
+
+        Tables with a sorted index answer this with a binary search and an O(limit) slice;
+        the index is built once and rebuilt only if the file was changed outside this process.
+        """
+        if self.sorted_indexed.get(table, (None, None))[0] != sort_column or column not in (None, self.sorted_indexed[table][1]):
+            df = self.read_table(table) if column is None else self.find_rows(table, column, value)
+            id_column = df.columns[0]
+            df = df.sort_values([sort_column, id_column], ascending=False)
+            if cursor is not None:
+                df = df[(df[sort_column] < cursor[0]) | ((df[sort_column] == cursor[0]) & (df[id_column].astype(str) < str(cursor[1])))]
+            return df.head(limit)
+        filepath = os.path.abspath(self._path(table))
+        signature = self._signature(filepath)
+        with CSVStorage._cache_lock:
+            entry = CSVStorage._sorted_indexes.get(filepath)
+        if entry is None or entry[0] != signature:
+            entry = (signature, *self._build_sorted_index(table, self._read_file(table, filepath)))
+            with CSVStorage._cache_lock:
+                CSVStorage._sorted_indexes[filepath] = entry
+        with CSVStorage._cache_lock:
+            keys = entry[1].get(value if column is not None else None, [])
+            end = bisect_left(keys, (cursor[0], str(cursor[1]))) if cursor is not None else len(keys)
+            page = [dict(entry[2][key[1]]) for key in reversed(keys[max(0, end - limit):end])]
+        return apply_schema(pd.DataFrame(page, columns=self._get_header(filepath)), self._schemas.get(table, {}))
+
+    def count_rows(self, table, column, value):
+        """Count the rows whose column equals value, from the offset or sorted index when there is one"""
+        if self.indexed.get(table) == column:
+            return sum(self._offset_index(table, path).count(str(value)) for path in self._files(table))
+        if self.sorted_indexed.get(table, (None, None))[1] != column:
+            return len(self.find_rows(table, column, value))
+        filepath = os.path.abspath(self._path(table))
+        with CSVStorage._cache_lock:
+            entry = CSVStorage._sorted_indexes.get(filepath)
+        if entry is None or entry[0] != self._signature(filepath):
+            # Build (or refresh) the index through an empty page read
+            self.read_page(table, self.sorted_indexed[table][0], 0, column=column, value=value)
+            with CSVStorage._cache_lock:
+                entry = CSVStorage._sorted_indexes.get(filepath)
+        with CSVStorage._cache_lock:
+            return len(entry[1].get(value, []))
+
+    def table_signature(self, table):
+        """Return a value that changes whenever the table's files are written, by any process"""
+        return tuple(self._signature(path) for path in self._files(table))
+
+    def _update_sorted_index(self, table, filepath, before, after, rows=None, df=None):
+        """Keep the sorted index in step with a write: insert the appended rows or rebuild from the rewritten frame"""
+        if table not in self.sorted_indexed:
+            return
+        sort_column, group_column = self.sorted_indexed[table]
+        key = os.path.abspath(filepath)
+        with CSVStorage._cache_lock:
+            entry = CSVStorage._sorted_indexes.get(key)
+            if df is not None:
+                CSVStorage._sorted_indexes[key] = (after, *self._build_sorted_index(table, df))
+            elif entry is not None and entry[0] == before:
+                id_column = self._get_header(filepath)[0]
+                for row in self._typed_rows(table, filepath, rows):
+                    sort_key = self._sort_key(row, sort_column, id_column)
+                    insort(entry[1][None], sort_key)
+                    insort(entry[1].setdefault(row.get(group_column), []), sort_key)
+                    entry[2][sort_key[1]] = row
+                CSVStorage._sorted_indexes[key] = (after, entry[1], entry[2])
+
+    def _update_hash_indexes(self, table, filepath, before, after, rows=None, df=None):
+        """Keep hash indexes in step with a write: add the appended rows or rebuild from the rewritten frame"""
+        if not self.hash_indexed.get(table):
+            return
+        if rows is not None:
+            rows = self._typed_rows(table, filepath, rows)
+        for column in self.hash_indexed.get(table, ()):
+            key = (os.path.abspath(filepath), column)
+            with CSVStorage._cache_lock:
+                entry = CSVStorage._hash_indexes.get(key)
+                if df is not None:
+                    CSVStorage._hash_indexes[key] = (after, self._build_hash_index(df, column))
+                elif entry is not None and entry[0] == before:
+                    for row in rows:
+                        entry[1].setdefault(row.get(column), []).append(dict(row))
+                    CSVStorage._hash_indexes[key] = (after, entry[1])
+
+    def _find_in_files(self, table, files, column, value):
+        if self.indexed.get(table) == column:
+            return self._concat(table, [self._offset_index(table, path).read_rows(value, parse=lambda data: self._parse(table, data)) for path in files])
+        frames = []
+        for path in files:
+            df = self._read_file(table, path)
+            frames.append(df[df[column] == value])
+        return self._concat(table, frames)
+
+    def find_rows(self, table, column, value):
+        """Return the rows whose column equals value, seeking via the offset index when there is one"""
+        if column in self.hash_indexed.get(table, ()):
+            return pd.DataFrame(self.lookup(table, column, value), columns=self._get_header(self._path(table)))
+        return self._find_in_files(table, self._files(table), column, value)
+
+    def iter_range(self, table, start=None, end=None, column=None, value=None, date_column="date"):
+        """Yield the rows dated within [start, end] one file (monthly partition) at a time"""
+        start, end, end_exclusive = _day_bounds(start, end)
+        date_column = self.partitioned.get(table, date_column)
+        for path in self._files(table, start, end):
+            if column is not None:
+                df = self._find_in_files(table, [path], column, value)
+            else:
+                df = self._read_file(table, path)
+            if df.empty:
+                continue
+            dates = pd.to_datetime(df[date_column], errors="coerce")
+            mask = dates.notna()
+            if start is not None:
+                mask &= dates >= pd.Timestamp(start)
+            if end_exclusive is not None:
+                mask &= dates < pd.Timestamp(end_exclusive)
+            if mask.any():
+                yield df[mask]
+
+    def read_range(self, table, start=None, end=None, column=None, value=None, date_column="date"):
+        """Return rows dated within [start, end] (inclusive days), optionally where column equals value.
+
+        Partitioned tables only open the monthly files overlapping the window.
+        """
+        return self._concat(table, list(self.iter_range(table, start, end, column, value, date_column)))
+
+    def cache_stats(self):
+        """Get hit/miss counters for the shared table cache"""
+        with CSVStorage._cache_lock:
+            stats = dict(CSVStorage._cache_stats)
+            stats["tables"] = len(CSVStorage._table_cache)
+        return stats
+
+    def _sync(self, f):
+        """Flush a file handle to disk according to the fsync policy"""
+        f.flush()
+        if self.fsync_policy == "always":
+            os.fsync(f.fileno())
+
+    def append_row(self, table, row):
+        """Append a single row to a CSV file without rewriting it"""
+        self.append_rows(table, [row])
+
+    def append_rows(self, table, rows):
+        """Append rows with a single write per file (one file, or one per touched partition)"""
+        if not rows:
+            return
+        if table not in self.partitioned:
+            self._append_file(table, self._path(table), rows)
+            return
+        by_partition = {}
+        for row in rows:
+            by_partition.setdefault(self._partition_of(table, row), []).append(row)
+        for partition, partition_rows in by_partition.items():
+            filepath = self._path(table, partition)
+            with file_lock(filepath):
+                if not os.path.exists(filepath):
+                    self._create_file(filepath, self._columns[table])
+            self._append_file(table, filepath, partition_rows)
+
+    def _append_file(self, table, filepath, rows):
+        header = self._get_header(filepath)
+        schema = self._schemas.get(table, {})
+        encoded = []
+        for row in rows:
+            values = [encode_value(row.get(col), schema.get(col)) for col in header]
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator="\n").writerow(["" if value is None else value for value in values])
+            encoded.append(buffer.getvalue().encode("utf-8"))
+        # Load the index before writing so a first-time build doesn't already include these rows
+        index = self._offset_index(table, filepath) if table in self.indexed else None
+        with file_lock(filepath):
+            before = self._signature(filepath)
+            with open(filepath, "a+b") as f:
+                start = f.seek(0, os.SEEK_END)
+                # Guard against hand-edited files that lost their trailing newline
+                if start > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+                        start += 1
+                f.write(b"".join(encoded))
+                self._sync(f)
+            if index:
+                entries = []
+                for row, data in zip(rows, encoded):
+                    entries.append((str(row.get(self.indexed[table])), start, start + len(data)))
+                    start += len(data)
+                index.add_many(entries)
+            after = self._signature(filepath)
+            self._update_hash_indexes(table, filepath, before, after, rows=rows)
+            self._update_sorted_index(table, filepath, before, after, rows=rows)
+            self._bump_version(filepath)
+
+    def _rewrite_file(self, table, filepath, df):
+        """Atomically replace a CSV file; used only for updates and deletes (callers hold file_lock across their read)"""
+        tmp_path = f"{filepath}.tmp"
+        with file_lock(filepath):
+            before = self._signature(filepath)
+            with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+                encode_frame(df, self._schemas.get(table, {})).to_csv(f, index=False)
+                self._sync(f)
+            os.replace(tmp_path, filepath)
+            if table in self.indexed:
+                self._offset_index(table, filepath).rebuild()
+            after = self._signature(filepath)
+            self._update_hash_indexes(table, filepath, before, after, df=df)
+            self._update_sorted_index(table, filepath, before, after, df=df)
+            self._bump_version(filepath)
+
+    def update_rows(self, table, column, value, values):
+        """Set values on the rows whose column equals value; returns the number of rows changed.
+
+        Only the files (partitions) containing matching rows are rewritten.
+        """
+        changed = 0
+        for filepath in self._files(table):
+            with file_lock(filepath):
+                df = self._read_file(table, filepath)
+                mask = df[column] == value
+                if not mask.any():
+                    continue
+                df = df.copy()
+                for col, new_value in values.items():
+                    # Inferred dtypes (e.g. phone read as int) can't hold every edited value
+                    df[col] = df[col].astype(object)
+                    df.loc[mask, col] = new_value
+                df = apply_schema(df, self._schemas.get(table, {}))
+                self._rewrite_file(table, filepath, df)
+                changed += int(mask.sum())
+        return changed
+
+    def increment_columns(self, table, key_column, increments):
+        """Add deltas to numeric columns for many keys ({key: {column: delta}}), rewriting each file once"""
+        changed = 0
+        for filepath in self._files(table):
+            with file_lock(filepath):
+                df = self._read_file(table, filepath)
+                mask = df[key_column].isin(list(increments))
+                if not mask.any():
+                    continue
+                df = df.copy()
+                columns = {col for deltas in increments.values() for col in deltas}
+                for col in columns:
+                    deltas = df.loc[mask, key_column].map(lambda key: increments[key].get(col, 0))
+                    df.loc[mask, col] = df.loc[mask, col].fillna(0) + deltas.astype(df[col].dtype)
+                self._rewrite_file(table, filepath, df)
+                changed += int(mask.sum())
+        return changed
+
+    def clear_table(self, table):
+        """Remove every row, keeping the header"""
+        for filepath in self._files(table):
+            with file_lock(filepath):
+                self._rewrite_file(table, filepath, self._read_file(table, filepath).iloc[0:0])
+
+    def fold_deltas(self, log_table, table, key_column):
+        """Add a log of (id, key, counter, delta) rows onto table's counter columns and drop those rows.
+
+        Both files stay locked throughout, so appends to the log wait and no entry is
+        counted twice or lost; returns the number of entries folded.
+        """
+        with self.table_lock(log_table), self.table_lock(table):
+            log = self._read_file(log_table, self._path(log_table))
+            if log.empty:
+                return 0
+            increments = {}
+            for (key, counter), delta in log.groupby([key_column, "counter"], observed=True)["delta"].sum().items():
+                increments.setdefault(key, {})[counter] = int(delta)
+            self.increment_columns(table, key_column, increments)
+            self.clear_table(log_table)
+            return len(log)
+
+
+class SQLiteStorage:
+    """Table storage backed by a single SQLite database in WAL mode"""
+
+    def __init__(self, db_path, fsync_policy="none"):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"fsync_policy must be one of {FSYNC_POLICIES}, got {fsync_policy!r}")
+        self.db_path = db_path
+        self.fsync_policy = fsync_policy
+        self._local = threading.local()
+        self._columns = {}
+        self._schemas = {}
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # FULL syncs the WAL on every commit; NORMAL only at checkpoints
+            conn.execute(f"PRAGMA synchronous={'FULL' if self.fsync_policy == 'always' else 'NORMAL'}")
+            self._local.conn = conn
+        return conn
+
+    def table_lock(self, table):
+        """In-process lock for a multi-statement read-modify-write on a table (single statements are atomic)"""
+        return file_lock(f"{self.db_path}#{table}")
+
+    def _query(self, table, sql, params=()):
+        """Run a SELECT and cast the result to the table's schema"""
+        df = pd.read_sql_query(sql, self._connect(), params=params)
+        return apply_schema(df, self._schemas.get(table, {}))
+
+    def _check_columns(self, table, columns):
+        unknown = set(columns) - set(self._columns[table])
+        if unknown:
+            raise ValueError(f"Unknown columns for {table}: {sorted(unknown)}")
+
+    def ensure_table(self, table, columns, schema=None):
+        """Create the table and its lookup indexes if they don't exist"""
+        self._columns[table] = list(columns)
+        self._schemas[table] = schema or {}
+        conn = self._connect()
+        column_defs = ", ".join(
+            f'"{col}" PRIMARY KEY' if i == 0 else f'"{col}"' for i, col in enumerate(columns)
+        )
+        with conn:
+            conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({column_defs})')
+            existing = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+            for col in columns:
+                if col not in existing:
+                    # Column added to the schema after the table was created
+                    conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{col}"')
+            if table == "users":
+                conn.execute('CREATE INDEX IF NOT EXISTS "idx_users_email" ON "users" ("email")')
+            if table == "blood_donors":
+                conn.execute('CREATE INDEX IF NOT EXISTS "idx_blood_donors_blood_group" ON "blood_donors" ("blood_group")')
+            if "user_id" in columns and columns[0] != "user_id":
+                conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table}_user_id" ON "{table}" ("user_id")')
+            if "date" in columns:
+                conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table}_date" ON "{table}" ("date")')
+                if "user_id" in columns:
+                    conn.execute(
+                        f'CREATE INDEX IF NOT EXISTS "idx_{table}_user_date" ON "{table}" ("user_id", "date")'
+                    )
+                for group_column in ("category", "thread_id"):
+                    if group_column in columns:
+                        conn.execute(
+                            f'CREATE INDEX IF NOT EXISTS "idx_{table}_{group_column}_date" ON "{table}" ("{group_column}", "date")'
+                        )
+
+    def read_table(self, table):
+        """Return the whole table"""
+        return self._query(table, f'SELECT * FROM "{table}"')
+
+    def find_rows(self, table, column, value):
+        """Return the rows whose column equals value, using the column's index where one exists"""
+        self._check_columns(table, [column])
+        return self._query(table, f'SELECT * FROM "{table}" WHERE "{column}" = ?', (value,))
+
+    def _range_query(self, table, start, end, column, value, date_column):
+        """Build the SELECT for a date window, optionally where column equals value"""
+        start, end, end_exclusive = _day_bounds(start, end)
+        self._check_columns(table, [date_column] + ([column] if column is not None else []))
+        clauses, params = [], []
+        if column is not None:
+            clauses.append(f'"{column}" = ?')
+            params.append(value)
+        if start is not None:
+            clauses.append(f'"{date_column}" >= ?')
+            params.append(start.isoformat())
+        if end_exclusive is not None:
+            clauses.append(f'"{date_column}" < ?')
+            params.append(end_exclusive.isoformat())
+        where = " AND ".join(clauses) or "1"
+        return f'SELECT * FROM "{table}" WHERE {where} ORDER BY "{date_column}"', params
+
+    def read_range(self, table, start=None, end=None, column=None, value=None, date_column="date"):
+        """Return rows dated within [start, end] (inclusive days), optionally where column equals value"""
+        sql, params = self._range_query(table, start, end, column, value, date_column)
+        return self._query(table, sql, params)
+
+    def iter_range(self, table, start=None, end=None, column=None, value=None, date_column="date", chunk_size=1000):
+        """Yield the rows dated within [start, end] in date order, chunk_size rows at a time"""
+        sql, params = self._range_query(table, start, end, column, value, date_column)
+        schema = self._schemas.get(table, {})
+        for chunk in pd.read_sql_query(sql, self._connect(), params=params, chunksize=chunk_size):
+            yield apply_schema(chunk, schema)
+
+    def read_page(self, table, sort_column, limit, cursor=None, column=None, value=None):
+        """Return up to limit rows newest-first by sort_column, strictly before cursor = (sort value, id)"""
+        id_column = self._columns[table][0]
+        self._check_columns(table, [sort_column] + ([column] if column is not None else []))
+        clauses, params = [], []
+        if column is not None:
+            clauses.append(f'"{column}" = ?')
+            params.append(value)
+        if cursor is not None:
+            sort_value = encode_value(cursor[0], self._schemas.get(table, {}).get(sort_column))
+            clauses.append(f'("{sort_column}" < ? OR ("{sort_column}" = ? AND "{id_column}" < ?))')
+            params.extend([sort_value, sort_value, str(cursor[1])])
+        where = " AND ".join(clauses) or "1"
+        return self._query(
+            table,
+            f'SELECT * FROM "{table}" WHERE {where} ORDER BY "{sort_column}" DESC, "{id_column}" DESC LIMIT ?',
+            [*params, limit]
+        )
+
+    def count_rows(self, table, column, value):
+        """Count the rows whose column equals value"""
+        self._check_columns(table, [column])
+        return self._connect().execute(f'SELECT COUNT(*) FROM "{table}" WHERE "{column}" = ?', (value,)).fetchone()[0]
+
+    def table_signature(self, table):
+        """Return (row count, highest rowid), which changes when any process inserts or deletes rows"""
+        return tuple(self._connect().execute(f'SELECT COUNT(*), MAX(rowid) FROM "{table}"').fetchone())
+
+    def lookup(self, table, column, value):
+        """Return the rows whose column equals value as a list of dicts"""
+        self._check_columns(table, [column])
+        return self.find_rows(table, column, value).to_dict("records")
+
+    def cache_stats(self):
+        """SQLite serves reads from its own page cache; no table cache is kept"""
+        return {"hits": 0, "misses": 0, "tables": 0}
+
+    def append_row(self, table, row):
+        """Insert a single row"""
+        self.append_rows(table, [row])
+
+    def append_rows(self, table, rows):
+        """Insert rows in a single transaction"""
+        if not rows:
+            return
+        columns = self._columns[table]
+        schema = self._schemas.get(table, {})
+        placeholders = ", ".join("?" for _ in columns)
+        quoted = ", ".join(f'"{col}"' for col in columns)
+        conn = self._connect()
+        with self.table_lock(table), conn:
+            conn.executemany(
+                f'INSERT INTO "{table}" ({quoted}) VALUES ({placeholders})',
+                [[encode_value(row.get(col), schema.get(col)) for col in columns] for row in rows],
+            )
+
+    def update_rows(self, table, column, value, values):
+        """Set values on the rows whose column equals value; returns the number of rows changed"""
+        self._check_columns(table, [column, *values])
+        schema = self._schemas.get(table, {})
+        assignments = ", ".join(f'"{col}" = ?' for col in values)
+        params = [encode_value(v, schema.get(col)) for col, v in values.items()]
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                f'UPDATE "{table}" SET {assignments} WHERE "{column}" = ?', [*params, encode_value(value)]
+            )
+        return cursor.rowcount
+
+    def increment_columns(self, table, key_column, increments):
+        """Add deltas to numeric columns for many keys ({key: {column: delta}}) in one transaction"""
+        columns = sorted({col for deltas in increments.values() for col in deltas})
+        self._check_columns(table, [key_column, *columns])
+        assignments = ", ".join(f'"{col}" = COALESCE("{col}", 0) + ?' for col in columns)
+        conn = self._connect()
+        with conn:
+            cursor = conn.executemany(
+                f'UPDATE "{table}" SET {assignments} WHERE "{key_column}" = ?',
+                [[deltas.get(col, 0) for col in columns] + [key] for key, deltas in increments.items()]
+            )
+        return cursor.rowcount
+
+    def clear_table(self, table):
+        """Remove every row"""
+        conn = self._connect()
+        with self.table_lock(table), conn:
+            conn.execute(f'DELETE FROM "{table}"')
+
+    def fold_deltas(self, log_table, table, key_column):
+        """Add a log of (id, key, counter, delta) rows onto table's counter columns and drop those rows.
+
+        Runs as one BEGIN IMMEDIATE transaction, so other processes can't write in between,
+        and only the entries read are deleted; returns the number of entries folded.
+        """
+        id_column = self._columns[log_table][0]
+        conn = self._connect()
+        with self.table_lock(log_table):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                entries = conn.execute(
+                    f'SELECT "{id_column}", "{key_column}", "counter", "delta" FROM "{log_table}"'
+                ).fetchall()
+                increments = {}
+                for _, key, counter, delta in entries:
+                    deltas = increments.setdefault(key, {})
+                    deltas[counter] = deltas.get(counter, 0) + int(delta or 0)
+                self._check_columns(table, [key_column, *{col for deltas in increments.values() for col in deltas}])
+                for key, deltas in increments.items():
+                    assignments = ", ".join(f'"{col}" = COALESCE("{col}", 0) + ?' for col in deltas)
+                    conn.execute(
+                        f'UPDATE "{table}" SET {assignments} WHERE "{key_column}" = ?', [*deltas.values(), key]
+                    )
+                conn.executemany(
+                    f'DELETE FROM "{log_table}" WHERE "{id_column}" = ?', [(entry[0],) for entry in entries]
+                )
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        return len(entries)
+
+
+def migrate_csv_to_sqlite(source, db_path, schemas):
+    """Copy every table from a CSVStorage into the SQLite database once.
+
+    Tables that already hold rows are skipped so the migration is safe to re-run.
+    Returns a dict of table name -> rows copied.
+    """
+    storage = SQLiteStorage(db_path)
+    conn = storage._connect()
+    copied = {}
+    for table, schema in schemas.items():
+        columns = list(schema)
+        storage.ensure_table(table, columns, schema)
+        if conn.execute(f'SELECT 1 FROM "{table}" LIMIT 1').fetchone():
+            copied[table] = 0
+            continue
+        df = source.read_table(table)
+        df = df[[col for col in columns if col in df.columns]]
+        rows = [
+            {col: encode_value(value, schema.get(col)) for col, value in row.items()}
+            for row in df.to_dict("records")
+        ]
+        quoted = ", ".join(f'"{col}"' for col in df.columns)
+        placeholders = ", ".join("?" for _ in df.columns)
+        with conn:
+            conn.executemany(
+                f'INSERT OR IGNORE INTO "{table}" ({quoted}) VALUES ({placeholders})',
+                [list(row.values()) for row in rows],
+            )
+        copied[table] = len(rows)
+    return copied
+
+
+if __name__ == "__main__":
+    # One-shot migration from the CSV files: python -m utils.storage [db_path]
+    import sys
+    from utils.data_manager import DataManager, TABLE_SCHEMAS
+
+    source = DataManager(backend="csv").storage
+    db_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(source.data_dir, "healthtech.db")
+    for table, count in migrate_csv_to_sqlite(source, db_path, TABLE_SCHEMAS).items():
+        print(f"{table}: {count} rows copied")
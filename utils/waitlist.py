@@ -0,0 +1,136 @@
+import os
+import heapq
+import threading
+import pandas as pd
+
+# Lower ranks are served first
+URGENCY_RANKS = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3}
+WAITING = "Waiting"
+# Entries returned by ranked() unless a caller asks for another page size
+PAGE_SIZE = 20
+
+
+def priority(entry):
+    """Heap key for a waitlist entry: urgency, then longest wait, then best match score"""
+    listed = pd.Timestamp(entry.get("listed_date")) if pd.notna(entry.get("listed_date")) else pd.Timestamp.max
+    score = entry.get("match_score")
+    return (
+        URGENCY_RANKS.get(entry.get("urgency"), len(URGENCY_RANKS)),
+        listed.value,
+        -(float(score) if pd.notna(score) else 0.0),
+        entry["recipient_id"]
+    )
+
+
+class WaitlistQueue:
+    """Priority order of the recipients still waiting, kept in binary heaps.
+
+    There is one heap for the whole list and one per organ, blood group and (organ,
+    blood group), so each view is read without sorting. Inserts and status or urgency
+    changes push one entry per view in O(log n); superseded and removed entries, and
+    entries left in a view they no longer belong to after an organ or blood group change,
+    are skipped lazily and dropped the next time a read pops past them. The queue is
+    shared by every DataManager over the same storage in the process and rebuilt from
+    the waitlist table whenever signature() shows another process has written to it.
+    """
+
+    _queues = {}
+    _lock = threading.RLock()
+
+    def __init__(self, source, signature):
+        self.source = os.path.abspath(source)
+        # signature() -> value that changes when the waitlist table is written (storage.table_signature)
+        self.signature = signature
+
+    def _queue(self, load=None):
+        queue = WaitlistQueue._queues.get(self.source)
+        if load is None:
+            return queue
+        signature = self.signature()
+        if queue is None or queue["signature"] != signature:
+            queue = {"entries": {}, "keys": {}, "heaps": {}, "signature": signature}
+            for entry in load().to_dict("records"):
+                self._push(queue, entry)
+            WaitlistQueue._queues[self.source] = queue
+        return queue
+
+    @staticmethod
+    def _views(entry):
+        organ, blood_group = entry.get("organ_needed"), entry.get("blood_group")
+        return [(None, None), (organ, None), (None, blood_group), (organ, blood_group)]
+
+    def _live(self, queue, view, key):
+        """Whether a heap key is the entry's current one and the entry still belongs to the view"""
+        return queue["keys"].get(key[-1]) == key and view in self._views(queue["entries"][key[-1]])
+
+    def _push(self, queue, entry):
+        recipient_id = entry["recipient_id"]
+        previous = queue["entries"].get(recipient_id)
+        queue["entries"][recipient_id] = entry
+        if entry.get("status") != WAITING:
+            # Matched, transplanted or removed: any heap entries left behind are now stale
+            queue["keys"].pop(recipient_id, None)
+            return
+        key = priority(entry)
+        # A new organ or blood group moves the entry to other views even when its key is unchanged
+        if queue["keys"].get(recipient_id) == key and self._views(previous) == self._views(entry):
+            return
+        queue["keys"][recipient_id] = key
+        for view in self._views(entry):
+            heapq.heappush(queue["heaps"].setdefault(view, []), key)
+        if len(queue["heaps"][(None, None)]) > 2 * len(queue["keys"]) + 64:
+            self._compact(queue)
+
+    def _compact(self, queue):
+        """Rebuild the heaps from the live entries once stale ones outnumber them"""
+        queue["heaps"] = {}
+        for key in queue["keys"].values():
+            for view in self._views(queue["entries"][key[-1]]):
+                queue["heaps"].setdefault(view, []).append(key)
+        for heap in queue["heaps"].values():
+            heapq.heapify(heap)
+
+    def upsert(self, entry, before):
+        """Apply a new or changed entry (status, urgency, score, organ, blood group) just written by this process.
+
+        before is the table's signature from before the write.
+        """
+        with WaitlistQueue._lock:
+            queue = self._queue()
+            if queue is not None:
+                self._push(queue, dict(entry))
+                # Skip the rebuild on the next read, unless the queue was already behind
+                if queue["signature"] == before:
+                    queue["signature"] = self.signature()
+
+    def ranked(self, load, organ=None, blood_group=None, limit=PAGE_SIZE, where=None):
+        """Waiting entries for a view in priority order, building the queue with load() -> DataFrame on first use.
+
+        Entries are popped until `limit` live ones matching where(entry) are found (stale
+        ones are discarded on the way) and then pushed back, so a page costs O(limit log n)
+        without a filter. limit=None ranks the whole view from a sorted copy of the heap.
+        """
+        with WaitlistQueue._lock:
+            queue = self._queue(load)
+            view = (organ, blood_group)
+            heap = queue["heaps"].get(view, [])
+            if limit is None:
+                live = sorted({key for key in heap if self._live(queue, view, key)})
+                return [queue["entries"][key[-1]] for key in live if where is None or where(queue["entries"][key[-1]])]
+            popped, live = [], []
+            while heap and len(live) < limit:
+                key = heapq.heappop(heap)
+                # Skip entries superseded by a later push, no longer waiting or moved to another view
+                if not self._live(queue, view, key) or (popped and popped[-1] == key):
+                    continue
+                popped.append(key)
+                if where is None or where(queue["entries"][key[-1]]):
+                    live.append(key)
+            for key in popped:
+                heapq.heappush(heap, key)
+            return [queue["entries"][key[-1]] for key in live]
+
+    def get(self, recipient_id, load):
+        """Return one waitlist entry (any status), or None"""
+        with WaitlistQueue._lock:
+            return self._queue(load)["entries"].get(recipient_id)
@@ -0,0 +1,183 @@
+import time
+import atexit
+import threading
+from collections import defaultdict
+
+
+class GroupCommitWriter:
+    """Write-behind wrapper around a storage engine.
+
+    Inserts are queued and a single background thread commits them per table with one
+    append_rows() call, so bursts of inserts from many sessions share one file write or
+    transaction. Reads and updates on a table first wait for its queued inserts, so
+    callers always see their own writes.
+    """
+
+    def __init__(self, storage, max_batch=100, max_delay=0.05):
+        self.storage = storage
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        self._pending = defaultdict(list)
+        self._first_pending_at = None
+        self._submitted = defaultdict(int)
+        self._committed = defaultdict(int)
+        self._failures = 0
+        self._batches = 0
+        self._rows = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="group-commit-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __getattr__(self, name):
+        # Anything not wrapped here (cache_stats, rebuild_index, ...) goes straight to the engine
+        return getattr(self.storage, name)
+
+    def submit(self, table, row):
+        """Queue a row for insertion and return immediately"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("writer is closed")
+            self._pending[table].append(row)
+            self._submitted[table] += 1
+            if self._first_pending_at is None:
+                self._first_pending_at = time.monotonic()
+            self._cond.notify_all()
+
+    def _take_batch(self):
+        """Wait for work, then take up to max_batch rows per table (called with the lock held)"""
+        while True:
+            if self._pending:
+                waited = time.monotonic() - self._first_pending_at
+                full = any(len(rows) >= self.max_batch for rows in self._pending.values())
+                if full or waited >= self.max_delay or self._closed:
+                    break
+                self._cond.wait(self.max_delay - waited)
+            elif self._closed:
+                return None
+            else:
+                self._cond.wait()
+        batch = {}
+        for table in list(self._pending):
+            rows = self._pending[table]
+            batch[table], self._pending[table] = rows[:self.max_batch], rows[self.max_batch:]
+            if not self._pending[table]:
+                del self._pending[table]
+        self._first_pending_at = time.monotonic() if self._pending else None
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+            if batch is None:
+                return
+            for table, rows in batch.items():
+                try:
+                    self.storage.append_rows(table, rows)
+                except Exception as e:
+                    print(f"Error committing {len(rows)} queued rows to {table}: {e}")
+                    with self._cond:
+                        self._failures += 1
+                with self._cond:
+                    self._committed[table] += len(rows)
+                    self._batches += 1
+                    self._rows += len(rows)
+                    self._cond.notify_all()
+
+    def flush(self, table=None, timeout=None):
+        """Durability barrier: wait until every row queued so far (for one table or all) is committed.
+
+        Returns False if the wait timed out or a batch failed while waiting.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            failures = self._failures
+            tables = [table] if table else list(self._submitted)
+            targets = {t: self._submitted[t] for t in tables}
+            # Skip the max_delay wait; the caller is blocked on these rows now
+            if any(self._committed[t] < n for t, n in targets.items()):
+                self._first_pending_at = time.monotonic() - self.max_delay
+                self._cond.notify_all()
+            while any(self._committed[t] < n for t, n in targets.items()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return self._failures == failures
+
+    def stats(self):
+        """Get queue depth and commit counters"""
+        with self._cond:
+            return {
+                "pending": sum(len(rows) for rows in self._pending.values()),
+                "batches": self._batches,
+                "rows": self._rows,
+                "failures": self._failures,
+            }
+
+    def close(self):
+        """Commit everything still queued and stop the writer thread"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def append_row(self, table, row):
+        self.submit(table, row)
+
+    def append_rows(self, table, rows):
+        for row in rows:
+            self.submit(table, row)
+
+    def read_table(self, table):
+        self.flush(table)
+        return self.storage.read_table(table)
+
+    def find_rows(self, table, column, value):
+        self.flush(table)
+        return self.storage.find_rows(table, column, value)
+
+    def read_range(self, table, *args, **kwargs):
+        self.flush(table)
+        return self.storage.read_range(table, *args, **kwargs)
+
+    def iter_range(self, table, *args, **kwargs):
+        self.flush(table)
+        return self.storage.iter_range(table, *args, **kwargs)
+
+    def read_page(self, table, *args, **kwargs):
+        self.flush(table)
+        return self.storage.read_page(table, *args, **kwargs)
+
+    def count_rows(self, table, column, value):
+        self.flush(table)
+        return self.storage.count_rows(table, column, value)
+
+    def table_signature(self, table):
+        self.flush(table)
+        return self.storage.table_signature(table)
+
+    def lookup(self, table, column, value):
+        self.flush(table)
+        return self.storage.lookup(table, column, value)
+
+    def update_rows(self, table, column, value, values):
+        self.flush(table)
+        return self.storage.update_rows(table, column, value, values)
+
+    def increment_columns(self, table, key_column, increments):
+        self.flush(table)
+        return self.storage.increment_columns(table, key_column, increments)
+
+    def clear_table(self, table):
+        self.flush(table)
+        return self.storage.clear_table(table)
+
+    def fold_deltas(self, log_table, table, key_column):
+        self.flush(log_table)
+        self.flush(table)
+        return self.storage.fold_deltas(log_table, table, key_column)